@@ -1,6 +1,7 @@
 import os
 import sys
-from typing import Any
+import threading
+from typing import Any, Callable
 try:
 	# Carrega variáveis do arquivo .env se existir
 	from dotenv import load_dotenv  # type: ignore[import-not-found]
@@ -85,6 +86,56 @@ def _choose_model_name(preferred: str | None) -> str:
 	# Se não conseguimos listar (falha de rede/escopo), tenta candidatos fixos
 	return preferred or candidates[0]
 
+# Comandos cujo resultado já diz tudo: não pedem resumo ao modelo.
+# CHATBOT_SEM_RESUMO substitui a lista (separada por vírgulas); CHATBOT_RESUMOS=0 desliga todos.
+COMANDOS_SEM_RESUMO = {"/help", "/ajuda", "/saldo", "/extrato", "/login", "/logout"}
+
+class ResumosEmSegundoPlano:
+	"""Gera os resumos pós-comando numa thread, sem segurar o prompt.
+
+	Resultados enviados enquanto um resumo está em andamento (ou dentro de
+	`espera` segundos do anterior) são agrupados num único pedido ao modelo.
+	"""
+
+	def __init__(self, resumir: Callable[[str], None], espera: float = 0.3) -> None:
+		self._resumir = resumir
+		self._espera = espera
+		self._pendentes: list[str] = []
+		self._cond = threading.Condition()
+		self._ativo = True
+		self._thread = threading.Thread(target=self._executar, name="resumos", daemon=True)
+		self._thread.start()
+
+	def enviar(self, resultado: str) -> None:
+		with self._cond:
+			self._pendentes.append(resultado)
+			self._cond.notify()
+
+	def encerrar(self) -> None:
+		"""Para a thread; resumos ainda não gerados são descartados."""
+		with self._cond:
+			self._ativo = False
+			self._pendentes.clear()
+			self._cond.notify()
+
+	def _executar(self) -> None:
+		while True:
+			with self._cond:
+				while self._ativo and not self._pendentes:
+					self._cond.wait()
+				if not self._ativo:
+					return
+				# Comandos em sequência: espera um pouco para juntá-los num resumo só
+				self._cond.wait(self._espera)
+				lote, self._pendentes = self._pendentes, []
+			if not lote:
+				continue
+			if len(lote) == 1:
+				self._resumir(f"Resumo da ação para o cliente: {lote[0]}")
+			else:
+				acoes = "\n".join(f"- {r}" for r in lote)
+				self._resumir(f"Resumo das ações para o cliente, em uma única resposta:\n{acoes}")
+
 def main() -> None:
 	# Configurar a chave da API de forma segura (via variável de ambiente)
 	genai.configure(api_key=_get_api_key())  # type: ignore[attr-defined]
@@ -94,6 +145,10 @@ def main() -> None:
 	chosen_model = _choose_model_name(env_model or "gemini-1.5-flash-latest")
 	model: Any = genai.GenerativeModel(chosen_model)  # type: ignore[attr-defined]
 
+	# Prazo por chamada e disjuntor: com o modelo lento/fora, responde localmente na hora
+	from resiliencia_llm import ModeloResiliente
+	llm = ModeloResiliente.do_ambiente(model)
+
 	# Integração com o serviço bancário
 	try:
 		from bank_service import BankApp, help_text
@@ -118,23 +173,46 @@ def main() -> None:
 		{"role": "user", "parts": [system_prompt]},
 	]
 
-	def chat_answer(text: str) -> None:
-		try:
-			history.append({"role": "user", "parts": [text]})
-			resp = model.generate_content(history)  # type: ignore[attr-defined]
-			answer = getattr(resp, "text", str(resp))
-			print(answer)
-			history.append({"role": "model", "parts": [answer]})
-		except Exception as exc:
-			print(f"Falha ao gerar resposta do assistente: {exc}")
+	# O histórico é compartilhado com a thread de resumos
+	history_lock = threading.Lock()
+
+	def chat_answer(text: str, resumo: bool = False, emitir: Callable[[str], None] = print) -> None:
+		pergunta = {"role": "user", "parts": [text]}
+		# Cópia tirada sob a trava; o modelo (até o prazo) é chamado fora dela,
+		# para um resumo em segundo plano não travar o prompt e vice-versa
+		with history_lock:
+			contexto = history + [pergunta]
+		resp = llm.gerar(contexto, mensagem=text)
+		if resp.do_modelo:
+			# Pergunta e resposta entram juntas: o histórico continua alternando user/model
+			with history_lock:
+				history.extend((pergunta, {"role": "model", "parts": [resp.texto]}))
+			emitir(resp.texto)
+		elif resp.motivo != "erro":
+			# Após um comando o resultado já foi impresso; a resposta local não acrescenta nada
+			if not resumo:
+				emitir(resp.texto)
+		else:
+			linhas = [f"Falha ao gerar resposta do assistente: {resp.erro}"]
 			avail = _list_available_models()
 			if avail:
-				print("Modelos disponíveis para sua chave:")
-				for name in avail:
-					print(f"  - {name}")
-				print("Dica: defina GEMINI_MODEL com um dos nomes acima e rode novamente.")
+				linhas.append("Modelos disponíveis para sua chave:")
+				linhas.extend(f"  - {name}" for name in avail)
+				linhas.append("Dica: defina GEMINI_MODEL com um dos nomes acima e rode novamente.")
 			else:
-				print("Não foi possível obter a lista de modelos.")
+				linhas.append("Não foi possível obter a lista de modelos.")
+			emitir("\n".join(linhas))
+
+	def emitir_resumo(texto: str) -> None:
+		# Chega com o prompt já na tela: imprime numa linha nova e redesenha o prompt
+		print(f"\n{texto}\n> ", end="", flush=True)
+
+	resumos = None
+	if os.getenv("CHATBOT_RESUMOS", "1") != "0":
+		resumos = ResumosEmSegundoPlano(lambda texto: chat_answer(texto, resumo=True, emitir=emitir_resumo))
+	sem_resumo = COMANDOS_SEM_RESUMO
+	if os.getenv("CHATBOT_SEM_RESUMO") is not None:
+		sem_resumo = {c.strip().lower() for c in os.getenv("CHATBOT_SEM_RESUMO", "").split(",") if c.strip()}
 
 	def parse_float(s: str) -> float:
 		try:
@@ -179,7 +257,7 @@ def main() -> None:
 					end  = input("Endereço (logradouro, nr - bairro - cidade/UF): ").strip()
 					msg = bank.novo_usuario(nome=nome, cpf=cpf, data_nascimento=nasc, endereco=end)
 				elif cmd == "/nova_conta":
-					msg = bank.nova_conta()
+					msg = bank.nova_conta(args[0].lower() if args else "corrente")
 				elif cmd == "/saldo":
 					msg = bank.saldo()
 				elif cmd == "/extrato":
@@ -196,6 +274,13 @@ def main() -> None:
 					else:
 						val = parse_float(args[0])
 						msg = bank.sacar(val)
+				elif cmd == "/transferir":
+					if len(args) < 2:
+						msg = "Uso: /transferir <conta> <valor>"
+					else:
+						numero = int(args[0])
+						val = parse_float(args[1])
+						msg = bank.transferir(numero, val)
 				elif cmd == "/simular_emprestimo":
 					if len(args) < 3:
 						msg = "Uso: /simular_emprestimo <valor> <parcelas> <taxa> (ex: 5000 12 0.02)"
@@ -224,12 +309,16 @@ def main() -> None:
 				msg = f"Erro ao executar comando: {exc}"
 
 			print(msg)
-			# Opcional: peça ao modelo para responder cordialmente ao resultado
-			chat_answer(f"Resumo da ação para o cliente: {msg}")
+			# Opcional: o modelo responde cordialmente ao resultado, em segundo plano
+			if resumos is not None and cmd not in sem_resumo:
+				resumos.enviar(msg)
 			continue
 
 		# Mensagem normal: conversa com o assistente
 		chat_answer(user)
 
+	if resumos is not None:
+		resumos.encerrar()
+
 if __name__ == "__main__":
 	main()
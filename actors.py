@@ -0,0 +1,97 @@
+from __future__ import annotations
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+_PARAR = None  # mensagem que encerra o laço do ator
+
+class AtorConta:
+    """Dono exclusivo de uma conta: executa as operações da sua caixa de
+    mensagens uma de cada vez, no event loop, sem travas em `Conta`.
+    Com a caixa vazia o ator fica estacionado (aguardando na fila, sem custo de CPU).
+    """
+
+    def __init__(self, chave: Hashable) -> None:
+        self.chave = chave
+        self.caixa: "asyncio.Queue[Optional[Tuple[Callable[[], Any], asyncio.Future]]]" = asyncio.Queue()
+        self.ultimo_uso = time.monotonic()
+        self.processadas = 0
+        self._tarefa = asyncio.get_running_loop().create_task(self._laco())
+
+    async def _laco(self) -> None:
+        while True:
+            mensagem = await self.caixa.get()
+            if mensagem is _PARAR:
+                return
+            fn, futuro = mensagem
+            if not futuro.cancelled():
+                try:
+                    futuro.set_result(fn())
+                except BaseException as exc:
+                    futuro.set_exception(exc)
+            self.processadas += 1
+            self.ultimo_uso = time.monotonic()
+
+    def enviar(self, fn: Callable[[], Any]) -> "asyncio.Future[Any]":
+        futuro: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.caixa.put_nowait((fn, futuro))
+        self.ultimo_uso = time.monotonic()
+        return futuro
+
+    @property
+    def ocioso(self) -> bool:
+        return self.caixa.empty()
+
+    def parar(self) -> None:
+        self.caixa.put_nowait(_PARAR)
+
+class SistemaAtores:
+    """Registro de atores por conta. Atores ociosos há mais de `ociosidade`
+    segundos são removidos (em ordem LRU, O(1) amortizado por mensagem) e
+    recriados sob demanda na próxima operação da conta.
+    """
+
+    def __init__(self, ociosidade: float = 60.0, max_atores: int = 100_000) -> None:
+        self.ociosidade = ociosidade
+        self.max_atores = max_atores
+        self._atores: "OrderedDict[Hashable, AtorConta]" = OrderedDict()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def __len__(self) -> int:
+        return len(self._atores)
+
+    def _ator(self, chave: Hashable) -> AtorConta:
+        ator = self._atores.get(chave)
+        if ator is None:
+            ator = AtorConta(chave)
+            self._atores[chave] = ator
+        else:
+            self._atores.move_to_end(chave)
+        return ator
+
+    def _despejar_ociosos(self) -> None:
+        limite = time.monotonic() - self.ociosidade
+        while self._atores:
+            chave, ator = next(iter(self._atores.items()))
+            excedeu = len(self._atores) > self.max_atores
+            if not (excedeu or ator.ultimo_uso < limite) or not ator.ocioso:
+                break
+            del self._atores[chave]
+            ator.parar()
+
+    async def executar(self, chave: Hashable, fn: Callable[[], Any]) -> Any:
+        """Envia `fn` ao ator da conta `chave` e aguarda a resposta."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Atores pertencem a um event loop; um loop novo (ex.: reinício do
+            # servidor ou cliente de testes) começa com um registro vazio.
+            self._atores.clear()
+            self._loop = loop
+        self._despejar_ociosos()
+        return await self._ator(chave).enviar(fn)
+
+    def encerrar(self) -> None:
+        while self._atores:
+            _, ator = self._atores.popitem(last=False)
+            ator.parar()
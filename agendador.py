@@ -0,0 +1,385 @@
+from __future__ import annotations
+import os
+import threading
+import uuid
+from calendar import monthrange
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from itertools import count
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from banco import Deposito, Saque, Transferencia, pagar_parcela_emprestimo
+
+TIPOS = ("deposito", "saque", "transferencia", "parcela")
+PERIODICIDADES = ("diaria", "semanal", "mensal")
+
+Relogio = Callable[[], datetime]
+
+class RelogioSimulado:
+    """Relógio que só anda com `avancar` (testes e benchmarks): permite
+    percorrer anos de agendamentos em segundos."""
+
+    def __init__(self, inicio: Optional[datetime] = None) -> None:
+        self._agora = inicio or datetime.now()
+
+    def __call__(self) -> datetime:
+        return self._agora
+
+    def avancar(self, delta: timedelta) -> datetime:
+        self._agora += delta
+        return self._agora
+
+class RodaTemporal:
+    """Roda de tempo hierárquica: `niveis` rodas de 2**bits posições, onde cada
+    posição do nível L cobre 2**(bits*L) ticks.
+
+    Um item com vencimento `e` fica no nível do dígito mais alto (base 2**bits)
+    em que `e` difere do tick atual, na posição do seu dígito daquele nível;
+    quando o tick atual chega ao início dessa posição, os itens descem de nível
+    (ou disparam). Inserir e remover são O(1). Cada nível tem um mapa de bits
+    das posições ocupadas, então `proximo` salta direto para o próximo tick com
+    itens, sem percorrer ticks vazios.
+    """
+
+    def __init__(self, atual: int = 0, bits: int = 6, niveis: int = 6) -> None:
+        self.atual = atual
+        self.bits = bits
+        self.niveis = niveis
+        self._mascara = (1 << bits) - 1
+        self._rodas: List[List[Dict[int, Tuple[int, Any]]]] = [
+            [{} for _ in range(1 << bits)] for _ in range(niveis)
+        ]
+        self._mapas = [0] * niveis
+        self._onde: Dict[int, Tuple[int, int]] = {}
+        self._vencidos: Dict[int, Tuple[int, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._onde) + len(self._vencidos)
+
+    def inserir(self, chave: int, tick: int, item: Any) -> None:
+        if tick <= self.atual:
+            self._vencidos[chave] = (tick, item)
+            return
+        nivel = ((tick ^ self.atual).bit_length() - 1) // self.bits
+        if nivel >= self.niveis:
+            raise ValueError("vencimento além do alcance da roda")
+        posicao = (tick >> (self.bits * nivel)) & self._mascara
+        self._rodas[nivel][posicao][chave] = (tick, item)
+        self._mapas[nivel] |= 1 << posicao
+        self._onde[chave] = (nivel, posicao)
+
+    def remover(self, chave: int) -> bool:
+        if self._vencidos.pop(chave, None) is not None:
+            return True
+        onde = self._onde.pop(chave, None)
+        if onde is None:
+            return False
+        nivel, posicao = onde
+        slot = self._rodas[nivel][posicao]
+        del slot[chave]
+        if not slot:
+            self._mapas[nivel] &= ~(1 << posicao)
+        return True
+
+    def _esvaziar(self, nivel: int, posicao: int) -> Dict[int, Tuple[int, Any]]:
+        slot = self._rodas[nivel][posicao]
+        self._rodas[nivel][posicao] = {}
+        self._mapas[nivel] &= ~(1 << posicao)
+        for chave in slot:
+            del self._onde[chave]
+        return slot
+
+    def _proximo_tick(self) -> Optional[int]:
+        # Itens de um nível têm vencimento anterior aos de qualquer nível acima
+        for nivel, mapa in enumerate(self._mapas):
+            if not mapa:
+                continue
+            deslocamento = self.bits * nivel
+            digito = (self.atual >> deslocamento) & self._mascara
+            acima = mapa >> (digito + 1)
+            posicao = digito + (acima & -acima).bit_length()
+            prefixo = (self.atual >> (deslocamento + self.bits)) << (deslocamento + self.bits)
+            return prefixo | (posicao << deslocamento)
+        return None
+
+    def proximo(self, ate: int) -> Optional[Tuple[int, List[Tuple[int, Any]]]]:
+        """Avança até o próximo tick com itens vencidos (no máximo `ate`) e os
+        devolve, em ordem de vencimento, como (chave, item). None se não houver."""
+        if self._vencidos:
+            vencidos, self._vencidos = self._vencidos, {}
+            ordem = sorted(vencidos.items(), key=lambda kv: (kv[1][0], kv[0]))
+            return self.atual, [(chave, item) for chave, (_, item) in ordem]
+        while True:
+            tick = self._proximo_tick()
+            if tick is None or tick > ate:
+                self.atual = max(self.atual, ate)
+                return None
+            self.atual = tick
+            disparados: List[Tuple[int, Any]] = []
+            for nivel in range(self.niveis):
+                deslocamento = self.bits * nivel
+                if tick & ((1 << deslocamento) - 1):
+                    break
+                posicao = (tick >> deslocamento) & self._mascara
+                if not self._mapas[nivel] >> posicao & 1:
+                    continue
+                for chave, (vencimento, item) in self._esvaziar(nivel, posicao).items():
+                    if vencimento <= tick:
+                        disparados.append((chave, item))
+                    else:
+                        self.inserir(chave, vencimento, item)
+            if disparados:
+                return tick, disparados
+
+@dataclass(eq=False)
+class Agendamento:
+    """Transação futura (ou recorrente) sobre `conta`, executada pelo Agendador.
+    O `id` é único entre processos (vai para sessões compartilhadas); `ordem`
+    é a posição de criação no agendador, que desempata os de um mesmo tick."""
+    id: str
+    conta: Any
+    tipo: str
+    valor: float
+    quando: datetime
+    periodicidade: Optional[str] = None
+    vezes: Optional[int] = None  # execuções restantes (None: sem fim)
+    destino: Any = None  # conta de destino das transferências
+    origem: Optional[str] = None  # sessão que criou o agendamento
+    status: str = "agendado"
+    execucoes: int = 0
+    falhas: int = 0
+    dia: int = field(default=0, repr=False)  # dia do mês original, para a recorrência mensal
+    rotina: Optional[Callable[[], Any]] = field(default=None, repr=False)  # tarefas sem conta (Agendador.rotina)
+    ordem: int = field(default=0, repr=False)
+
+    def como_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id, "tipo": self.tipo, "valor": self.valor,
+            "quando": self.quando.strftime("%Y-%m-%d %H:%M:%S"), "periodicidade": self.periodicidade,
+            "vezes": self.vezes, "numero": self.conta.numero,
+            "numero_destino": self.destino.numero if self.destino is not None else None,
+            "status": self.status, "execucoes": self.execucoes, "falhas": self.falhas,
+        }
+
+def proxima_data(quando: datetime, periodicidade: str, dia: int = 0) -> datetime:
+    if periodicidade == "diaria":
+        return quando + timedelta(days=1)
+    if periodicidade == "semanal":
+        return quando + timedelta(weeks=1)
+    ano, mes = (quando.year + 1, 1) if quando.month == 12 else (quando.year, quando.month + 1)
+    # Mantém o dia original quando o mês permite (31/01 -> 28/02 -> 31/03)
+    return quando.replace(year=ano, month=mes, day=min(dia or quando.day, monthrange(ano, mes)[1]))
+
+def executar_agendamento(ag: Agendamento, conta: Any = None, destino: Any = None) -> bool:
+    """Executa a transação do agendamento pelo caminho normal (Transacao.registrar);
+    `conta`/`destino` substituem as do agendamento (ex.: sessão recarregada) e
+    passam a ser as dele: o reagendamento olha a conta em que de fato executou."""
+    if ag.rotina is not None:
+        ag.rotina()
+        return True
+    if conta is not None:
+        ag.conta = conta
+    if destino is not None:
+        ag.destino = destino
+    conta = ag.conta
+    cliente = conta.cliente
+    if ag.tipo == "parcela":
+        emprestimo = getattr(cliente, "emprestimo", None) or {}
+        pagas = emprestimo.get("parcelas_pagas", 0)
+        pagar_parcela_emprestimo(cliente)
+        return emprestimo.get("parcelas_pagas", 0) > pagas
+    if ag.tipo == "transferencia":
+        transacao = Transferencia(ag.valor, ag.destino)
+    else:
+        transacao = Deposito(ag.valor) if ag.tipo == "deposito" else Saque(ag.valor)
+    return cliente.realizar_transacao(conta, transacao)
+
+def _quitado(cliente: Any) -> bool:
+    # Mesmo critério de BankApp.pagar_parcela_resultado (o saldo devedor pode sobrar em centavos)
+    emprestimo = getattr(cliente, "emprestimo", None) or {}
+    return (emprestimo.get("saldo_devedor", 0) <= 0
+            or emprestimo.get("parcelas_pagas", 0) >= emprestimo.get("parcelas", 0))
+
+class Agendador:
+    """Agendamentos de depósitos, saques, transferências e parcelas de
+    empréstimo, guardados numa RodaTemporal com ticks de `resolucao` segundos.
+
+    `executar_vencidos` dispara os vencidos até o instante do `relogio`, tick a
+    tick em ordem cronológica: cada lote roda em no máximo `max_workers`
+    threads, com os agendamentos de uma mesma conta em sequência. Recorrências
+    são reagendadas a partir da data prevista (não da execução), então avançar
+    um RelogioSimulado por anos executa cada ocorrência na ordem certa.
+    `iniciar` liga uma thread que chama `executar_vencidos` a cada tick.
+    """
+
+    def __init__(self, relogio: Relogio = datetime.now, max_workers: int = 4, resolucao: float = 1.0,
+                 executar: Callable[[Agendamento], bool] = executar_agendamento) -> None:
+        self.relogio = relogio
+        self.resolucao = resolucao
+        self.max_workers = max(1, max_workers)
+        self._executar = executar
+        self._lock = threading.Lock()
+        self._disparo = threading.Lock()
+        self._roda = RodaTemporal(self._tick(relogio()))
+        self._agendamentos: Dict[str, Agendamento] = {}
+        # Ids "<prefixo do agendador>-<ordem>": únicos entre workers e reiniciados
+        self._prefixo = uuid.uuid4().hex[:16]
+        self._ordem = count(1)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="agendador")
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.estatisticas = {"executados": 0, "falhas": 0, "lotes": 0}
+
+    @classmethod
+    def do_ambiente(cls, **kwargs: Any) -> "Agendador":
+        """BANCO_AGENDADOR_WORKERS e BANCO_AGENDADOR_RESOLUCAO_SECONDS ajustam o agendador."""
+        return cls(
+            max_workers=int(os.getenv("BANCO_AGENDADOR_WORKERS", "4")),
+            resolucao=float(os.getenv("BANCO_AGENDADOR_RESOLUCAO_SECONDS", "1")),
+            **kwargs,
+        )
+
+    def _tick(self, instante: datetime) -> int:
+        return int(instante.timestamp() // self.resolucao)
+
+    def __len__(self) -> int:
+        return len(self._roda)
+
+    # ---------- Agendamentos ----------
+    def agendar(self, conta: Any, tipo: str, valor: float, quando: datetime, periodicidade: Optional[str] = None,
+                vezes: Optional[int] = None, destino: Any = None, origem: Optional[str] = None) -> Agendamento:
+        if tipo not in TIPOS:
+            raise ValueError(f"tipo de agendamento inválido: {tipo}")
+        if periodicidade is not None and periodicidade not in PERIODICIDADES:
+            raise ValueError(f"periodicidade inválida: {periodicidade}")
+        if tipo == "transferencia" and destino is None:
+            raise ValueError("transferência agendada sem conta de destino")
+        if vezes is not None and vezes <= 0:
+            raise ValueError("vezes deve ser positivo")
+        ordem = next(self._ordem)
+        ag = Agendamento(f"{self._prefixo}-{ordem}", conta, tipo, valor, quando, periodicidade,
+                         vezes if periodicidade else 1, destino, origem, dia=quando.day, ordem=ordem)
+        with self._lock:
+            self._roda.inserir(ag.ordem, self._tick(quando), ag)
+            self._agendamentos[ag.id] = ag
+        return ag
+
+    def rotina(self, fn: Callable[[], Any], quando: datetime, periodicidade: Optional[str] = None) -> Agendamento:
+        """Agenda uma tarefa do processo, sem conta (ex.: juros diários das poupanças)."""
+        if periodicidade is not None and periodicidade not in PERIODICIDADES:
+            raise ValueError(f"periodicidade inválida: {periodicidade}")
+        ordem = next(self._ordem)
+        ag = Agendamento(f"{self._prefixo}-{ordem}", None, "rotina", 0.0, quando, periodicidade, None,
+                         dia=quando.day, rotina=fn, ordem=ordem)
+        with self._lock:
+            self._roda.inserir(ag.ordem, self._tick(quando), ag)
+            self._agendamentos[ag.id] = ag
+        return ag
+
+    def cancelar(self, id: str) -> bool:
+        with self._lock:
+            ag = self._agendamentos.pop(id, None)
+            if ag is None:
+                return False
+            self._roda.remover(ag.ordem)
+            ag.status = "cancelado"
+            return True
+
+    def obter(self, id: str) -> Optional[Agendamento]:
+        return self._agendamentos.get(id)
+
+    def emitido(self, id: Any) -> bool:
+        """True se o id saiu deste agendador (os de outro worker não estão aqui).
+        Ids inteiros, de antes dos prefixos, eram sempre do próprio processo."""
+        return not isinstance(id, str) or id.startswith(self._prefixo + "-")
+
+    # ---------- Execução ----------
+    def executar_vencidos(self, ate: Optional[datetime] = None) -> int:
+        """Executa os agendamentos vencidos até `ate` (padrão: agora no relógio)."""
+        limite = self._tick(ate or self.relogio())
+        total = 0
+        with self._disparo:  # um disparo por vez: os lotes saem em ordem cronológica
+            while True:
+                with self._lock:
+                    lote = self._roda.proximo(limite)
+                if lote is None:
+                    return total
+                self._disparar([ag for _, ag in lote[1]])
+                total += len(lote[1])
+
+    def _disparar(self, lote: List[Agendamento]) -> None:
+        por_conta: Dict[int, List[Agendamento]] = {}
+        for ag in lote:
+            por_conta.setdefault(id(ag.conta), []).append(ag)
+        # Uma fatia de contas por thread; lotes de uma conta só rodam aqui mesmo
+        grupos = list(por_conta.values())
+        fatias = [grupos[i::self.max_workers] for i in range(min(self.max_workers, len(grupos)))]
+        if len(fatias) == 1:
+            resultados = self._executar_fatia(fatias[0])
+        else:
+            resultados = [ok for oks in self._pool.map(self._executar_fatia, fatias) for ok in oks]
+        falhas = resultados.count(False)
+        self.estatisticas["lotes"] += 1
+        self.estatisticas["executados"] += len(resultados) - falhas
+        self.estatisticas["falhas"] += falhas
+        with self._lock:
+            for ag in lote:
+                self._reagendar(ag)
+
+    def _executar_fatia(self, grupos: List[List[Agendamento]]) -> List[bool]:
+        """Executa os grupos (um por conta), cada um na ordem de agendamento."""
+        resultados = []
+        for ag in (ag for grupo in grupos for ag in grupo):
+            try:
+                ok = bool(self._executar(ag))
+            except Exception:
+                ok = False
+            if ok:
+                ag.execucoes += 1
+            else:
+                ag.falhas += 1
+            resultados.append(ok)
+        return resultados
+
+    def _reagendar(self, ag: Agendamento) -> None:
+        if ag.status == "cancelado":
+            return
+        if ag.vezes is not None:
+            ag.vezes -= 1
+        if ag.periodicidade is None or ag.vezes == 0 or (ag.tipo == "parcela" and _quitado(ag.conta.cliente)):
+            ag.status = "concluido"
+            self._agendamentos.pop(ag.id, None)
+            return
+        ag.quando = proxima_data(ag.quando, ag.periodicidade, ag.dia)
+        self._roda.inserir(ag.ordem, self._tick(ag.quando), ag)
+
+    # ---------- Thread de disparo ----------
+    def iniciar(self) -> "Agendador":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._laco, name="agendador-relogio", daemon=True)
+            self._thread.start()
+        return self
+
+    def _laco(self) -> None:
+        while not self._parar.wait(self.resolucao):
+            self.executar_vencidos()
+
+    def encerrar(self) -> None:
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._pool.shutdown(wait=True)
+
+# Agendador usado pelo BankApp; servidores/testes trocam com definir_agendador
+_AGENDADOR: Optional[Agendador] = None
+
+def definir_agendador(agendador: Optional[Agendador]) -> None:
+    global _AGENDADOR
+    _AGENDADOR = agendador
+
+def obter_agendador() -> Agendador:
+    global _AGENDADOR
+    if _AGENDADOR is None:
+        _AGENDADOR = Agendador.do_ambiente()
+    return _AGENDADOR
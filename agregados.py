@@ -0,0 +1,245 @@
+from __future__ import annotations
+import threading
+import weakref
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+# Valores acumulados por célula, na ordem dos índices abaixo
+METRICAS = (
+    "saldo_total", "contas", "contas_corrente", "contas_poupanca",
+    "saldo_devedor", "emprestimos_ativos", "transacoes", "volume",
+)
+(_SALDO, _CONTAS, _CORRENTE, _POUPANCA, _DEVEDOR, _ATIVOS, _TRANSACOES, _VOLUME) = range(len(METRICAS))
+_POR_TIPO = {"corrente": _CORRENTE, "poupanca": _POUPANCA}
+
+# (totais na ordem de METRICAS, {dia: [transações, volume]}) de um conjunto de contas
+Contribuicao = Tuple[List[float], Dict[str, List[float]]]
+
+class _Celula:
+    """Contadores de uma thread: só ela escreve, sem trava."""
+    __slots__ = ("valores", "dias")
+
+    def __init__(self) -> None:
+        self.valores: List[float] = [0.0] * len(METRICAS)
+        self.dias: Dict[str, List[float]] = {}  # "%Y-%m-%d" -> [transações, volume]
+
+class _Dono:
+    # Guardado no threading.local: é coletado quando a thread termina
+    __slots__ = ("celula", "__weakref__")
+
+    def __init__(self, celula: _Celula) -> None:
+        self.celula = celula
+
+class AgregadosBanco:
+    """Totais do banco mantidos a cada evento, para leitura em tempo constante:
+    saldo sob custódia, contas (por tipo), saldo devedor e empréstimos ativos,
+    e transações/volume (total e por dia, nos últimos `dias_retidos` dias).
+
+    Os eventos cobrem o que acontece no processo. Contas que já existiam ao
+    serem carregadas (sessões desserializadas, snapshots, importações) entram
+    de uma vez por `incorporar`/`somar`, e seus registros antigos não contam
+    como transações novas.
+
+    Cada thread soma numa célula própria, sem disputar trava com as demais; a
+    leitura soma as células vivas e a base, onde são consolidadas as células
+    de threads encerradas. O custo da leitura depende do número de threads e
+    de dias retidos, não do de contas. Os totais são do processo: com vários
+    workers, cada um vê os eventos que processou.
+    """
+
+    def __init__(self, dias_retidos: int = 31) -> None:
+        self.dias_retidos = dias_retidos
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._base = _Celula()
+        self._celulas: List[_Celula] = []
+        self._pendentes: List[Callable[[], Contribuicao]] = []
+
+    def _celula(self) -> _Celula:
+        dono = getattr(self._local, "dono", None)
+        if dono is None:
+            celula = _Celula()
+            with self._lock:
+                self._celulas.append(celula)
+            dono = self._local.dono = _Dono(celula)
+            weakref.finalize(dono, self._consolidar, celula)
+        return dono.celula
+
+    def _consolidar(self, celula: _Celula) -> None:
+        with self._lock:
+            if celula not in self._celulas:
+                return
+            self._celulas.remove(celula)
+            for i, valor in enumerate(celula.valores):
+                self._base.valores[i] += valor
+            for dia, (quantidade, volume) in celula.dias.items():
+                atual = self._base.dias.setdefault(dia, [0.0, 0.0])
+                atual[0] += quantidade
+                atual[1] += volume
+            self._podar(self._base.dias)
+
+    def _podar(self, dias: Dict[str, List[float]]) -> None:
+        _podar(dias, self.dias_retidos)
+
+    # ---------- Eventos ----------
+    def saldo(self, delta: float) -> None:
+        self._celula().valores[_SALDO] += delta
+
+    def transacao(self, tipo: str, valor: float, data: str) -> None:
+        if tipo == "TransferenciaRecebida":
+            return  # a transferência já entrou pelo lado que enviou
+        celula = self._celula()
+        celula.valores[_TRANSACOES] += 1
+        celula.valores[_VOLUME] += valor
+        dia = data[:10]
+        atual = celula.dias.get(dia)
+        if atual is None:
+            atual = celula.dias[dia] = [0.0, 0.0]
+            if len(celula.dias) > self.dias_retidos:
+                self._podar(celula.dias)
+        atual[0] += 1
+        atual[1] += valor
+
+    def conta_aberta(self, tipo: str = "corrente") -> None:
+        valores = self._celula().valores
+        valores[_CONTAS] += 1
+        valores[_POR_TIPO[tipo]] += 1
+
+    def conta_encerrada(self, tipo: str = "corrente", saldo: float = 0.0) -> None:
+        valores = self._celula().valores
+        valores[_CONTAS] -= 1
+        valores[_POR_TIPO[tipo]] -= 1
+        valores[_SALDO] -= saldo
+
+    def emprestimo(self, antes: float, depois: float) -> None:
+        """Saldo devedor de um cliente passou de `antes` para `depois`."""
+        valores = self._celula().valores
+        valores[_DEVEDOR] += depois - antes
+        valores[_ATIVOS] += (depois > 0) - (antes > 0)
+
+    # ---------- Contas carregadas ----------
+    def somar(self, totais: List[float], dias: Dict[str, List[float]], sinal: int = 1) -> None:
+        """Soma (ou, com `sinal=-1`, desconta) uma contribuição pronta."""
+        with self._lock:
+            base = self._base
+            for i, valor in enumerate(totais):
+                base.valores[i] += sinal * valor
+            for dia, (quantidade, volume) in dias.items():
+                atual = base.dias.setdefault(dia, [0.0, 0.0])
+                atual[0] += sinal * quantidade
+                atual[1] += sinal * volume
+                if not atual[0]:
+                    del base.dias[dia]
+            self._podar(base.dias)
+
+    def incorporar(self, contas: Iterable[Any], clientes: Iterable[Any], sinal: int = 1) -> None:
+        """Soma (ou desconta) contas e clientes carregados prontos, pelos resumos diários."""
+        self.somar(*contribuicao_contas(contas, clientes, self.dias_retidos), sinal=sinal)
+
+    def incorporar_depois(self, fonte: Callable[[], Contribuicao]) -> None:
+        """Como `somar`, com a contribuição calculada só na próxima leitura
+        (snapshots abertos sem varrer o arquivo)."""
+        with self._lock:
+            self._pendentes.append(fonte)
+
+    # ---------- Leitura ----------
+    def instantaneo(self) -> Dict[str, Any]:
+        with self._lock:
+            pendentes, self._pendentes = self._pendentes, []
+        for fonte in pendentes:
+            self.somar(*fonte())
+        with self._lock:
+            celulas = [self._base, *self._celulas]
+        totais = [sum(c.valores[i] for c in celulas) for i in range(len(METRICAS))]
+        dias: Dict[str, List[float]] = {}
+        for celula in celulas:
+            for dia, (quantidade, volume) in list(celula.dias.items()):
+                atual = dias.setdefault(dia, [0.0, 0.0])
+                atual[0] += quantidade
+                atual[1] += volume
+        return _formatar(totais, dias, self.dias_retidos)
+
+    def zerar(self) -> None:
+        with self._lock:
+            self._base = _Celula()
+            self._pendentes = []
+            for celula in self._celulas:
+                celula.valores[:] = [0.0] * len(METRICAS)
+                celula.dias.clear()
+
+def _formatar(totais: List[float], dias: Dict[str, List[float]], dias_retidos: int) -> Dict[str, Any]:
+    v = dict(zip(METRICAS, totais))
+    return {
+        "saldo_total": round(v["saldo_total"], 2),
+        "contas": {"total": int(v["contas"]), "corrente": int(v["contas_corrente"]),
+                   "poupanca": int(v["contas_poupanca"])},
+        "emprestimos": {"ativos": int(v["emprestimos_ativos"]), "saldo_devedor": round(v["saldo_devedor"], 2)},
+        "transacoes": {"total": int(v["transacoes"]), "volume": round(v["volume"], 2)},
+        "por_dia": [
+            {"data": dia, "transacoes": int(q), "volume": round(vol, 2)}
+            for dia, (q, vol) in sorted(dias.items())[-dias_retidos:]
+        ],
+    }
+
+def _podar(dias: Dict[str, List[float]], dias_retidos: int) -> None:
+    for dia in sorted(dias)[:-dias_retidos]:
+        del dias[dia]
+
+def contribuicao(saldos: Iterable[float] = (), tipos: Iterable[str] = (),
+                 movimentos: Iterable[Tuple[str, float, float, str]] = (), devedores: Iterable[float] = (),
+                 dias_retidos: int = 31) -> Contribuicao:
+    """Totais de contas já existentes: saldos, tipos ("corrente"/"poupanca"),
+    movimentos (tipo, quantidade, volume, dia) e saldos devedores dos clientes."""
+    totais = [0.0] * len(METRICAS)
+    dias: Dict[str, List[float]] = {}
+    for saldo in saldos:
+        totais[_SALDO] += saldo
+    for tipo in tipos:
+        totais[_CONTAS] += 1
+        totais[_POR_TIPO[tipo]] += 1
+    for tipo, quantidade, volume, dia in movimentos:
+        if tipo == "TransferenciaRecebida":
+            continue  # a transferência já entrou pelo lado que enviou
+        totais[_TRANSACOES] += quantidade
+        totais[_VOLUME] += volume
+        atual = dias.setdefault(dia, [0.0, 0.0])
+        atual[0] += quantidade
+        atual[1] += volume
+    for devedor in devedores:
+        totais[_DEVEDOR] += devedor
+        totais[_ATIVOS] += devedor > 0
+    _podar(dias, dias_retidos)
+    return totais, dias
+
+def _devedor(cliente: Any) -> float:
+    return float((getattr(cliente, "emprestimo", None) or {}).get("saldo_devedor", 0.0))
+
+def contribuicao_contas(contas: Iterable[Any], clientes: Iterable[Any], dias_retidos: int = 31) -> Contribuicao:
+    """Contribuição de contas montadas, pelos resumos diários dos históricos
+    (sem ler as transações, que podem estar na camada fria)."""
+    from banco import tipo_conta  # banco importa este módulo
+
+    contas = list(contas)
+    movimentos = (
+        (tipo, quantidade, resumo["totais"][tipo], resumo["data"])
+        for conta in contas for resumo in conta.historico.resumos_diarios
+        for tipo, quantidade in resumo["quantidades"].items()
+    )
+    return contribuicao((c.saldo for c in contas), (tipo_conta(c) for c in contas), movimentos,
+                        (_devedor(c) for c in clientes), dias_retidos)
+
+def calcular(contas: Iterable[Any], clientes: Iterable[Any], dias_retidos: int = 31) -> Dict[str, Any]:
+    """Os mesmos totais por varredura de contas, históricos e empréstimos
+    (referência para conferir os incrementais)."""
+    from banco import tipo_conta  # banco importa este módulo
+
+    contas = list(contas)
+    movimentos = (
+        (registro["tipo"], 1, registro["valor"], registro["data"][:10])
+        for conta in contas for registro in conta.historico.transacoes
+    )
+    totais, dias = contribuicao((c.saldo for c in contas), (tipo_conta(c) for c in contas), movimentos,
+                                (_devedor(c) for c in clientes), dias_retidos)
+    return _formatar(totais, dias, dias_retidos)
+
+# Agregados do processo, alimentados por banco, bank_service e bulk_io
+AGREGADOS = AgregadosBanco()
@@ -0,0 +1,177 @@
+from __future__ import annotations
+import logging
+import math
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from banco import SINAL_TRANSACAO, registrar_observador, remover_observador
+
+logger = logging.getLogger("banco.anomalias")
+
+@dataclass
+class Alerta:
+    conta: int
+    agencia: str
+    tipo: str
+    valor: float
+    motivo: str
+    pontuacao: float
+    momento: float
+
+def _sink_log(alerta: Alerta) -> None:
+    logger.warning(
+        "Anomalia na conta %s/%s: %s (%s de R$ %.2f, pontuação %.2f)",
+        alerta.agencia, alerta.conta, alerta.motivo, alerta.tipo, alerta.valor, alerta.pontuacao,
+    )
+
+class DetectorAnomalias:
+    """Estágio de análise em streaming sobre as transações efetivadas.
+
+    Por conta mantém, em arrays compactos indexados por um slot:
+    - média e variância com peso exponencial (EWMA) dos valores de crédito e
+      de débito, separadamente;
+    - contagem de débitos numa janela deslizante, em `baldes` intervalos
+      circulares de `janela / baldes` segundos.
+
+    Cada transação custa O(1) (O(baldes) para a janela, constante). Regras:
+    - valor acima de `limiar_z` desvios da média da conta (após `minimo_amostras`);
+    - mais de `max_debitos_janela` débitos dentro de `janela` segundos.
+
+    A conta é identificada por (agência, número, CPF do titular), estável
+    entre cargas da sessão e snapshots; o CPF separa as contas de mesmo
+    número em sessões diferentes. Slots sem transações há `ociosidade`
+    segundos são liberados e reaproveitados; acima de `max_contas`, os menos
+    recentes também.
+    """
+
+    def __init__(self, sink: Optional[Callable[[Alerta], None]] = None, alpha: float = 0.1,
+                 limiar_z: float = 4.0, minimo_amostras: int = 5, janela: float = 60.0,
+                 baldes: int = 6, max_debitos_janela: int = 5, ociosidade: float = 7 * 24 * 3600,
+                 max_contas: int = 1_000_000, relogio: Callable[[], float] = time.time) -> None:
+        self.sink = sink or _sink_log
+        self.alpha = alpha
+        self.limiar_z = limiar_z
+        self.minimo_amostras = minimo_amostras
+        self.baldes = baldes
+        self.largura_balde = janela / baldes
+        self.max_debitos_janela = max_debitos_janela
+        self.ociosidade = ociosidade
+        self.max_contas = max_contas
+        self._relogio = relogio
+        self._slots: Dict[Hashable, int] = {}
+        self._chaves: List[Optional[Hashable]] = []  # slot -> chave (None: livre)
+        self._livres: List[int] = []
+        self._proxima_varredura = relogio() + ociosidade / 10
+        self._lock = threading.Lock()
+        # [crédito, débito] intercalados: índice 2*slot + (0 crédito | 1 débito)
+        self._media = array("d")
+        self._var = array("d")
+        self._n = array("l")
+        # janela deslizante de débitos: `baldes` posições por slot
+        self._contagem = array("l")
+        self._epoca = array("q")
+        self._visto = array("d")  # última transação do slot
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _slot(self, chave: Hashable, agora: float) -> int:
+        slot = self._slots.get(chave)
+        if slot is None:
+            if agora >= self._proxima_varredura or len(self._slots) >= self.max_contas:
+                self._varrer(agora)
+            if self._livres:
+                slot = self._livres.pop()
+                self._chaves[slot] = chave
+                self._media[2 * slot:2 * slot + 2] = array("d", (0.0, 0.0))
+                self._var[2 * slot:2 * slot + 2] = array("d", (0.0, 0.0))
+                self._n[2 * slot:2 * slot + 2] = array("l", (0, 0))
+                base = slot * self.baldes
+                self._contagem[base:base + self.baldes] = array("l", [0] * self.baldes)
+                self._epoca[base:base + self.baldes] = array("q", [-1] * self.baldes)
+            else:
+                slot = len(self._chaves)
+                self._chaves.append(chave)
+                self._media.extend((0.0, 0.0))
+                self._var.extend((0.0, 0.0))
+                self._n.extend((0, 0))
+                self._contagem.extend([0] * self.baldes)
+                self._epoca.extend([-1] * self.baldes)
+                self._visto.append(agora)
+            self._slots[chave] = slot
+        self._visto[slot] = agora
+        return slot
+
+    def _varrer(self, agora: float) -> None:
+        """Libera slots ociosos e, acima de `max_contas`, os menos recentes."""
+        self._proxima_varredura = agora + self.ociosidade / 10
+        ocupados = [slot for slot in self._slots.values()]
+        liberar = [slot for slot in ocupados if self._visto[slot] < agora - self.ociosidade]
+        excedente = len(ocupados) - len(liberar) - self.max_contas + 1
+        if excedente > 0:
+            # Libera uma folga de 10% para não varrer a cada conta nova
+            restantes = sorted(set(ocupados) - set(liberar), key=self._visto.__getitem__)
+            liberar += restantes[:max(excedente, self.max_contas // 10)]
+        for slot in liberar:
+            del self._slots[self._chaves[slot]]
+            self._chaves[slot] = None
+            self._livres.append(slot)
+
+    @staticmethod
+    def chave_conta(conta: Any) -> Hashable:
+        return (conta.agencia, conta.numero, getattr(conta.cliente, "cpf", None))
+
+    def observar(self, conta: Any, tipo: str, valor: float) -> None:
+        """Observador para banco.registrar_observador."""
+        alertas = self.processar(self.chave_conta(conta), tipo, valor)
+        for motivo, pontuacao in alertas:
+            self.sink(Alerta(conta.numero, conta.agencia, tipo, valor, motivo, pontuacao, self._relogio()))
+
+    def processar(self, chave: Hashable, tipo: str, valor: float) -> list:
+        """Atualiza as estatísticas da conta `chave` e devolve [(motivo, pontuação)]."""
+        debito = SINAL_TRANSACAO.get(tipo, 1) < 0
+        alertas = []
+        with self._lock:
+            agora = self._relogio()
+            slot = self._slot(chave, agora)
+            i = 2 * slot + int(debito)
+
+            # 1) valor fora do padrão da conta (z-score contra a EWMA anterior)
+            media, var, n = self._media[i], self._var[i], self._n[i]
+            if n >= self.minimo_amostras:
+                desvio = math.sqrt(var)
+                z = (valor - media) / desvio if desvio > 0 else (math.inf if valor > media * 2 else 0.0)
+                if z > self.limiar_z:
+                    alertas.append(("valor muito acima do habitual", z))
+            diferenca = valor - media if n else 0.0
+            self._media[i] = media + self.alpha * diferenca if n else valor
+            self._var[i] = (1 - self.alpha) * (var + self.alpha * diferenca * diferenca)
+            self._n[i] = n + 1
+
+            # 2) rajada de débitos na janela deslizante
+            if debito:
+                epoca = int(agora // self.largura_balde)
+                base = slot * self.baldes
+                pos = base + epoca % self.baldes
+                if self._epoca[pos] != epoca:
+                    self._epoca[pos] = epoca
+                    self._contagem[pos] = 0
+                self._contagem[pos] += 1
+                minimo = epoca - self.baldes + 1
+                na_janela = 0
+                for j in range(base, base + self.baldes):
+                    if self._epoca[j] >= minimo:
+                        na_janela += self._contagem[j]
+                if na_janela > self.max_debitos_janela:
+                    alertas.append(("rajada de débitos", float(na_janela)))
+        return alertas
+
+    def conectar(self) -> "DetectorAnomalias":
+        registrar_observador(self.observar)
+        return self
+
+    def desconectar(self) -> None:
+        remover_observador(self.observar)
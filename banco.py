@@ -1,10 +1,74 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from bisect import bisect_left, bisect_right
+from calendar import monthrange
+from datetime import date, datetime
+from functools import wraps
+from itertools import count
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Union
+import logging
+import sys
 import textwrap
-
+import threading
+
+from agregados import AGREGADOS
+from busca_clientes import ListaClientes, buscar_em
+from historico_frio import Recentes, TransacoesEmCamadas
+
+# Efeito de cada tipo de transação sobre o saldo da conta (+1 crédito, -1 débito)
+SINAL_TRANSACAO: Dict[str, int] = {
+    "Deposito": 1,
+    "Saque": -1,
+    "PagamentoParcelaEmprestimo": -1,
+    "QuitacaoEmprestimo": -1,
+    "TransferenciaEnviada": -1,
+    "TransferenciaRecebida": 1,
+    "Juros": 1,
+    # Movimentos do empréstimo fora das parcelas: crédito do valor contratado
+    # e débito parcial na tentativa de quitação
+    "CreditoEmprestimo": 1,
+    "AmortizacaoEmprestimo": -1,
+}
+
+# Ordem global das contas: travas de duas contas são sempre obtidas nesta ordem
+_ORDEM_CONTAS = count(1)
+_IDS_TRANSFERENCIA = count(1)
+
+logger = logging.getLogger("banco")
+
+# Observadores de transações efetivadas: fn(conta, tipo, valor), chamados após
+# cada Transacao.registrar bem-sucedida (fora da trava da conta)
+_OBSERVADORES: List[Callable[["Conta", str, float], None]] = []
+
+def registrar_observador(fn: Callable[["Conta", str, float], None]) -> None:
+    _OBSERVADORES.append(fn)
+
+def remover_observador(fn: Callable[["Conta", str, float], None]) -> None:
+    if fn in _OBSERVADORES:
+        _OBSERVADORES.remove(fn)
+
+def _notificar(conta: "Conta", tipo: str, valor: float) -> None:
+    # A transação já foi efetivada: a falha de um observador é registrada e não
+    # chega a quem fez a operação nem impede os demais observadores
+    for fn in _OBSERVADORES:
+        try:
+            fn(conta, tipo, valor)
+        except Exception:
+            logger.exception("Observador %r falhou para %s de %.2f na conta %s", fn, tipo, valor, conta.numero)
+
+# Camada fria dos históricos (historico_frio.ArquivoHistorico), usada pelos
+# históricos criados depois de configurada; None mantém tudo em memória
+_ARQUIVO_HISTORICO: Optional[Any] = None
+
+def definir_arquivo_historico(arquivo: Optional[Any]) -> None:
+    global _ARQUIVO_HISTORICO
+    _ARQUIVO_HISTORICO = arquivo
+
+# Objetos de domínio usam __slots__: sem __dict__ por instância, o que pesa
+# com dezenas de milhões de clientes/contas (ver benchmarks/bench_memoria_objetos.py)
 class Cliente:
+    __slots__ = ("endereco", "contas", "nome", "emprestimo")
+
     def __init__(self, endereco: str):
         self.endereco: str = endereco
         self.contas: List[Conta] = []
@@ -20,39 +84,227 @@ class Cliente:
         self.contas.append(conta)
 
 class PessoaFisica(Cliente):
+    __slots__ = ("data_nascimento", "cpf")
+
     def __init__(self, nome: str, cpf: str, data_nascimento: str, endereco: str):
         super().__init__(endereco)
         self.nome: str = nome
         self.data_nascimento: str = data_nascimento
         self.cpf: str = cpf
 
+# Sequência vazia compartilhada pelos históricos sem resumos (criados na primeira transação)
+_VAZIO: tuple = ()
+
 class Historico:
+    __slots__ = ("_transacoes", "_dias", "_resumos", "_frio")
+
     def __init__(self):
+        # Camada quente: uma lista, ou historico_frio.Recentes depois da primeira selagem
         self._transacoes: List[Dict[str, Any]] = []
+        self._frio = _ARQUIVO_HISTORICO
+        # Resumos diários mantidos incrementalmente, ordenados por dia (YYYY-MM-DD).
+        # Cada resumo guarda saldo de abertura/fechamento, totais do dia por tipo
+        # e totais acumulados até o fim do dia, permitindo consultas por bisseção.
+        self._dias: List[str] = _VAZIO  # type: ignore[assignment]
+        self._resumos: List[Dict[str, Any]] = _VAZIO  # type: ignore[assignment]
 
     @property
     def transacoes(self) -> List[Dict[str, Any]]:
-        return self._transacoes
+        """Histórico completo. Com segmentos selados, uma visão que lê do disco
+        só os trechos antigos acessados."""
+        transacoes = self._transacoes
+        if isinstance(transacoes, Recentes):
+            return TransacoesEmCamadas(self._frio, transacoes)  # type: ignore[return-value]
+        return transacoes
+
+    def __len__(self) -> int:
+        transacoes = self._transacoes
+        return len(transacoes) + getattr(transacoes, "arquivados", 0)
+
+    def quantidade(self, tipo: str) -> int:
+        """Quantas transações do tipo já foram registradas (pelos resumos, sem ler o histórico)."""
+        return self._resumos[-1]["acumulado_qtd"].get(tipo, 0) if self._resumos else 0
+
+    def transacoes_periodo(self, inicio: Union[date, str], fim: Union[date, str]) -> List[Dict[str, Any]]:
+        """Registros com data em [inicio, fim]; na camada fria, lê só os segmentos do período."""
+        inicio_iso, fim_iso = _dia_iso(inicio), _dia_iso(fim)
+        transacoes = self.transacoes
+        if isinstance(transacoes, TransacoesEmCamadas):
+            return transacoes.periodo(inicio_iso, fim_iso)
+        return [t for t in transacoes if inicio_iso <= t["data"][:10] <= fim_iso]
+
+    def adicionar_transacao(self, transacao: "Transacao", saldo: Optional[float] = None) -> None:
+        """Registra a transação no histórico.
+        `saldo` é o saldo da conta após a transação; se omitido, é derivado do
+        fechamento anterior e do sinal do tipo da transação.
+        """
+        self._anexar(transacao.__class__.__name__, transacao.valor, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), saldo)
+
+    def _anexar(self, tipo: str, valor: float, data: str, saldo: Optional[float] = None) -> Dict[str, Any]:
+        """Anexa um registro novo já formatado (`data` em "%Y-%m-%d %H:%M:%S").
+        Se o relógio voltou para antes do último dia registrado, o registro
+        leva a data do último, para o histórico seguir em ordem."""
+        if self._dias and data[:10] < self._dias[-1]:
+            data = self._ultima_data()
+        registro = self._restaurar(tipo, valor, data, saldo)
+        AGREGADOS.transacao(tipo, valor, data)
+        return registro
+
+    def _restaurar(self, tipo: str, valor: float, data: str, saldo: Optional[float] = None) -> Dict[str, Any]:
+        """Como `_anexar`, para registros que já existiam (snapshots, importação):
+        não contam como transação nova nos agregados. Registros anteriores ao
+        último dia do histórico são recusados (ValueError): os resumos diários
+        só avançam."""
+        if self._dias and data[:10] < self._dias[-1]:
+            raise ValueError(f"Registro de {data} anterior ao último dia do histórico ({self._dias[-1]})")
+        registro = {
+            "tipo": sys.intern(tipo),
+            "valor": valor,
+            "data": data
+        }
+        self._transacoes.append(registro)
+        self._atualizar_resumo(tipo, valor, data[:10], saldo)
+        frio = self._frio
+        if frio is not None and len(self._transacoes) > frio.max_recentes:
+            frio.selar(self)
+        return registro
+
+    def _ultima_data(self) -> str:
+        transacoes = self._transacoes
+        return transacoes[-1]["data"] if transacoes else f"{self._dias[-1]} 00:00:00"
+
+    def _atualizar_resumo(self, tipo: str, valor: float, dia: str, saldo: Optional[float]) -> None:
+        delta = SINAL_TRANSACAO.get(tipo, 0) * valor
+        ultimo = self._resumos[-1] if self._resumos else None
+        if saldo is None:
+            saldo = (ultimo["fechamento"] if ultimo else 0.0) + delta
+
+        # Transações chegam em ordem cronológica: só o último dia pode mudar
+        if ultimo is None or dia > ultimo["data"]:
+            if ultimo is None:
+                self._dias, self._resumos = [], []
+            ultimo = {
+                "data": dia,
+                "abertura": saldo - delta,
+                "fechamento": saldo,
+                "totais": {},
+                "quantidades": {},
+                "acumulado": dict(ultimo["acumulado"]) if ultimo else {},
+                "acumulado_qtd": dict(ultimo["acumulado_qtd"]) if ultimo else {},
+            }
+            self._dias.append(dia)
+            self._resumos.append(ultimo)
+
+        ultimo["fechamento"] = saldo
+        ultimo["totais"][tipo] = ultimo["totais"].get(tipo, 0.0) + valor
+        ultimo["quantidades"][tipo] = ultimo["quantidades"].get(tipo, 0) + 1
+        ultimo["acumulado"][tipo] = ultimo["acumulado"].get(tipo, 0.0) + valor
+        ultimo["acumulado_qtd"][tipo] = ultimo["acumulado_qtd"].get(tipo, 0) + 1
 
-    def adicionar_transacao(self, transacao: "Transacao") -> None:
-        self._transacoes.append({
-            "tipo": transacao.__class__.__name__,
-            "valor": transacao.valor,
-            "data": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        })
+    @property
+    def resumos_diarios(self) -> List[Dict[str, Any]]:
+        return self._resumos
+
+    def saldo_em(self, dia: Union[date, str]) -> float:
+        """Saldo registrado ao fim do dia informado, em O(log dias)."""
+        i = bisect_right(self._dias, _dia_iso(dia)) - 1
+        return float(self._resumos[i]["fechamento"]) if i >= 0 else 0.0
+
+    def resumo_periodo(self, inicio: Union[date, str], fim: Union[date, str]) -> Dict[str, Any]:
+        """Resumo do período [inicio, fim]: saldos de abertura e fechamento e
+        totais/quantidades por tipo de transação, em O(log dias).
+        """
+        inicio_iso, fim_iso = _dia_iso(inicio), _dia_iso(fim)
+        i0 = bisect_left(self._dias, inicio_iso)
+        i1 = bisect_right(self._dias, fim_iso) - 1
+        anterior = self._resumos[i0 - 1] if i0 > 0 else None
+
+        if i0 <= i1:
+            abertura = self._resumos[i0]["abertura"]
+            fechamento = self._resumos[i1]["fechamento"]
+            totais = _diferenca(self._resumos[i1]["acumulado"], anterior["acumulado"] if anterior else {})
+            quantidades = _diferenca(self._resumos[i1]["acumulado_qtd"], anterior["acumulado_qtd"] if anterior else {})
+        else:
+            abertura = fechamento = anterior["fechamento"] if anterior else 0.0
+            totais, quantidades = {}, {}
+
+        return {
+            "inicio": inicio_iso,
+            "fim": fim_iso,
+            "abertura": float(abertura),
+            "fechamento": float(fechamento),
+            "totais": totais,
+            "quantidades": quantidades,
+        }
+
+    def resumo_mensal(self, ano: int, mes: int) -> Dict[str, Any]:
+        ultimo_dia = monthrange(ano, mes)[1]
+        return self.resumo_periodo(date(ano, mes, 1), date(ano, mes, ultimo_dia))
+
+def _dia_iso(dia: Union[date, str]) -> str:
+    if isinstance(dia, date):
+        return dia.strftime("%Y-%m-%d")
+    return str(dia)[:10]
+
+def _diferenca(atual: Dict[str, Any], anterior: Dict[str, Any]) -> Dict[str, Any]:
+    return {tipo: valor - anterior.get(tipo, 0) for tipo, valor in atual.items() if valor - anterior.get(tipo, 0)}
+
+class EstadoConta(NamedTuple):
+    """Versão imutável do estado de uma conta, publicada a cada escrita.
+    `transacoes` é o tamanho do histórico nessa versão: como o histórico só
+    cresce, os registros [0, transacoes) formam um extrato consistente com `saldo`.
+    """
+    versao: int
+    saldo: float
+    transacoes: int
+
+AGENCIA_PADRAO = '0001'
+_ESTADO_INICIAL = EstadoConta(0, 0.0, 0)
+
+def _atributos(obj: Any) -> Dict[str, Any]:
+    """Atributos definidos de um objeto com __slots__, em toda a hierarquia."""
+    return {
+        nome: getattr(obj, nome)
+        for cls in type(obj).__mro__ for nome in cls.__dict__.get("__slots__", ())
+        if hasattr(obj, nome)
+    }
 
 class Conta:
+    __slots__ = ("_saldo", "_numero", "_agencia", "_cliente", "_historico", "_lock", "_ordem", "_estado")
+
     def __init__(self, numero: int, cliente: Cliente):
         self._saldo: float = 0.0
         self._numero: int = numero
-        self._agencia: str = '0001'
+        self._agencia: str = AGENCIA_PADRAO
         self._cliente: Cliente = cliente
         self._historico: Historico = Historico()
+        # Trava por conta: serializa transações sobre o saldo e o histórico
+        self._lock = threading.Lock()
+        self._ordem: int = next(_ORDEM_CONTAS)
+        self._estado: EstadoConta = _ESTADO_INICIAL
 
     @classmethod
     def criar_conta(cls, numero: int, cliente: Cliente) -> "Conta":
         return cls(numero, cliente)
-    
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Travas não são serializáveis; a ordem global é própria de cada processo
+        # e o estado publicado é recalculado ao carregar
+        estado = _atributos(self)
+        del estado["_lock"], estado["_ordem"]
+        estado.pop("_estado", None)
+        return estado
+
+    def __setstate__(self, estado: Dict[str, Any]) -> None:
+        for nome, valor in estado.items():
+            setattr(self, nome, valor)
+        # Agências lidas de snapshots/pickles compartilham a mesma string
+        self._agencia = sys.intern(self._agencia)
+        self._lock = threading.Lock()
+        self._ordem = next(_ORDEM_CONTAS)
+        # Sem _publicar: quem carrega a conta a soma aos agregados (AGREGADOS.incorporar)
+        self._estado = EstadoConta(1, float(self._saldo), len(self._historico))
+
     @property
     def saldo(self) -> float:
         return float(self._saldo)
@@ -72,6 +324,35 @@ class Conta:
     @property
     def historico(self) -> Historico:
         return self._historico
+
+    @property
+    def lock(self) -> threading.Lock:
+        return self._lock
+
+    @property
+    def estado(self) -> EstadoConta:
+        """Última versão publicada (saldo + tamanho do histórico), sem trava:
+        leitores nunca esperam por escritores e sempre veem um par consistente.
+        """
+        return self._estado
+
+    def transacoes_em(self, estado: EstadoConta) -> List[Dict[str, Any]]:
+        """Registros do histórico visíveis na versão `estado`."""
+        return self._historico.transacoes[:estado.transacoes]
+
+    def _publicar(self) -> None:
+        """Publica uma nova versão do estado. Chamar com a trava da conta obtida,
+        depois de alterar saldo e histórico: a troca da referência é atômica.
+        """
+        saldo = float(self._saldo)
+        anterior = self._estado
+        if saldo != anterior.saldo:
+            AGREGADOS.saldo(saldo - anterior.saldo)
+        self._estado = EstadoConta(anterior.versao + 1, saldo, len(self._historico))
+
+    def _excede_limites(self, valor: float) -> bool:
+        """Se um débito de `valor` fere limites da conta além do saldo."""
+        return False
     
     def sacar(self, valor: float) -> bool:
         excedeu_saldo = valor > self._saldo
@@ -105,13 +386,20 @@ class Conta:
         return 0.0
 
 class ContaCorrente(Conta):
+    __slots__ = ("limite", "limite_saque")
+
     def __init__(self, numero: int, cliente: Cliente, limite: float = 1000, limite_saque: int = 3):
         super().__init__(numero, cliente)
         self.limite = limite
         self.limite_saque = limite_saque
+
+    def _excede_limites(self, valor: float) -> bool:
+        # Transferências enviadas respeitam o limite por operação do saque; o
+        # número de saques (limite_saque) conta só saques e não as bloqueia
+        return valor > self.limite
         
     def sacar(self, valor: float) -> bool:
-        numero_saque = len([transacao for transacao in self.historico.transacoes if transacao["tipo"] == "Saque"])
+        numero_saque = self.historico.quantidade("Saque")
         excedeu_limite = valor > self.limite
         excedeu_saque = numero_saque >= self.limite_saque
 
@@ -131,7 +419,25 @@ C/C: \t\t{self.numero}
 cliente:\t{nome_cli}
 """
 
+class ContaPoupanca(Conta):
+    __slots__ = ("taxa_diaria",)
+
+    def __init__(self, numero: int, cliente: Cliente, taxa_diaria: float = 0.0002):
+        super().__init__(numero, cliente)
+        # Taxa de juros aplicada ao saldo a cada acúmulo diário (ver poupanca.py)
+        self.taxa_diaria = taxa_diaria
+
+    def __str__(self) -> str:
+        nome_cli = self.cliente.nome if hasattr(self.cliente, "nome") and self.cliente.nome else "N/D"
+        return f"""\
+agência:\t{self.agencia}
+Poupança:\t{self.numero}
+cliente:\t{nome_cli}
+"""
+
 class Transacao(ABC):
+    __slots__ = ()
+
     @property
     @abstractmethod
     def valor(self) -> float:
@@ -144,6 +450,8 @@ class Transacao(ABC):
         raise NotImplementedError
 
 class Saque(Transacao):
+    __slots__ = ("_valor",)
+
     def __init__(self, valor: float):
         self._valor = valor
     
@@ -152,12 +460,18 @@ class Saque(Transacao):
         return self._valor
     
     def registrar(self, conta: "Conta") -> bool:
-        sucesso_transacao = conta.sacar(self._valor)
-        if sucesso_transacao:
-            conta.historico.adicionar_transacao(self)
+        with conta.lock:
+            sucesso_transacao = conta.sacar(self._valor)
+            if sucesso_transacao:
+                conta.historico.adicionar_transacao(self, conta.saldo)
+                conta._publicar()
+        if sucesso_transacao and _OBSERVADORES:
+            _notificar(conta, self.__class__.__name__, self._valor)
         return sucesso_transacao
 
 class Deposito(Transacao):
+    __slots__ = ("_valor",)
+
     def __init__(self, valor: float):
         self._valor = valor
     
@@ -166,12 +480,18 @@ class Deposito(Transacao):
         return self._valor
     
     def registrar(self, conta: "Conta") -> bool:
-        sucesso_transacao = conta.depositar(self._valor)
-        if sucesso_transacao:
-            conta.historico.adicionar_transacao(self)
+        with conta.lock:
+            sucesso_transacao = conta.depositar(self._valor)
+            if sucesso_transacao:
+                conta.historico.adicionar_transacao(self, conta.saldo)
+                conta._publicar()
+        if sucesso_transacao and _OBSERVADORES:
+            _notificar(conta, self.__class__.__name__, self._valor)
         return sucesso_transacao
 
 class PagamentoParcelaEmprestimo(Transacao):
+    __slots__ = ("_valor",)
+
     def __init__(self, valor: float):
         self._valor = valor
 
@@ -181,12 +501,18 @@ class PagamentoParcelaEmprestimo(Transacao):
 
     def registrar(self, conta: "Conta") -> bool:
         # Registrar pagamento de parcela como um saque na conta e adicionar ao histórico
-        sucesso_transacao = conta.sacar(self._valor)
-        if sucesso_transacao:
-            conta.historico.adicionar_transacao(self)
+        with conta.lock:
+            sucesso_transacao = conta.sacar(self._valor)
+            if sucesso_transacao:
+                conta.historico.adicionar_transacao(self, conta.saldo)
+                conta._publicar()
+        if sucesso_transacao and _OBSERVADORES:
+            _notificar(conta, self.__class__.__name__, self._valor)
         return sucesso_transacao
 
 class QuitacaoEmprestimo(Transacao):
+    __slots__ = ("_valor",)
+
     def __init__(self, valor: float):
         self._valor = valor
 
@@ -198,12 +524,131 @@ class QuitacaoEmprestimo(Transacao):
         """Tenta quitar integralmente o empréstimo debitando o valor total.
         Somente registra no histórico se a quitação for total.
         """
-        if conta.saldo >= self._valor:
-            debited = conta.debitar_emprestimo(self._valor)
-            if debited >= self._valor:
-                conta.historico.adicionar_transacao(self)
-                return True
-        return False
+        sucesso_transacao = False
+        with conta.lock:
+            if conta.saldo >= self._valor:
+                debited = conta.debitar_emprestimo(self._valor)
+                if debited >= self._valor:
+                    conta.historico.adicionar_transacao(self, conta.saldo)
+                    sucesso_transacao = True
+                conta._publicar()
+        if sucesso_transacao and _OBSERVADORES:
+            _notificar(conta, self.__class__.__name__, self._valor)
+        return sucesso_transacao
+
+class Juros(Transacao):
+    __slots__ = ("_valor",)
+
+    def __init__(self, valor: float):
+        self._valor = valor
+
+    @property
+    def valor(self) -> float:
+        return self._valor
+
+    def registrar(self, conta: "Conta") -> bool:
+        """Credita juros na conta (sem mensagens: usado por rotinas em lote)."""
+        if self._valor <= 0:
+            return False
+        with conta.lock:
+            conta._saldo += self._valor
+            conta.historico.adicionar_transacao(self, conta.saldo)
+            conta._publicar()
+        if _OBSERVADORES:
+            _notificar(conta, self.__class__.__name__, self._valor)
+        return True
+
+class CreditoEmprestimo(Transacao):
+    __slots__ = ("_valor",)
+
+    def __init__(self, valor: float):
+        self._valor = valor
+
+    @property
+    def valor(self) -> float:
+        return self._valor
+
+    def registrar(self, conta: "Conta") -> bool:
+        """Credita o valor contratado do empréstimo na conta."""
+        with conta.lock:
+            sucesso_transacao = conta.depositar(self._valor)
+            if sucesso_transacao:
+                conta.historico.adicionar_transacao(self, conta.saldo)
+                conta._publicar()
+        if sucesso_transacao and _OBSERVADORES:
+            _notificar(conta, self.__class__.__name__, self._valor)
+        return sucesso_transacao
+
+class AmortizacaoEmprestimo(Transacao):
+    __slots__ = ("_valor",)
+
+    def __init__(self, valor: float):
+        self._valor = valor
+
+    @property
+    def valor(self) -> float:
+        return self._valor
+
+    def registrar(self, conta: "Conta") -> bool:
+        """Débito parcial do saldo devedor quando a quitação integral falha."""
+        with conta.lock:
+            sucesso_transacao = conta.debitar_emprestimo(self._valor) > 0
+            if sucesso_transacao:
+                conta.historico.adicionar_transacao(self, conta.saldo)
+                conta._publicar()
+        if sucesso_transacao and _OBSERVADORES:
+            _notificar(conta, self.__class__.__name__, self._valor)
+        return sucesso_transacao
+
+class Transferencia(Transacao):
+    __slots__ = ("_valor", "_destino", "_id")
+
+    def __init__(self, valor: float, destino: "Conta"):
+        self._valor = valor
+        self._destino = destino
+        self._id: Optional[str] = None
+
+    @property
+    def valor(self) -> float:
+        return self._valor
+
+    @property
+    def destino(self) -> "Conta":
+        return self._destino
+
+    @property
+    def id(self) -> Optional[str]:
+        """Id que liga as duas entradas nos históricos (None se não efetivada)."""
+        return self._id
+
+    def registrar(self, conta: "Conta") -> bool:
+        """Debita `conta` e credita o destino atomicamente.
+        As travas das duas contas são obtidas na ordem global das contas,
+        evitando deadlock entre transferências cruzadas (A->B e B->A).
+        Registra entradas ligadas pelo mesmo id (ver `id`) nos dois históricos.
+        A conta de origem aplica o limite por operação de um saque (ContaCorrente).
+        """
+        destino = self._destino
+        if destino is conta or self._valor <= 0:
+            return False
+        primeira, segunda = (conta, destino) if conta._ordem < destino._ordem else (destino, conta)
+        with primeira.lock, segunda.lock:
+            if self._valor > conta._saldo or conta._excede_limites(self._valor):
+                return False
+            conta._saldo -= self._valor
+            destino._saldo += self._valor
+            transferencia_id = self._id = f"T{next(_IDS_TRANSFERENCIA)}"
+            data = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            enviada = conta.historico._anexar("TransferenciaEnviada", self._valor, data, conta.saldo)
+            recebida = destino.historico._anexar("TransferenciaRecebida", self._valor, data, destino.saldo)
+            enviada.update(transferencia=transferencia_id, contraparte=destino.numero)
+            recebida.update(transferencia=transferencia_id, contraparte=conta.numero)
+            conta._publicar()
+            destino._publicar()
+        if _OBSERVADORES:
+            _notificar(conta, "TransferenciaEnviada", self._valor)
+            _notificar(destino, "TransferenciaRecebida", self._valor)
+        return True
 
 def menu() -> str:
     menu = """\n
@@ -215,16 +660,20 @@ def menu() -> str:
     [nc]\t Nova Conta
     [lc]\t Listar Contas
     [nu]\t Novo Usuário
+    [bc]\t Buscar Cliente
     [emp]\t Simular/Contratar Empréstimo
     [pagp]\t Pagar Parcela do Empréstimo
     [quit]\t Quitar Empréstimo
+    [rm]\t Resumo Mensal
     [q]\t Sair
 """
     return input(textwrap.dedent(menu))
 
 def main() -> None:
-    clientes: List[PessoaFisica] = []
+    clientes: List[PessoaFisica] = ListaClientes()
     contas: List[Conta] = []
+    # Números de contas excluídas não são reaproveitados
+    numeros_conta = count(1)
 
     cliente_logado: Optional[PessoaFisica] = None
 
@@ -258,14 +707,15 @@ def main() -> None:
         elif opcao == 'e':
             exibir_extrato(cliente_logado)
         elif opcao == 'nc':
-            numero_conta = len(contas) + 1
-            criar_conta(numero_conta, clientes, contas)
+            criar_conta(next(numeros_conta), clientes, contas)
         elif opcao == 'ec':
             excluir_conta(contas, clientes)
         elif opcao == 'lc':
             listar_contas(contas)
         elif opcao == 'nu':
             criar_cliente(clientes)
+        elif opcao == 'bc':
+            buscar_cliente(clientes)
         elif opcao == 'emp':
             valor = float(input("Valor do empréstimo: "))
             parcelas = int(input("Quantidade de parcelas: "))
@@ -278,6 +728,8 @@ def main() -> None:
             pagar_parcela_emprestimo(cliente_logado)
         elif opcao == 'quit':
             quitar_emprestimo(cliente_logado)
+        elif opcao == 'rm':
+            exibir_resumo_mensal(cliente_logado)
         elif opcao == 'q':
             print("Saindo do sistema...")
             break
@@ -285,6 +737,9 @@ def main() -> None:
             cliente_logado = None
 
 def filtrar_cliente(cpf: str, clientes: List[PessoaFisica]) -> Optional[PessoaFisica]:
+    buscar = getattr(clientes, "buscar_cpf", None)
+    if buscar:
+        return buscar(cpf)
     clientes_filtrados = [cliente for cliente in clientes if cliente.cpf == cpf]
     return clientes_filtrados[0] if clientes_filtrados else None
 
@@ -334,6 +789,32 @@ def exibir_extrato(cliente: PessoaFisica) -> None:
     print(f"\nSaldo: R$ {conta.saldo:.2f}")
     print("=========================================================")
 
+def exibir_resumo_mensal(cliente: PessoaFisica) -> None:
+    conta = recuperar_conta_cliente(cliente)
+    if not conta:
+        return
+    referencia = input('Mês de referência (mm/aaaa, vazio para o mês atual): ').strip()
+    if referencia:
+        try:
+            mes, ano = (int(parte) for parte in referencia.split('/'))
+            resumo = conta.historico.resumo_mensal(ano, mes)
+        except ValueError:
+            print('Mês inválido! Use o formato mm/aaaa.')
+            return
+    else:
+        hoje = date.today()
+        mes, ano = hoje.month, hoje.year
+        resumo = conta.historico.resumo_mensal(ano, mes)
+
+    print(f"\n=====================RESUMO {mes:02d}/{ano}=====================")
+    print(f"Saldo de abertura: R$ {resumo['abertura']:.2f}")
+    if not resumo["totais"]:
+        print("Não foram realizadas transações no período.")
+    for tipo, total in resumo["totais"].items():
+        print(f"{tipo} ({resumo['quantidades'][tipo]}x):\tR$ {total:.2f}")
+    print(f"Saldo de fechamento: R$ {resumo['fechamento']:.2f}")
+    print("=========================================================")
+
 def criar_conta(numero: int, clientes: List[PessoaFisica], contas: List[Conta]) -> None:
     cpf = input('Digite o CPF do cliente (somente números): ')
     cliente = filtrar_cliente(cpf, clientes)
@@ -345,6 +826,7 @@ def criar_conta(numero: int, clientes: List[PessoaFisica], contas: List[Conta])
     conta = ContaCorrente.criar_conta(cliente=cliente, numero=numero)
     contas.append(conta)
     cliente.contas.append(conta)
+    AGREGADOS.conta_aberta(tipo_conta(conta))
     print(f'Conta criada com sucesso! Número da conta: {conta.numero}, Agência: {conta.agencia}')
 
 def listar_contas(contas: List[Conta]) -> None:
@@ -378,6 +860,7 @@ def excluir_conta(contas: List[Conta], clientes: List[PessoaFisica]) -> None:
 
     contas.remove(conta)
     cliente.contas.remove(conta)
+    AGREGADOS.conta_encerrada(tipo_conta(conta), conta.saldo)
     print(f'Conta número {conta.numero} excluída com sucesso!')
 
 def criar_cliente(clientes: List[PessoaFisica]) -> None:
@@ -397,6 +880,40 @@ def criar_cliente(clientes: List[PessoaFisica]) -> None:
 
     print('Cliente criado com sucesso!')
 
+def buscar_cliente(clientes: List[PessoaFisica]) -> None:
+    consulta = input('Nome ou endereço (pode ser parcial): ')
+    encontrados = clientes.buscar(consulta) if hasattr(clientes, "buscar") else buscar_em(clientes, consulta)
+    if not encontrados:
+        print('Nenhum cliente encontrado!')
+        return
+    for cliente in encontrados:
+        print(f'{cliente.nome} (CPF {cliente.cpf}) - {cliente.endereco}')
+
+def tipo_conta(conta: Conta) -> str:
+    return "poupanca" if isinstance(conta, ContaPoupanca) else "corrente"
+
+def id_transacao(conta: Conta, posicao: int) -> str:
+    """Identificador do registro na `posicao` (a partir de 1) do histórico da
+    conta: o transacao_id das respostas e o FITID do extrato OFX."""
+    return f"{conta.agencia}-{conta.numero}-{posicao}"
+
+def _saldo_devedor(cliente: Cliente) -> float:
+    return float((getattr(cliente, "emprestimo", None) or {}).get("saldo_devedor", 0.0))
+
+def _acompanhar_emprestimo(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Informa aos agregados a variação do saldo devedor causada por `fn(cliente, ...)`."""
+    @wraps(fn)
+    def executar(cliente: Cliente, *args: Any, **kwargs: Any) -> Any:
+        antes = _saldo_devedor(cliente)
+        try:
+            return fn(cliente, *args, **kwargs)
+        finally:
+            depois = _saldo_devedor(cliente)
+            if depois != antes:
+                AGREGADOS.emprestimo(antes, depois)
+    return executar
+
+@_acompanhar_emprestimo
 def contratar_emprestimo(cliente: PessoaFisica, valor: float, parcelas: int, taxa_juros: float) -> None:
     if not cliente.contas:
         print("Cliente não possui conta. Crie uma conta antes de contratar empréstimo.")
@@ -412,7 +929,7 @@ def contratar_emprestimo(cliente: PessoaFisica, valor: float, parcelas: int, tax
     }
     conta = recuperar_conta_cliente(cliente)
     if conta:
-        conta.depositar(valor)
+        cliente.realizar_transacao(conta, CreditoEmprestimo(valor))
         print(f"Valor de R$ {valor:.2f} depositado na conta referente ao empréstimo.")
     print(f"Empréstimo contratado com sucesso!")
     print(f"Valor total: R$ {valor_total:.2f}")
@@ -430,6 +947,7 @@ def simular_emprestimo(valor: float, parcelas: int, taxa_juros: float):
     print(f"Parcelas: {parcelas} de R$ {valor_parcela:.2f}")
     return valor_total, valor_parcela
 
+@_acompanhar_emprestimo
 def calcular_emprestimo(cliente: PessoaFisica, valor: float, parcelas: int, taxa_juros: float) -> None:
     """
     Calcula o valor total do empréstimo e o valor de cada parcela.
@@ -446,6 +964,7 @@ def calcular_emprestimo(cliente: PessoaFisica, valor: float, parcelas: int, taxa
     }
     print(f"Empréstimo aprovado!\nValor total: R$ {valor_total:.2f}\nParcelas: {parcelas} de R$ {valor_parcela:.2f}")
 
+@_acompanhar_emprestimo
 def pagar_parcela_emprestimo(cliente: PessoaFisica) -> None:
     """
     Paga uma parcela do empréstimo, se houver saldo devedor.
@@ -479,6 +998,7 @@ def pagar_parcela_emprestimo(cliente: PessoaFisica) -> None:
     print(f"Parcela paga com sucesso! Parcelas pagas: {cliente.emprestimo['parcelas_pagas']}/{cliente.emprestimo['parcelas']}")
     print(f"Saldo devedor atual: R$ {cliente.emprestimo['saldo_devedor']:.2f}")
 
+@_acompanhar_emprestimo
 def quitar_emprestimo(cliente: PessoaFisica) -> None:
     """
     Quita o valor total do empréstimo, considerando parcelas já pagas e saldo disponível.
@@ -500,7 +1020,8 @@ def quitar_emprestimo(cliente: PessoaFisica) -> None:
     sucesso = cliente.realizar_transacao(conta, transacao)
     if not sucesso:
         # tentativa parcial de débito
-        valor_debitado = conta.debitar_emprestimo(saldo_devedor)
+        amortizacao = AmortizacaoEmprestimo(saldo_devedor)
+        valor_debitado = amortizacao.valor if cliente.realizar_transacao(conta, amortizacao) else 0.0
         if valor_debitado > 0:
             cliente.emprestimo["saldo_devedor"] = max(0.0, cliente.emprestimo.get("saldo_devedor", 0.0) - valor_debitado)
             print(f"Foi debitado R$ {valor_debitado:.2f} do saldo. Ainda falta R$ {cliente.emprestimo['saldo_devedor']:.2f} para quitar.")
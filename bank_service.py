@@ -1,145 +1,420 @@
 from __future__ import annotations
-from typing import List, Optional
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Union
 
 # Reuso das classes e funções do módulo banco
 from banco import (
     PessoaFisica,
     Conta,
     ContaCorrente,
+    ContaPoupanca,
     Deposito,
     Saque,
+    Transferencia,
     simular_emprestimo,
     contratar_emprestimo,
     pagar_parcela_emprestimo,
     quitar_emprestimo,
-    recuperar_conta_cliente,
     filtrar_cliente,
+    id_transacao,
+    tipo_conta,
 )
+from agendador import obter_agendador
+from agregados import AGREGADOS
+from busca_clientes import CAMPOS, ListaClientes, buscar_em
+from poupanca import CarteiraPoupanca
+
+# Códigos de erro das operações
+NAO_AUTENTICADO = "NAO_AUTENTICADO"
+SEM_CONTA = "SEM_CONTA"
+CLIENTE_NAO_ENCONTRADO = "CLIENTE_NAO_ENCONTRADO"
+CPF_JA_CADASTRADO = "CPF_JA_CADASTRADO"
+VALOR_INVALIDO = "VALOR_INVALIDO"
+SALDO_INSUFICIENTE = "SALDO_INSUFICIENTE"
+LIMITE_EXCEDIDO = "LIMITE_EXCEDIDO"
+LIMITE_SAQUES_EXCEDIDO = "LIMITE_SAQUES_EXCEDIDO"
+SEM_EMPRESTIMO = "SEM_EMPRESTIMO"
+CONTA_NAO_ENCONTRADA = "CONTA_NAO_ENCONTRADA"
+ULTIMA_CONTA = "ULTIMA_CONTA"
+CONTA_COM_SALDO = "CONTA_COM_SALDO"
+EMPRESTIMO_ATIVO = "EMPRESTIMO_ATIVO"
+MESMA_CONTA = "MESMA_CONTA"
+TIPO_CONTA_INVALIDO = "TIPO_CONTA_INVALIDO"
+CPF_DUPLICADO_NO_LOTE = "CPF_DUPLICADO_NO_LOTE"
+CAMPO_INVALIDO = "CAMPO_INVALIDO"
+AGENDAMENTO_INVALIDO = "AGENDAMENTO_INVALIDO"
+AGENDAMENTO_NAO_ENCONTRADO = "AGENDAMENTO_NAO_ENCONTRADO"
+
+# Máximo de clientes devolvidos por uma busca
+LIMITE_BUSCA_MAXIMO = 100
+
+@dataclass
+class Resultado:
+    """Resultado tipado de uma operação do BankApp.
+    A mensagem em texto para chat/CLI é gerada por `formatar_mensagem`.
+    """
+    operacao: str
+    status: str = "ok"
+    saldo: Optional[float] = None
+    transacao_id: Optional[str] = None
+    codigo_erro: Optional[str] = None
+    dados: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+def _erro(operacao: str, codigo: str, **dados: Any) -> Resultado:
+    return Resultado(operacao=operacao, status="erro", codigo_erro=codigo, dados=dados)
+
+def _transacao_id(conta: Conta) -> str:
+    """Identificador da última transação registrada (posição no histórico)."""
+    return id_transacao(conta, len(conta.historico))
+
+def _motivo_recusa_saque(conta: Conta, valor: float, contar_saques: bool = True) -> str:
+    # Mesma ordem de verificação de ContaCorrente.sacar / Conta.sacar;
+    # transferências (contar_saques=False) não têm limite de quantidade
+    limite = getattr(conta, "limite", None)
+    if limite is not None and valor > limite:
+        return LIMITE_EXCEDIDO
+    limite_saque = getattr(conta, "limite_saque", None)
+    if contar_saques and limite_saque is not None:
+        saques = conta.historico.quantidade("Saque")
+        if saques >= limite_saque:
+            return LIMITE_SAQUES_EXCEDIDO
+    if valor > conta.saldo:
+        return SALDO_INSUFICIENTE
+    return VALOR_INVALIDO
 
 class BankApp:
     """Camada de serviço para operações bancárias em memória.
     Mantém estado simples (clientes, contas e cliente logado).
+    Os métodos `*_resultado` devolvem `Resultado`; os demais devolvem o texto
+    usado pelo chat/CLI.
     """
 
     def __init__(self) -> None:
-        self.clientes: List[PessoaFisica] = []
+        # Com índices por CPF e de busca por nome/endereço (busca_clientes)
+        self.clientes: List[PessoaFisica] = ListaClientes()
         self.contas: List[Conta] = []
         self._cliente_logado: Optional[PessoaFisica] = None
+        # Contas poupança desta aplicação, para o acúmulo diário de juros em lote
+        self.poupancas = CarteiraPoupanca()
+        # Ids dos agendamentos criados por esta aplicação (agendador.py)
+        self._agendamentos: List[str] = []
+        # Último número de conta atribuído; números de contas removidas não voltam
+        self._ultimo_numero = 0
+        # Dia ("%Y-%m-%d") do último acúmulo de juros das poupanças
+        self._juros_em: Optional[str] = None
+
+    def _cliente_por_cpf(self, cpf: str) -> Optional[PessoaFisica]:
+        # Listas abertas de um snapshot (snapshot_mmap) têm índice por CPF
+        buscar = getattr(self.clientes, "buscar_cpf", None)
+        return buscar(cpf) if buscar else filtrar_cliente(cpf, self.clientes)
+
+    def _conta_por_numero(self, numero: int) -> Optional[Conta]:
+        buscar = getattr(self.contas, "buscar_numero", None)
+        if buscar:
+            return buscar(numero)
+        return next((c for c in self.contas if c.numero == numero), None)
+
+    def _novo_numero(self) -> int:
+        # Transferências acham o destino pelo número: ele nunca pode se repetir.
+        # Sessões antigas não têm o contador; contas importadas podem ter
+        # ocupado números à frente dele
+        numero = max(getattr(self, "_ultimo_numero", 0), len(self.contas)) + 1
+        while self._conta_por_numero(numero) is not None:
+            numero += 1
+        self._ultimo_numero = numero
+        return numero
+
+    def _conta_ou_erro(self, operacao: str) -> Any:
+        """Conta do cliente logado, ou o Resultado de erro correspondente."""
+        if not self._cliente_logado:
+            return _erro(operacao, NAO_AUTENTICADO)
+        conta = self.conta_logada()
+        if not conta:
+            return _erro(operacao, SEM_CONTA)
+        return conta
 
     # ---------- Sessão/Autenticação ----------
-    def login(self, cpf: str) -> str:
-        cliente = filtrar_cliente(cpf, self.clientes)
+    def login_resultado(self, cpf: str) -> Resultado:
+        cliente = self._cliente_por_cpf(cpf)
         if not cliente:
-            return "Cliente não encontrado. Crie um novo usuário com /novo_usuario."
+            return _erro("login", CLIENTE_NAO_ENCONTRADO, cpf=cpf)
         self._cliente_logado = cliente
-        return f"Login efetuado como {cliente.nome} (CPF {cliente.cpf})."
+        return Resultado("login", dados={"nome": cliente.nome, "cpf": cliente.cpf})
 
-    def logout(self) -> str:
+    def logout_resultado(self) -> Resultado:
         self._cliente_logado = None
-        return "Logout realizado."
+        return Resultado("logout")
 
     # ---------- Cadastro ----------
-    def novo_usuario(self, nome: str, cpf: str, data_nascimento: str, endereco: str) -> str:
-        existente = filtrar_cliente(cpf, self.clientes)
+    def novo_usuario_resultado(self, nome: str, cpf: str, data_nascimento: str, endereco: str) -> Resultado:
+        existente = self._cliente_por_cpf(cpf)
         if existente:
-            return "CPF já cadastrado. Tente /login <cpf> ou use outro CPF."
+            return _erro("novo_usuario", CPF_JA_CADASTRADO, cpf=cpf)
         cliente = PessoaFisica(nome=nome, cpf=cpf, data_nascimento=data_nascimento, endereco=endereco)
         self.clientes.append(cliente)
-        return f"Usuário criado: {nome} (CPF {cpf}). Faça /login {cpf} e /nova_conta."
+        return Resultado("novo_usuario", dados={"nome": nome, "cpf": cpf})
+
+    def buscar_clientes_resultado(self, consulta: str, limite: int = 20, campo: Optional[str] = None,
+                                  prefixo: bool = True) -> Resultado:
+        """Clientes cujo nome/endereço têm termos começados pelos da consulta
+        (sem diferenciar acentos e maiúsculas), em ordem de cadastro."""
+        if campo is not None and campo not in CAMPOS:
+            return _erro("buscar_clientes", CAMPO_INVALIDO, campo=campo)
+        if type(self.clientes) is list:
+            # Sessões antigas (lista simples): o índice é montado na primeira busca
+            self.clientes = ListaClientes(self.clientes)
+        limite = max(0, min(limite, LIMITE_BUSCA_MAXIMO))
+        buscar = getattr(self.clientes, "buscar", None)
+        encontrados = (buscar(consulta, limite, campo, prefixo) if buscar
+                       else buscar_em(self.clientes, consulta, limite, campo, prefixo))
+        return Resultado("buscar_clientes", dados={
+            "consulta": consulta,
+            "clientes": [{"nome": c.nome, "cpf": c.cpf, "endereco": c.endereco} for c in encontrados],
+        })
+
+    def cpfs_cadastrados(self, cpfs: Iterable[str]) -> Set[str]:
+        """Quais dos CPFs já têm cliente, numa única passada pelos clientes."""
+        if hasattr(self.clientes, "buscar_cpf"):
+            return {cpf for cpf in cpfs if self._cliente_por_cpf(cpf) is not None}
+        procurados = set(cpfs)
+        return {c.cpf for c in self.clientes if c.cpf in procurados}
+
+    def novos_usuarios_resultado(self, registros: Iterable[Dict[str, str]]) -> List[Resultado]:
+        """Cadastro em lote: `registros` com nome, cpf, data_nascimento e endereco.
+        Duplicados (já cadastrados ou repetidos no lote) são checados contra um
+        conjunto em O(1) por linha, e os clientes aceitos entram na lista de uma vez.
+        """
+        registros = list(registros)
+        vistos = self.cpfs_cadastrados(r["cpf"] for r in registros)
+        do_lote = set()
+        novos: List[PessoaFisica] = []
+        resultados: List[Resultado] = []
+        for r in registros:
+            cpf = r["cpf"]
+            if cpf in vistos:
+                codigo = CPF_DUPLICADO_NO_LOTE if cpf in do_lote else CPF_JA_CADASTRADO
+                resultados.append(_erro("novo_usuario", codigo, cpf=cpf))
+                continue
+            vistos.add(cpf)
+            do_lote.add(cpf)
+            novos.append(PessoaFisica(nome=r["nome"], cpf=cpf, data_nascimento=r["data_nascimento"], endereco=r["endereco"]))
+            resultados.append(Resultado("novo_usuario", dados={"nome": r["nome"], "cpf": cpf}))
+        self.clientes.extend(novos)
+        return resultados
 
     # ---------- Contas ----------
-    def nova_conta(self) -> str:
+    def nova_conta_resultado(self, tipo: str = "corrente") -> Resultado:
         if not self._cliente_logado:
-            return "Faça login antes: /login <cpf>."
-        numero_conta = len(self.contas) + 1
-        conta = ContaCorrente.criar_conta(cliente=self._cliente_logado, numero=numero_conta)
+            return _erro("nova_conta", NAO_AUTENTICADO)
+        if tipo not in ("corrente", "poupanca"):
+            return _erro("nova_conta", TIPO_CONTA_INVALIDO, tipo=tipo)
+        numero_conta = self._novo_numero()
+        if tipo == "poupanca":
+            conta = ContaPoupanca.criar_conta(cliente=self._cliente_logado, numero=numero_conta)
+            self.poupancas.adicionar(conta)
+        else:
+            conta = ContaCorrente.criar_conta(cliente=self._cliente_logado, numero=numero_conta)
         self.contas.append(conta)
         self._cliente_logado.contas.append(conta)
-        return f"Conta criada! Agência {conta.agencia}, Número {conta.numero}."
+        AGREGADOS.conta_aberta(tipo)
+        return Resultado("nova_conta", saldo=conta.saldo, dados={"agencia": conta.agencia, "numero": conta.numero, "tipo": tipo})
 
-    def saldo(self) -> str:
-        if not self._cliente_logado:
-            return "Faça login antes: /login <cpf>."
-        conta = recuperar_conta_cliente(self._cliente_logado)
-        if not conta:
-            return "Você não possui conta. Crie com /nova_conta."
-        return f"Saldo atual: R$ {conta.saldo:.2f}."
+    def acumular_juros_poupanca(self, momento: Optional[datetime] = None) -> Dict[str, Any]:
+        """Rotina diária: credita juros em todas as poupanças desta aplicação.
+        Uma vez por dia: repetir no mesmo dia (outro worker, rota administrativa)
+        não credita de novo."""
+        dia = (momento or datetime.now()).strftime("%Y-%m-%d")
+        if getattr(self, "_juros_em", None) == dia:
+            return {"contas": len(self.poupancas), "creditadas": 0, "total": 0.0, "data": dia, "repetido": True}
+        resultado = self.poupancas.acumular(momento)
+        self._juros_em = dia
+        return {**resultado, "data": dia, "repetido": False}
 
-    def extrato(self) -> str:
-        if not self._cliente_logado:
-            return "Faça login antes: /login <cpf>."
-        conta = recuperar_conta_cliente(self._cliente_logado)
-        if not conta:
-            return "Você não possui conta. Crie com /nova_conta."
-        linhas: List[str] = []
-        for t in conta.historico.transacoes:
-            linhas.append(f"{t['data']} - {t['tipo']}: R$ {t['valor']:.2f}")
-        if not linhas:
-            return "Extrato: sem movimentações. " + self.saldo()
-        return "Extrato:\n" + "\n".join(linhas) + f"\n{self.saldo()}"
+    def conta_logada(self) -> Optional[Conta]:
+        """Conta principal do cliente logado (None se não houver login ou conta)."""
+        if not self._cliente_logado or not self._cliente_logado.contas:
+            return None
+        return self._cliente_logado.contas[0]
 
-    def listar_contas(self) -> str:
+    def saldo_resultado(self) -> Resultado:
+        conta = self._conta_ou_erro("saldo")
+        if isinstance(conta, Resultado):
+            return conta
+        return Resultado("saldo", saldo=conta.estado.saldo)
+
+    def extrato_resultado(self) -> Resultado:
+        conta = self._conta_ou_erro("extrato")
+        if isinstance(conta, Resultado):
+            return conta
+        estado = conta.estado
+        transacoes = [dict(t) for t in conta.transacoes_em(estado)]
+        return Resultado("extrato", saldo=estado.saldo, dados={"transacoes": transacoes})
+
+    def listar_contas_resultado(self) -> Resultado:
         if not self._cliente_logado:
-            return "Faça login antes: /login <cpf>."
+            return _erro("listar_contas", NAO_AUTENTICADO)
         if not self._cliente_logado.contas:
-            return "Você não possui conta. Crie com /nova_conta."
-        linhas: List[str] = []
-        for c in self._cliente_logado.contas:
-            linhas.append(str(c))
-        return ("Contas do usuário:\n" + ("\n" + ("-"*40) + "\n").join(linhas)).strip()
+            return _erro("listar_contas", SEM_CONTA)
+        contas = [
+            {"agencia": c.agencia, "numero": c.numero, "cliente": c.cliente.nome or "N/D", "saldo": c.estado.saldo,
+             "tipo": "poupanca" if isinstance(c, ContaPoupanca) else "corrente"}
+            for c in self._cliente_logado.contas
+        ]
+        return Resultado("listar_contas", dados={"contas": contas})
 
     # ---------- Movimentações ----------
-    def depositar(self, valor: float) -> str:
-        if not self._cliente_logado:
-            return "Faça login antes: /login <cpf>."
-        conta = recuperar_conta_cliente(self._cliente_logado)
-        if not conta:
-            return "Você não possui conta. Crie com /nova_conta."
+    def depositar_resultado(self, valor: float) -> Resultado:
+        conta = self._conta_ou_erro("depositar")
+        if isinstance(conta, Resultado):
+            return conta
         tx = Deposito(valor)
-        ok = self._cliente_logado.realizar_transacao(conta, tx)
-        if ok:
-            return f"Depósito de R$ {valor:.2f} realizado. {self.saldo()}"
-        return "Depósito não realizado. Valor inválido?"
+        if self._cliente_logado.realizar_transacao(conta, tx):
+            return Resultado("depositar", saldo=conta.saldo, transacao_id=_transacao_id(conta), dados={"valor": valor})
+        return _erro("depositar", VALOR_INVALIDO, valor=valor)
 
-    def sacar(self, valor: float) -> str:
-        if not self._cliente_logado:
-            return "Faça login antes: /login <cpf>."
-        conta = recuperar_conta_cliente(self._cliente_logado)
-        if not conta:
-            return "Você não possui conta. Crie com /nova_conta."
+    def sacar_resultado(self, valor: float) -> Resultado:
+        conta = self._conta_ou_erro("sacar")
+        if isinstance(conta, Resultado):
+            return conta
         tx = Saque(valor)
-        ok = self._cliente_logado.realizar_transacao(conta, tx)
-        if ok:
-            return f"Saque de R$ {valor:.2f} realizado. {self.saldo()}"
-        return "Saque não realizado. Saldo insuficiente, limite excedido ou valor inválido."
+        if self._cliente_logado.realizar_transacao(conta, tx):
+            return Resultado("sacar", saldo=conta.saldo, transacao_id=_transacao_id(conta), dados={"valor": valor})
+        return _erro("sacar", _motivo_recusa_saque(conta, valor), valor=valor)
+
+    def transferir_resultado(self, numero_destino: int, valor: float) -> Resultado:
+        conta = self._conta_ou_erro("transferir")
+        if isinstance(conta, Resultado):
+            return conta
+        destino = self._conta_por_numero(numero_destino)
+        if destino is None:
+            return _erro("transferir", CONTA_NAO_ENCONTRADA, numero=numero_destino)
+        if destino is conta:
+            return _erro("transferir", MESMA_CONTA, numero=numero_destino)
+        if valor <= 0:
+            return _erro("transferir", VALOR_INVALIDO, valor=valor)
+        tx = Transferencia(valor, destino)
+        if not self._cliente_logado.realizar_transacao(conta, tx):
+            return _erro("transferir", _motivo_recusa_saque(conta, valor, contar_saques=False), valor=valor)
+        return Resultado("transferir", saldo=conta.saldo, transacao_id=tx.id,
+                         dados={"valor": valor, "numero_destino": numero_destino})
 
     # ---------- Empréstimos ----------
-    def simular_emprestimo(self, valor: float, parcelas: int, taxa: float) -> str:
+    def simular_emprestimo_resultado(self, valor: float, parcelas: int, taxa: float) -> Resultado:
         if not self._cliente_logado:
-            return "Faça login antes: /login <cpf>."
+            return _erro("simular_emprestimo", NAO_AUTENTICADO)
         vt, vp = simular_emprestimo(valor, parcelas, taxa)
-        return f"Simulação: total R$ {vt:.2f}; {parcelas} x R$ {vp:.2f} (juros {taxa*100:.2f}% a.m.)."
+        return Resultado("simular_emprestimo", dados={
+            "valor": valor, "parcelas": parcelas, "taxa": taxa, "valor_total": vt, "valor_parcela": vp,
+        })
 
-    def contratar_emprestimo(self, valor: float, parcelas: int, taxa: float) -> str:
-        if not self._cliente_logado:
-            return "Faça login antes: /login <cpf>."
+    def contratar_emprestimo_resultado(self, valor: float, parcelas: int, taxa: float) -> Resultado:
+        conta = self._conta_ou_erro("contratar_emprestimo")
+        if isinstance(conta, Resultado):
+            return conta
         contratar_emprestimo(self._cliente_logado, valor, parcelas, taxa)
-        return "Empréstimo contratado. " + self.saldo()
+        return Resultado("contratar_emprestimo", saldo=conta.saldo, dados=dict(self._cliente_logado.emprestimo or {}))
 
-    def pagar_parcela(self) -> str:
-        if not self._cliente_logado:
-            return "Faça login antes: /login <cpf>."
+    def pagar_parcela_resultado(self) -> Resultado:
+        conta = self._conta_ou_erro("pagar_parcela")
+        if isinstance(conta, Resultado):
+            return conta
+        emp = self._cliente_logado.emprestimo
+        if not emp or emp.get("saldo_devedor", 0) <= 0 or emp.get("parcelas_pagas", 0) >= emp.get("parcelas", 0):
+            return _erro("pagar_parcela", SEM_EMPRESTIMO)
+        pagas_antes = emp.get("parcelas_pagas", 0)
         pagar_parcela_emprestimo(self._cliente_logado)
-        return "(Se havia parcela e saldo, pagamento foi processado.)"
+        if emp.get("parcelas_pagas", 0) == pagas_antes:
+            return _erro("pagar_parcela", SALDO_INSUFICIENTE, **emp)
+        return Resultado("pagar_parcela", saldo=conta.saldo, transacao_id=_transacao_id(conta), dados=dict(emp))
 
-    def quitar_emprestimo(self) -> str:
-        if not self._cliente_logado:
-            return "Faça login antes: /login <cpf>."
+    def quitar_emprestimo_resultado(self) -> Resultado:
+        conta = self._conta_ou_erro("quitar_emprestimo")
+        if isinstance(conta, Resultado):
+            return conta
+        emp = self._cliente_logado.emprestimo
+        if not emp or emp.get("saldo_devedor", 0) <= 0:
+            return _erro("quitar_emprestimo", SEM_EMPRESTIMO)
         quitar_emprestimo(self._cliente_logado)
-        return "(Se havia saldo devedor, tentativa de quitação foi processada.)"
+        if emp.get("saldo_devedor", 0) > 0:
+            return _erro("quitar_emprestimo", SALDO_INSUFICIENTE, **emp)
+        return Resultado("quitar_emprestimo", saldo=conta.saldo, transacao_id=_transacao_id(conta), dados=dict(emp))
+
+    # ---------- Agendamentos ----------
+    def agendar_resultado(self, tipo: str, valor: float, quando: Union[datetime, str],
+                          periodicidade: Optional[str] = None, vezes: Optional[int] = None,
+                          numero_destino: Optional[int] = None, origem: Optional[str] = None) -> Resultado:
+        """Agenda um depósito, saque, transferência ou pagamento de parcela na
+        conta do cliente logado, para `quando` e, com `periodicidade` (diaria,
+        semanal, mensal), repetido `vezes` vezes (ou até ser cancelado)."""
+        conta = self._conta_ou_erro("agendar")
+        if isinstance(conta, Resultado):
+            return conta
+        agendador = obter_agendador()
+        try:
+            quando = datetime.fromisoformat(quando) if isinstance(quando, str) else quando
+        except ValueError:
+            return _erro("agendar", AGENDAMENTO_INVALIDO, motivo=f"data inválida: {quando}")
+        if quando < agendador.relogio():
+            return _erro("agendar", AGENDAMENTO_INVALIDO, motivo="data no passado")
+        destino = None
+        if tipo == "parcela":
+            emp = self._cliente_logado.emprestimo
+            if not emp or emp.get("saldo_devedor", 0) <= 0:
+                return _erro("agendar", SEM_EMPRESTIMO)
+            valor = float(emp.get("valor_parcela", 0.0))
+        elif valor <= 0:
+            return _erro("agendar", VALOR_INVALIDO, valor=valor)
+        if tipo == "transferencia":
+            destino = self._conta_por_numero(numero_destino) if numero_destino is not None else None
+            if destino is None:
+                return _erro("agendar", CONTA_NAO_ENCONTRADA, numero=numero_destino)
+            if destino is conta:
+                return _erro("agendar", MESMA_CONTA, numero=numero_destino)
+        try:
+            ag = agendador.agendar(conta, tipo, valor, quando, periodicidade, vezes, destino, origem)
+        except ValueError as exc:
+            return _erro("agendar", AGENDAMENTO_INVALIDO, motivo=str(exc))
+        self._agendamentos_ativos().append(ag.id)
+        return Resultado("agendar", dados=ag.como_dict())
+
+    def _agendamentos_ativos(self) -> List[str]:
+        # Sessões anteriores aos agendamentos não têm a lista; concluídos saem dela.
+        # Com sessões compartilhadas, os ids de agendamentos de outro worker ficam
+        # (só aparecem e podem ser cancelados no worker que os criou)
+        agendador = obter_agendador()
+        self._agendamentos = [i for i in getattr(self, "_agendamentos", [])
+                              if agendador.obter(i) is not None or not agendador.emitido(i)]
+        return self._agendamentos
+
+    def _agendamento_do_cliente(self, id: str, origem: Optional[str] = None) -> Any:
+        """O agendamento, se foi criado nesta sessão (`origem`) numa conta do cliente logado."""
+        ag = obter_agendador().obter(id) if id in self._agendamentos_ativos() else None
+        if ag is None or ag.origem != origem or ag.conta.numero not in {c.numero for c in self._cliente_logado.contas}:
+            return None
+        return ag
+
+    def agendamentos_resultado(self, origem: Optional[str] = None) -> Resultado:
+        if not self._cliente_logado:
+            return _erro("agendamentos", NAO_AUTENTICADO)
+        ags = [self._agendamento_do_cliente(i, origem) for i in list(self._agendamentos_ativos())]
+        return Resultado("agendamentos", dados={"agendamentos": [ag.como_dict() for ag in ags if ag is not None]})
+
+    def cancelar_agendamento_resultado(self, id: str, origem: Optional[str] = None) -> Resultado:
+        if not self._cliente_logado:
+            return _erro("cancelar_agendamento", NAO_AUTENTICADO)
+        ag = self._agendamento_do_cliente(id, origem)
+        if ag is None or not obter_agendador().cancelar(id):
+            return _erro("cancelar_agendamento", AGENDAMENTO_NAO_ENCONTRADO, id=id)
+        self._agendamentos.remove(id)
+        return Resultado("cancelar_agendamento", dados={"id": id})
 
     # ---------- Manutenção de contas ----------
-    def remover_conta(self, numero: int) -> str:
+    def remover_conta_resultado(self, numero: int) -> Resultado:
         """Remove uma conta do cliente logado com validações:
         - É necessário estar logado
         - Cliente deve possuir mais de uma conta (não remover a última)
@@ -148,11 +423,11 @@ class BankApp:
         - Não pode haver empréstimo ativo (saldo_devedor > 0) no cliente
         """
         if not self._cliente_logado:
-            return "Faça login antes: /login <cpf>."
+            return _erro("remover_conta", NAO_AUTENTICADO)
 
         # Deve manter ao menos uma conta
         if len(self._cliente_logado.contas) <= 1:
-            return "Não é possível remover a última conta. Mantenha ao menos uma conta ativa."
+            return _erro("remover_conta", ULTIMA_CONTA, numero=numero)
 
         # Localiza a conta pelo número dentro do cliente
         conta_alvo = None
@@ -161,25 +436,192 @@ class BankApp:
                 conta_alvo = c
                 break
         if not conta_alvo:
-            return f"Conta {numero} não encontrada para o usuário logado."
+            return _erro("remover_conta", CONTA_NAO_ENCONTRADA, numero=numero)
 
         # Saldo deve ser zero (com tolerância para ruídos de ponto flutuante)
         saldo_atual = float(getattr(conta_alvo, "saldo", 0.0))
         EPS = 1e-9  # tolerância numérica
         if abs(saldo_atual) > EPS:
-            return "Não é possível remover uma conta com saldo. Zere o saldo antes."
+            return _erro("remover_conta", CONTA_COM_SALDO, numero=numero)
 
         # Empréstimo ativo bloqueia remoção (para evitar inconsistência)
         emp = getattr(self._cliente_logado, "emprestimo", None)
         if emp and float(emp.get("saldo_devedor", 0.0)) > 0.0:
-            return "Existe empréstimo ativo. Quite ou pague o saldo devedor antes de remover contas."
+            return _erro("remover_conta", EMPRESTIMO_ATIVO, numero=numero)
+
+        if isinstance(conta_alvo, ContaPoupanca):
+            self.poupancas.remover(conta_alvo)
 
         # Remove da lista de contas do cliente
         self._cliente_logado.contas = [c for c in self._cliente_logado.contas if getattr(c, "numero", None) != numero]
         # Remove também do registro global de contas da aplicação
-        self.contas = [c for c in self.contas if getattr(c, "numero", None) != numero]
+        if conta_alvo in self.contas:
+            self.contas.remove(conta_alvo)
+        AGREGADOS.conta_encerrada(tipo_conta(conta_alvo), conta_alvo.saldo)
+
+        return Resultado("remover_conta", dados={"numero": numero})
+
+    # ---------- Versões em texto (chat/CLI) ----------
+    def login(self, cpf: str) -> str:
+        return formatar_mensagem(self.login_resultado(cpf))
+
+    def logout(self) -> str:
+        return formatar_mensagem(self.logout_resultado())
+
+    def novo_usuario(self, nome: str, cpf: str, data_nascimento: str, endereco: str) -> str:
+        return formatar_mensagem(self.novo_usuario_resultado(nome, cpf, data_nascimento, endereco))
+
+    def nova_conta(self, tipo: str = "corrente") -> str:
+        return formatar_mensagem(self.nova_conta_resultado(tipo))
+
+    def saldo(self) -> str:
+        return formatar_mensagem(self.saldo_resultado())
+
+    def extrato(self) -> str:
+        return formatar_mensagem(self.extrato_resultado())
+
+    def listar_contas(self) -> str:
+        return formatar_mensagem(self.listar_contas_resultado())
+
+    def depositar(self, valor: float) -> str:
+        return formatar_mensagem(self.depositar_resultado(valor))
+
+    def sacar(self, valor: float) -> str:
+        return formatar_mensagem(self.sacar_resultado(valor))
+
+    def transferir(self, numero_destino: int, valor: float) -> str:
+        return formatar_mensagem(self.transferir_resultado(numero_destino, valor))
 
-        return f"Conta {numero} removida com sucesso."
+    def simular_emprestimo(self, valor: float, parcelas: int, taxa: float) -> str:
+        return formatar_mensagem(self.simular_emprestimo_resultado(valor, parcelas, taxa))
+
+    def contratar_emprestimo(self, valor: float, parcelas: int, taxa: float) -> str:
+        return formatar_mensagem(self.contratar_emprestimo_resultado(valor, parcelas, taxa))
+
+    def pagar_parcela(self) -> str:
+        return formatar_mensagem(self.pagar_parcela_resultado())
+
+    def quitar_emprestimo(self) -> str:
+        return formatar_mensagem(self.quitar_emprestimo_resultado())
+
+    def remover_conta(self, numero: int) -> str:
+        return formatar_mensagem(self.remover_conta_resultado(numero))
+
+    def buscar_clientes(self, consulta: str, limite: int = 20) -> str:
+        return formatar_mensagem(self.buscar_clientes_resultado(consulta, limite))
+
+    def agendar(self, tipo: str, valor: float, quando: Union[datetime, str], periodicidade: Optional[str] = None,
+                vezes: Optional[int] = None, numero_destino: Optional[int] = None) -> str:
+        return formatar_mensagem(self.agendar_resultado(tipo, valor, quando, periodicidade, vezes, numero_destino))
+
+    def agendamentos(self) -> str:
+        return formatar_mensagem(self.agendamentos_resultado())
+
+    def cancelar_agendamento(self, id: str) -> str:
+        return formatar_mensagem(self.cancelar_agendamento_resultado(id))
+
+# ---------- Mensagens em texto para chat/CLI ----------
+def _texto_saldo(saldo: Optional[float]) -> str:
+    return f"Saldo atual: R$ {saldo or 0.0:.2f}."
+
+def _texto_extrato(r: Resultado) -> str:
+    linhas = [f"{t['data']} - {t['tipo']}: R$ {t['valor']:.2f}" for t in r.dados["transacoes"]]
+    if not linhas:
+        return "Extrato: sem movimentações. " + _texto_saldo(r.saldo)
+    return "Extrato:\n" + "\n".join(linhas) + f"\n{_texto_saldo(r.saldo)}"
+
+def _texto_contas(r: Resultado) -> str:
+    linhas = [
+        f"agência:\t{c['agencia']}\n"
+        + (f"Poupança:\t{c['numero']}\n" if c.get("tipo") == "poupanca" else f"C/C: \t\t{c['numero']}\n")
+        + f"cliente:\t{c['cliente']}\n"
+        for c in r.dados["contas"]
+    ]
+    return ("Contas do usuário:\n" + ("\n" + ("-"*40) + "\n").join(linhas)).strip()
+
+def _texto_agendamento(a: Dict[str, Any]) -> str:
+    texto = f"#{a['id']} {a['tipo']} de R$ {a['valor']:.2f} em {a['quando']}"
+    if a["periodicidade"]:
+        texto += f" ({a['periodicidade']}" + (f", mais {a['vezes']} vez(es))" if a["vezes"] else ")")
+    if a["numero_destino"] is not None:
+        texto += f" para a conta {a['numero_destino']}"
+    return texto
+
+def _texto_agendamentos(r: Resultado) -> str:
+    linhas = [_texto_agendamento(a) for a in r.dados["agendamentos"]]
+    return "Agendamentos:\n" + "\n".join(linhas) if linhas else "Nenhum agendamento ativo."
+
+def _texto_busca(r: Resultado) -> str:
+    linhas = [f"{c['nome']} (CPF {c['cpf']}) - {c['endereco']}" for c in r.dados["clientes"]]
+    if not linhas:
+        return f"Nenhum cliente encontrado para \"{r.dados['consulta']}\"."
+    return "Clientes encontrados:\n" + "\n".join(linhas)
+
+_MENSAGENS_OK: Dict[str, Callable[[Resultado], str]] = {
+    "login": lambda r: f"Login efetuado como {r.dados['nome']} (CPF {r.dados['cpf']}).",
+    "logout": lambda r: "Logout realizado.",
+    "novo_usuario": lambda r: f"Usuário criado: {r.dados['nome']} (CPF {r.dados['cpf']}). Faça /login {r.dados['cpf']} e /nova_conta.",
+    "nova_conta": lambda r: (
+        f"Conta{' poupança' if r.dados.get('tipo') == 'poupanca' else ''} criada! "
+        f"Agência {r.dados['agencia']}, Número {r.dados['numero']}."
+    ),
+    "saldo": lambda r: _texto_saldo(r.saldo),
+    "extrato": _texto_extrato,
+    "listar_contas": _texto_contas,
+    "depositar": lambda r: f"Depósito de R$ {r.dados['valor']:.2f} realizado. {_texto_saldo(r.saldo)}",
+    "sacar": lambda r: f"Saque de R$ {r.dados['valor']:.2f} realizado. {_texto_saldo(r.saldo)}",
+    "transferir": lambda r: (
+        f"Transferência de R$ {r.dados['valor']:.2f} para a conta {r.dados['numero_destino']} realizada. "
+        f"{_texto_saldo(r.saldo)}"
+    ),
+    "simular_emprestimo": lambda r: (
+        f"Simulação: total R$ {r.dados['valor_total']:.2f}; {r.dados['parcelas']} x R$ {r.dados['valor_parcela']:.2f} "
+        f"(juros {r.dados['taxa']*100:.2f}% a.m.)."
+    ),
+    "contratar_emprestimo": lambda r: "Empréstimo contratado. " + _texto_saldo(r.saldo),
+    "pagar_parcela": lambda r: "(Se havia parcela e saldo, pagamento foi processado.)",
+    "quitar_emprestimo": lambda r: "(Se havia saldo devedor, tentativa de quitação foi processada.)",
+    "remover_conta": lambda r: f"Conta {r.dados['numero']} removida com sucesso.",
+    "buscar_clientes": _texto_busca,
+    "agendar": lambda r: f"Agendado: {_texto_agendamento(r.dados)}.",
+    "agendamentos": _texto_agendamentos,
+    "cancelar_agendamento": lambda r: f"Agendamento #{r.dados['id']} cancelado.",
+}
+
+_MENSAGENS_ERRO: Dict[str, Callable[[Resultado], str]] = {
+    NAO_AUTENTICADO: lambda r: "Faça login antes: /login <cpf>.",
+    SEM_CONTA: lambda r: "Você não possui conta. Crie com /nova_conta.",
+    CLIENTE_NAO_ENCONTRADO: lambda r: "Cliente não encontrado. Crie um novo usuário com /novo_usuario.",
+    CPF_JA_CADASTRADO: lambda r: "CPF já cadastrado. Tente /login <cpf> ou use outro CPF.",
+    CPF_DUPLICADO_NO_LOTE: lambda r: f"CPF {r.dados['cpf']} repetido no lote.",
+    ULTIMA_CONTA: lambda r: "Não é possível remover a última conta. Mantenha ao menos uma conta ativa.",
+    CONTA_NAO_ENCONTRADA: lambda r: f"Conta {r.dados['numero']} não encontrada para o usuário logado.",
+    CONTA_COM_SALDO: lambda r: "Não é possível remover uma conta com saldo. Zere o saldo antes.",
+    TIPO_CONTA_INVALIDO: lambda r: "Tipo de conta inválido. Use corrente ou poupanca.",
+    CAMPO_INVALIDO: lambda r: f"Campo de busca inválido: {r.dados['campo']}. Use nome ou endereco.",
+    AGENDAMENTO_INVALIDO: lambda r: f"Agendamento não criado: {r.dados['motivo']}.",
+    AGENDAMENTO_NAO_ENCONTRADO: lambda r: f"Agendamento #{r.dados['id']} não encontrado.",
+    SEM_EMPRESTIMO: lambda r: "Nenhum empréstimo ativo.",
+    MESMA_CONTA: lambda r: "A conta de destino é a própria conta.",
+    VALOR_INVALIDO: lambda r: "Valor inválido.",
+    EMPRESTIMO_ATIVO: lambda r: "Existe empréstimo ativo. Quite ou pague o saldo devedor antes de remover contas.",
+}
+
+def formatar_mensagem(r: Resultado) -> str:
+    """Texto em pt-br do resultado, no formato exibido pelo chat e pela CLI."""
+    if r.ok:
+        return _MENSAGENS_OK[r.operacao](r)
+    if r.operacao == "depositar" and r.codigo_erro == VALOR_INVALIDO:
+        return "Depósito não realizado. Valor inválido?"
+    if r.operacao == "sacar" and r.codigo_erro not in (NAO_AUTENTICADO, SEM_CONTA):
+        return "Saque não realizado. Saldo insuficiente, limite excedido ou valor inválido."
+    if r.operacao == "transferir" and r.codigo_erro not in (NAO_AUTENTICADO, SEM_CONTA):
+        if r.codigo_erro == CONTA_NAO_ENCONTRADA:
+            return f"Transferência não realizada. Conta {r.dados['numero']} não encontrada."
+        return "Transferência não realizada. Saldo insuficiente, limite excedido, valor inválido ou conta de destino igual à de origem."
+    if r.operacao in ("pagar_parcela", "quitar_emprestimo") and r.codigo_erro not in (NAO_AUTENTICADO, SEM_CONTA):
+        return _MENSAGENS_OK[r.operacao](r)
+    return _MENSAGENS_ERRO[r.codigo_erro or ""](r)
 
 def help_text() -> str:
     return (
@@ -188,13 +630,14 @@ def help_text() -> str:
         "/novo_usuario — cadastra novo usuário (vai perguntar dados)\n"
         "/login <cpf> — autentica usuário\n"
         "/logout — encerra sessão\n"
-        "/nova_conta — cria conta corrente\n"
+        "/nova_conta [poupanca] — cria conta corrente (ou poupança)\n"
         "/listar_contas — exibe contas do usuário\n"
         "/remover_conta <numero> — remove uma conta sem saldo e sem empréstimo ativo\n"
         "/saldo — exibe saldo\n"
         "/extrato — exibe extrato\n"
         "/depositar <valor> — faz depósito\n"
         "/sacar <valor> — faz saque\n"
+        "/transferir <conta> <valor> — transfere para outra conta\n"
         "/simular_emprestimo <valor> <parcelas> <taxa> — simula\n"
         "/contratar_emprestimo <valor> <parcelas> <taxa> — contrata e deposita\n"
         "/pagar_parcela — paga 1 parcela (se houver)\n"
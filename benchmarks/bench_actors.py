@@ -0,0 +1,73 @@
+"""Compara o modo threadpool com o modo de atores por conta (actors.py).
+
+Simula requisições concorrentes de depósito como o servidor as executaria:
+- threadpool: cada operação vai para o pool de threads (anyio/starlette)
+- actor: cada operação é enviada ao ator da conta e aguardada no event loop
+
+Cargas: "quente" (todas as operações numa única conta) e "uniforme"
+(operações espalhadas por várias contas). Ao final confere se nenhum
+depósito foi perdido (soma dos saldos == total esperado).
+
+Uso: python benchmarks/bench_actors.py --operacoes 20000 --concorrencia 200
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import anyio.to_thread  # noqa: E402
+
+from actors import SistemaAtores  # noqa: E402
+from banco import ContaCorrente, Deposito, PessoaFisica  # noqa: E402
+
+def _contas(n: int) -> List[ContaCorrente]:
+    cliente = PessoaFisica(nome="Bench", cpf="0", data_nascimento="01/01/1990", endereco="-")
+    return [ContaCorrente(i + 1, cliente) for i in range(n)]
+
+async def _rodar(modo: str, contas: List[ContaCorrente], operacoes: int, concorrencia: int) -> float:
+    sistema = SistemaAtores()
+    rng = random.Random(42)
+    alvos = [contas[rng.randrange(len(contas))] for _ in range(operacoes)]
+    fila = iter(alvos)
+
+    async def cliente() -> None:
+        for conta in fila:
+            op = lambda conta=conta: Deposito(1.0).registrar(conta)  # noqa: E731
+            if modo == "actor":
+                await sistema.executar(conta, op)
+            else:
+                await anyio.to_thread.run_sync(op)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(cliente() for _ in range(concorrencia)))
+    dt = time.perf_counter() - t0
+    sistema.encerrar()
+    return dt
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--operacoes", type=int, default=20_000)
+    parser.add_argument("--concorrencia", type=int, default=200)
+    parser.add_argument("--contas", type=int, default=1_000, help="contas na carga uniforme")
+    args = parser.parse_args()
+
+    print(f"{'carga':<10} {'modo':<11} {'ops/s':>10} {'tempo':>8}  conferência")
+    for carga, n in (("quente", 1), ("uniforme", args.contas)):
+        for modo in ("threadpool", "actor"):
+            contas = _contas(n)
+            with contextlib.redirect_stdout(io.StringIO()):
+                dt = asyncio.run(_rodar(modo, contas, args.operacoes, args.concorrencia))
+            total = sum(c.saldo for c in contas)
+            ok = "ok" if total == args.operacoes else f"ERRO: soma {total} != {args.operacoes}"
+            print(f"{carga:<10} {modo:<11} {args.operacoes / dt:>10,.0f} {dt:>7.2f}s  {ok}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Agendador (agendador.py): anos de recorrências com relógio simulado.
+
+Cria --contas contas com um depósito mensal cada (dias do mês sorteados,
+inclusive 29 a 31), transferências semanais em parte delas e depósitos
+diários com fim em outra parte. Avança um RelogioSimulado dia a dia por
+--dias dias chamando executar_vencidos, confere o número de execuções
+contra o esperado (proxima_data, ocorrência a ocorrência) e mede:
+
+- execuções por segundo no avanço simulado;
+- agendar + cancelar com a roda cheia;
+- o custo de uma varredura de todos os agendamentos por tick (a alternativa
+  sem roda), para comparação.
+
+Uso: python benchmarks/bench_agendador.py --contas 20000 --dias 730 --workers 4
+"""
+from __future__ import annotations
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agendador import Agendador, RelogioSimulado, proxima_data  # noqa: E402
+from geradores import gerar_banco  # noqa: E402
+
+INICIO = datetime(2025, 1, 1, 8, 0)
+
+def _esperadas(quando: datetime, periodicidade: str, vezes, fim: datetime) -> int:
+    n, dia = 0, quando.day
+    while quando <= fim and (vezes is None or n < vezes):
+        n += 1
+        quando = proxima_data(quando, periodicidade, dia)
+    return n
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--contas", type=int, default=20_000)
+    parser.add_argument("--dias", type=int, default=730)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--operacoes", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    _, contas = gerar_banco(args.contas, 1, 0)
+    relogio = RelogioSimulado(INICIO)
+    agendador = Agendador(relogio, max_workers=args.workers, resolucao=60)
+    fim = INICIO + timedelta(days=args.dias)
+    esperado = 0
+    for i, conta in enumerate(contas):
+        quando = INICIO + timedelta(days=rng.randint(1, 31), hours=rng.randint(0, 12))
+        agendador.agendar(conta, "deposito", 1_000.0, quando, "mensal")
+        esperado += _esperadas(quando, "mensal", None, fim)
+        if i % 3 == 0 and len(contas) > 1:
+            quando = INICIO + timedelta(days=rng.randint(1, 7), minutes=rng.randint(0, 600))
+            vezes = rng.randint(10, 60)
+            agendador.agendar(conta, "transferencia", 10.0, quando, "semanal", vezes, destino=contas[i - 1])
+            esperado += _esperadas(quando, "semanal", vezes, fim)
+        if i % 10 == 0:
+            quando = INICIO + timedelta(hours=rng.randint(1, 48))
+            agendador.agendar(conta, "deposito", 5.0, quando, "diaria", 30)
+            esperado += _esperadas(quando, "diaria", 30, fim)
+    print(f"{len(agendador):,} agendamentos em {len(contas):,} contas; {args.dias} dias simulados")
+
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # mensagens de banco.py
+        for _ in range(args.dias):
+            relogio.avancar(timedelta(days=1))
+            agendador.executar_vencidos()
+    dt = time.perf_counter() - t0
+    e = agendador.estatisticas
+    disparos = e["executados"] + e["falhas"]
+    print(f"{disparos:,} disparos ({e['falhas']:,} falhas) em {e['lotes']:,} lotes, {dt:.1f}s "
+          f"({disparos / dt:,.0f}/s); esperado {esperado:,}: {'ok' if disparos == esperado else 'DIVERGENTE'}")
+
+    quandos = [fim + timedelta(seconds=rng.randint(60, 400 * 86_400)) for _ in range(args.operacoes)]
+    t0 = time.perf_counter()
+    ids = [agendador.agendar(contas[0], "deposito", 1.0, q).id for q in quandos]
+    t_agendar = (time.perf_counter() - t0) / args.operacoes
+    t0 = time.perf_counter()
+    for id in ids:
+        agendador.cancelar(id)
+    t_cancelar = (time.perf_counter() - t0) / args.operacoes
+    pendentes = list(agendador._agendamentos.values())
+    t0 = time.perf_counter()
+    vencidos = [ag for ag in pendentes if ag.quando <= relogio()]
+    t_varredura = time.perf_counter() - t0
+    print(f"agendar {t_agendar * 1e6:.1f} µs   cancelar {t_cancelar * 1e6:.1f} µs   "
+          f"varredura de {len(pendentes):,} pendentes por tick {t_varredura * 1e3:.1f} ms ({len(vencidos)} vencidos)")
+    agendador.encerrar()
+
+if __name__ == "__main__":
+    main()
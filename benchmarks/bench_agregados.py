@@ -0,0 +1,87 @@
+"""Agregados do banco (agregados.py): leitura incremental x varredura.
+
+Cria --sessoes sessões BankApp em --threads threads, cada uma com --clientes
+clientes que abrem contas (correntes e poupanças), depositam, sacam,
+transferem, contratam e pagam empréstimos e removem contas extras. Depois
+credita juros das poupanças, confere AGREGADOS.instantaneo() contra a
+varredura completa (agregados.calcular) e mede o tempo de cada leitura.
+
+Uso: python benchmarks/bench_agregados.py --sessoes 200 --clientes 500 --threads 8
+"""
+from __future__ import annotations
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agregados  # noqa: E402
+from agregados import AGREGADOS  # noqa: E402
+from bank_service import BankApp  # noqa: E402
+
+def _sessao(semente: int, clientes: int) -> BankApp:
+    rng = random.Random(semente)
+    bank = BankApp()
+    for i in range(clientes):
+        cpf = f"{semente:05d}{i:06d}"
+        bank.novo_usuario_resultado(f"Cliente {cpf}", cpf, "01/01/1990", "-")
+        bank.login_resultado(cpf)
+        bank.nova_conta_resultado("poupanca" if rng.random() < 0.3 else "corrente")
+        bank.depositar_resultado(float(rng.randint(100, 5_000)))
+        for _ in range(rng.randint(0, 4)):
+            bank.sacar_resultado(float(rng.randint(1, 800)))
+        if i:
+            bank.transferir_resultado(rng.randint(1, len(bank.contas) - 1), float(rng.randint(1, 300)))
+        if rng.random() < 0.2:
+            bank.contratar_emprestimo_resultado(float(rng.randint(500, 5_000)), 10, 0.02)
+            for _ in range(rng.randint(0, 3)):
+                bank.pagar_parcela_resultado()
+            if rng.random() < 0.2:
+                bank.quitar_emprestimo_resultado()
+        if rng.random() < 0.1:
+            extra = bank.nova_conta_resultado().dados["numero"]
+            bank.remover_conta_resultado(extra)
+    return bank
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessoes", type=int, default=200)
+    parser.add_argument("--clientes", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--leituras", type=int, default=10_000)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # mensagens de banco.py
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            bancos: List[BankApp] = list(pool.map(lambda s: _sessao(s, args.clientes), range(args.sessoes)))
+        juros = sum(b.acumular_juros_poupanca()["creditadas"] for b in bancos)
+    dt = time.perf_counter() - t0
+    contas = [c for b in bancos for c in b.contas]
+    clientes = [c for b in bancos for c in b.clientes]
+    print(f"{len(contas):,} contas, {len(clientes):,} clientes em {dt:.1f}s "
+          f"({args.threads} threads; {juros:,} créditos de juros)")
+
+    t0 = time.perf_counter()
+    for _ in range(args.leituras):
+        incremental = AGREGADOS.instantaneo()
+    t_incremental = (time.perf_counter() - t0) / args.leituras
+    t0 = time.perf_counter()
+    varredura = agregados.calcular(contas, clientes)
+    t_varredura = time.perf_counter() - t0
+
+    for chave in ("saldo_total", "contas", "emprestimos", "transacoes", "por_dia"):
+        igual = incremental[chave] == varredura[chave]
+        print(f"{chave:<12} {'ok' if igual else 'DIVERGENTE'}  {incremental[chave] if chave != 'por_dia' else len(incremental[chave])}")
+        if not igual:
+            print(f"{'':<12} varredura: {varredura[chave]}")
+    print(f"leitura incremental {t_incremental * 1e6:8.1f} µs   varredura {t_varredura * 1e3:10.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Vazão do detector de anomalias com tráfego sintético.
+
+Alimenta DetectorAnomalias.processar com depósitos e saques aleatórios
+distribuídos entre muitas contas, com um relógio simulado na taxa alvo,
+e injeta algumas anomalias (valores altos e rajadas de saques).
+
+Uso: python benchmarks/bench_anomalias.py --transacoes 1000000 --contas 500000
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anomalias import DetectorAnomalias  # noqa: E402
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transacoes", type=int, default=1_000_000)
+    parser.add_argument("--contas", type=int, default=500_000)
+    parser.add_argument("--taxa-alvo", type=float, default=100_000.0, help="transações/s simuladas")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    relogio = [0.0]
+    alertas = [0]
+
+    def sink(_alerta) -> None:
+        alertas[0] += 1
+
+    detector = DetectorAnomalias(sink=sink, relogio=lambda: relogio[0])
+    tipos = ("Deposito", "Saque")
+    trafego = []
+    for i in range(args.transacoes):
+        chave = rng.randrange(args.contas)
+        tipo = tipos[rng.random() < 0.4]
+        valor = rng.uniform(10, 200)
+        if i % 50_000 == 0:
+            valor *= 100  # valor anômalo
+        trafego.append((chave, tipo, valor))
+
+    passo = 1.0 / args.taxa_alvo
+    disparados = 0
+    t0 = time.perf_counter()
+    for chave, tipo, valor in trafego:
+        relogio[0] += passo
+        if detector.processar(chave, tipo, valor):
+            disparados += 1
+    dt = time.perf_counter() - t0
+
+    print(f"transações={args.transacoes:,} contas={len(detector):,}")
+    print(f"tempo={dt:.2f}s  {args.transacoes / dt:,.0f} transações/s (alvo {args.taxa_alvo:,.0f}/s)")
+    print(f"transações com alerta={disparados:,}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Vazão da importação/exportação em massa (bulk_io).
+
+Uso: python benchmarks/bench_bulk_io.py --linhas 10000000 --contas 100000
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bulk_io  # noqa: E402
+from bank_service import BankApp  # noqa: E402
+
+def gerar_transacoes(linhas: int, contas: int) -> Iterator[Dict[str, Any]]:
+    inicio = datetime(2024, 1, 1)
+    data = ""
+    for i in range(linhas):
+        if i % contas == 0:
+            # uma rodada de transações (uma por conta) a cada minuto simulado
+            data = (inicio + timedelta(minutes=i // contas)).strftime("%Y-%m-%d %H:%M:%S")
+        yield {
+            "numero": i % contas + 1,
+            "tipo": "Deposito" if i % 3 else "Saque",
+            "valor": 10.0 + i % 97,
+            "data": data,
+        }
+
+def _medir(rotulo: str, linhas: int, fn) -> Any:
+    t0 = time.perf_counter()
+    resultado = fn()
+    dt = time.perf_counter() - t0
+    print(f"{rotulo:<32} {linhas:>11,} linhas  {dt:8.2f}s  {linhas / dt:>12,.0f} linhas/s")
+    return resultado
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--contas", type=int, default=10_000)
+    parser.add_argument("--importar", type=int, default=1_000_000,
+                        help="linhas efetivamente carregadas no BankApp (limitado pela RAM)")
+    parser.add_argument("--formatos", default="csv,jsonl" + (",parquet" if bulk_io.pa is not None else ""))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for formato in args.formatos.split(","):
+            caminho = os.path.join(tmp, f"transacoes.{formato}")
+            _medir(f"exportar {formato}", args.linhas, lambda: bulk_io.escrever(
+                gerar_transacoes(args.linhas, args.contas), caminho, bulk_io.CAMPOS_TRANSACOES, formato))
+            _medir(f"ler {formato}", args.linhas, lambda: sum(1 for _ in bulk_io.ler(caminho, formato)))
+
+            bank = BankApp()
+            bulk_io.importar_clientes(bank, ({"cpf": str(n), "nome": f"Cliente {n}", "data_nascimento": "01/01/1990",
+                                              "endereco": "Rua A, 1 - Centro - Cidade/UF"} for n in range(args.contas)))
+            bulk_io.importar_contas(bank, ({"numero": n + 1, "cpf": str(n), "saldo": 0.0} for n in range(args.contas)))
+            linhas = min(args.linhas, args.importar)
+            from itertools import islice
+            _medir(f"importar {formato} (validar+efetivar)", linhas, lambda: bulk_io.importar_transacoes(
+                bank, islice(bulk_io.ler(caminho, formato), linhas)))
+            del bank
+
+if __name__ == "__main__":
+    main()
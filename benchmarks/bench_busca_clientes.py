@@ -0,0 +1,73 @@
+"""Busca de clientes por nome/endereço: índice (ListaClientes) x varredura.
+
+Cadastra --clientes clientes com nomes e endereços sorteados (com acentos),
+mede o tempo de inclusão com o índice mantido a cada append, confere que o
+índice devolve o mesmo que a varredura (buscar_em) e mede a latência das
+consultas nos dois modos.
+
+Uso: python benchmarks/bench_busca_clientes.py --clientes 1000000
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from banco import PessoaFisica  # noqa: E402
+from busca_clientes import ListaClientes, buscar_em  # noqa: E402
+
+NOMES = ["José", "Maria", "João", "Ana", "Antônio", "Francisca", "Luís", "Márcia", "Sérgio", "Cláudia",
+         "Paulo", "Lúcia", "Inês", "Fábio", "Otávio", "Patrícia", "Rogério", "Vitória", "Caio", "Débora"]
+SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Lima", "Conceição", "Araújo", "Gonçalves", "Ribeiro",
+              "Fernandes", "Simões", "Magalhães", "Brandão", "Falcão", "Assunção", "Pereira", "Gusmão", "Peçanha"]
+RUAS = ["Rua das Flores", "Av. Paulista", "Rua São Bento", "Travessa da Praça", "Alameda Santos", "Rua Augusta"]
+CIDADES = ["São Paulo/SP", "Belém/PA", "Florianópolis/SC", "Maceió/AL", "Goiânia/GO", "Vitória/ES",
+           "Niterói/RJ", "Ribeirão Preto/SP", "Cuiabá/MT", "Jundiaí/SP", "Ilhéus/BA", "Macapá/AP"]
+CONSULTAS = [("maria", None), ("sao paulo", None), ("jo sil", None), ("cla mag", "nome"), ("ilheus", "endereco"),
+             ("fab peca", None), ("vitoria", "endereco"), ("otavio gusmao niteroi", None), ("xyz", None),
+             ("rua augusta 1234", None)]
+
+def _clientes(n: int):
+    rng = random.Random(7)
+    for i in range(n):
+        nome = f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}"
+        endereco = f"{rng.choice(RUAS)}, {rng.randint(1, 5000)} - Centro - {rng.choice(CIDADES)}"
+        yield PessoaFisica(nome, f"{i:011d}", "01/01/1990", endereco)
+
+def _latencias(fn, repeticoes: int):
+    medidas = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        r = fn()
+        medidas.append(time.perf_counter() - t0)
+    return statistics.median(medidas), r
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clientes", type=int, default=1_000_000)
+    parser.add_argument("--limite", type=int, default=20)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    clientes = list(_clientes(args.clientes))
+    t0 = time.perf_counter()
+    lista = ListaClientes()
+    for cliente in clientes:
+        lista.append(cliente)
+    dt = time.perf_counter() - t0
+    print(f"{args.clientes:,} clientes incluídos com índice em {dt:.1f}s ({dt / args.clientes * 1e6:.1f} µs/cliente)")
+
+    print(f"{'consulta':<24} {'campo':<9} {'índice ms':>10} {'varredura ms':>13} {'achados':>8}")
+    for consulta, campo in CONSULTAS:
+        t_indice, achados = _latencias(lambda: lista.buscar(consulta, args.limite, campo), args.repeticoes)
+        t_varredura, esperados = _latencias(lambda: buscar_em(clientes, consulta, args.limite, campo), 1)
+        if achados != esperados:
+            raise SystemExit(f"divergência em {consulta!r}: índice {len(achados)} x varredura {len(esperados)}")
+        print(f"{consulta:<24} {campo or '-':<9} {t_indice * 1e3:>10.2f} {t_varredura * 1e3:>13.1f} {len(achados):>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""Teste de carga HTTP do server.py, em processo ou contra um uvicorn local.
+
+Em processo, o app ASGI é chamado direto pelo httpx (sem rede) e o modelo do
+chat é substituído por um stub com latência fixa. Com --url, a carga vai para
+um servidor já rodando (sem GEMINI_API_KEY o chat responde sem LLM).
+
+A carga é em malha aberta: as requisições são disparadas na taxa alvo
+(chegadas de Poisson, semente fixa), independentemente das respostas, e a
+latência conta a partir do instante agendado, incluindo a espera por vaga
+quando o limite de concorrência está esgotado. Antes da medição, cada usuário
+virtual é preparado (registro, token, cliente, login e conta com saldo).
+
+Rotas da mistura: register, token, login, depositar, sacar, extrato, chat.
+
+Uso (no diretório que contém frontend/):
+    python benchmarks/bench_carga_http.py --taxa 200 --duracao 20 --saida antes.json
+    python benchmarks/bench_carga_http.py --taxa 200 --duracao 20 --base antes.json
+    python benchmarks/bench_carga_http.py --url http://127.0.0.1:8000 --taxa 100
+    python benchmarks/bench_carga_http.py --comparar antes.json depois.json --limite 0.10
+
+Com --base/--comparar, quedas de vazão ou aumentos de p99 acima de --limite
+são marcados como regressão e o processo termina com código 1.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+from resiliencia_llm import ModeloResiliente  # noqa: E402
+
+MISTURA_PADRAO = "depositar=30,sacar=20,extrato=25,login=10,token=6,register=4,chat=5"
+SENHA = "senha-carga"
+
+class _ModeloFalso:
+    """Substitui o Gemini: responde após `latencia` segundos, sem rede."""
+
+    def __init__(self, latencia: float) -> None:
+        self.latencia = latencia
+
+    def generate_content(self, prompt: str) -> Any:
+        time.sleep(self.latencia)
+        return SimpleNamespace(text="Use /help para ver os comandos do banco.")
+
+@dataclass
+class Usuario:
+    cpf: str
+    sid: str
+    token: str = ""
+
+    def cabecalhos(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}", "X-Session-Id": self.sid}
+
+def parse_mistura(texto: str) -> Dict[str, float]:
+    mistura: Dict[str, float] = {}
+    for item in texto.split(","):
+        rota, _, peso = item.partition("=")
+        if rota.strip() not in ROTAS:
+            raise SystemExit(f"Rota desconhecida na mistura: {rota!r} (use {', '.join(ROTAS)})")
+        mistura[rota.strip()] = float(peso)
+    return mistura
+
+def _cliente_em_processo(latencia_llm: float, com_limites: bool) -> httpx.AsyncClient:
+    if not com_limites:
+        # Um CPF recebe muitas requisições por segundo na carga; os limites de
+        # admissão medem outra coisa e ficam abertos, salvo --com-limites
+        for classe in ("LLM", "MUTACAO", "LEITURA"):
+            os.environ.setdefault(f"RATE_LIMIT_{classe}", "1000000000/1000000000")
+    import server
+
+    server.MODEL = _ModeloFalso(latencia_llm)
+    server.LLM = ModeloResiliente.do_ambiente(server.MODEL)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://carga", timeout=30.0)
+
+# ---------- Rotas da mistura ----------
+# Prefixo por execução: contra um servidor persistente, CPFs de uma carga anterior dariam 409
+_EXECUCAO = int(time.time()) % 10_000
+
+async def _register(c: httpx.AsyncClient, u: Usuario, seq: int) -> httpx.Response:
+    return await c.post("/auth/register", json={"cpf": f"9{_EXECUCAO:04d}{seq:06d}", "password": SENHA})
+
+async def _token(c: httpx.AsyncClient, u: Usuario, seq: int) -> httpx.Response:
+    return await c.post("/auth/token", json={"cpf": u.cpf, "password": SENHA})
+
+async def _login(c: httpx.AsyncClient, u: Usuario, seq: int) -> httpx.Response:
+    return await c.post(f"/login/{u.cpf}", headers=u.cabecalhos())
+
+async def _depositar(c: httpx.AsyncClient, u: Usuario, seq: int) -> httpx.Response:
+    return await c.post("/depositar", json={"valor": 10.0}, headers=u.cabecalhos())
+
+async def _sacar(c: httpx.AsyncClient, u: Usuario, seq: int) -> httpx.Response:
+    return await c.post("/sacar", json={"valor": 5.0}, headers=u.cabecalhos())
+
+async def _extrato(c: httpx.AsyncClient, u: Usuario, seq: int) -> httpx.Response:
+    return await c.get("/extrato", headers=u.cabecalhos())
+
+async def _chat(c: httpx.AsyncClient, u: Usuario, seq: int) -> httpx.Response:
+    # Mensagem sem comando nem intenção reconhecida: cai no fallback do LLM
+    return await c.post("/chat", json={"message": "qual o horário de atendimento?"}, headers=u.cabecalhos())
+
+ROTAS: Dict[str, Callable[[httpx.AsyncClient, Usuario, int], Awaitable[httpx.Response]]] = {
+    "register": _register,
+    "token": _token,
+    "login": _login,
+    "depositar": _depositar,
+    "sacar": _sacar,
+    "extrato": _extrato,
+    "chat": _chat,
+}
+
+async def preparar(c: httpx.AsyncClient, n: int, seed: int) -> List[Usuario]:
+    """Cria `n` usuários prontos para operar (fora da medição)."""
+    usuarios = []
+    for i in range(n):
+        cpf = f"{seed % 100:02d}{i:09d}"
+        r = await c.post("/auth/register", json={"cpf": cpf, "password": SENHA})
+        if r.status_code not in (200, 409):
+            raise SystemExit(f"Falha ao registrar {cpf}: {r.status_code} {r.text}")
+        r = await c.post("/auth/token", json={"cpf": cpf, "password": SENHA})
+        r.raise_for_status()
+        u = Usuario(cpf=cpf, sid=(await c.get("/session")).json()["sessionId"], token=r.json()["access_token"])
+        await c.post("/user", headers={"X-Session-Id": u.sid}, json={
+            "nome": f"Carga {i}", "cpf": cpf, "data_nascimento": "01/01/1990", "endereco": f"Rua {i}",
+        })
+        for passo in (c.post(f"/login/{cpf}", headers=u.cabecalhos()),
+                      c.post("/conta", headers=u.cabecalhos()),
+                      c.post("/depositar", json={"valor": 1_000_000.0}, headers=u.cabecalhos())):
+            (await passo).raise_for_status()
+        usuarios.append(u)
+    return usuarios
+
+def _percentil(ordenados: List[float], p: float) -> float:
+    return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]
+
+async def executar(c: httpx.AsyncClient, usuarios: List[Usuario], mistura: Dict[str, float], taxa: float,
+                   duracao: float, concorrencia: int, seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    rotas, pesos = list(mistura), list(mistura.values())
+    latencias: Dict[str, List[float]] = defaultdict(list)
+    status: Dict[str, Counter] = defaultdict(Counter)
+    vagas = asyncio.Semaphore(concorrencia)
+    loop = asyncio.get_running_loop()
+
+    async def disparar(rota: str, u: Usuario, seq: int, agendado: float) -> None:
+        async with vagas:
+            try:
+                codigo = (await ROTAS[rota](c, u, seq)).status_code
+            except Exception as exc:
+                codigo = type(exc).__name__
+        latencias[rota].append(loop.time() - agendado)
+        status[rota][str(codigo)] += 1
+
+    tarefas = []
+    inicio = loop.time()
+    agendado = inicio
+    seq = 0
+    atraso_max = 0.0
+    while True:
+        agendado += rng.expovariate(taxa)
+        if agendado - inicio >= duracao:
+            break
+        espera = agendado - loop.time()
+        if espera > 0:
+            await asyncio.sleep(espera)
+        else:
+            atraso_max = max(atraso_max, -espera)
+        rota = rng.choices(rotas, pesos)[0]
+        tarefas.append(asyncio.create_task(disparar(rota, rng.choice(usuarios), seq, agendado)))
+        seq += 1
+    await asyncio.gather(*tarefas)
+    total = loop.time() - inicio
+
+    por_rota = {}
+    for rota in rotas:
+        ordenadas = sorted(latencias[rota])
+        if not ordenadas:
+            continue
+        n = len(ordenadas)
+        por_rota[rota] = {
+            "requisicoes": n,
+            "vazao_rps": n / total,
+            "erros": sum(q for cod, q in status[rota].items() if not cod.startswith("2")),
+            "status": dict(status[rota]),
+            "p50_ms": _percentil(ordenadas, 0.50) * 1_000,
+            "p95_ms": _percentil(ordenadas, 0.95) * 1_000,
+            "p99_ms": _percentil(ordenadas, 0.99) * 1_000,
+            "max_ms": ordenadas[-1] * 1_000,
+        }
+    return {
+        "requisicoes": seq,
+        "vazao_rps": seq / total,
+        "duracao_s": total,
+        "atraso_max_disparo_ms": atraso_max * 1_000,
+        "rotas": por_rota,
+    }
+
+def imprimir(resultado: Dict[str, Any]) -> None:
+    print(f"{'rota':<10} {'req':>7} {'req/s':>8} {'erros':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}  (ms)")
+    for rota, r in resultado["rotas"].items():
+        print(f"{rota:<10} {r['requisicoes']:>7,} {r['vazao_rps']:>8,.1f} {r['erros']:>6} {r['p50_ms']:>9.2f} "
+              f"{r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['max_ms']:>9.2f}")
+    print(f"total: {resultado['requisicoes']:,} requisições em {resultado['duracao_s']:.1f}s "
+          f"({resultado['vazao_rps']:,.1f} req/s); maior atraso de disparo {resultado['atraso_max_disparo_ms']:.1f}ms")
+
+def comparar(base: Dict[str, Any], atual: Dict[str, Any], limite: float) -> bool:
+    """Imprime vazão e p99 por rota nas duas execuções; retorna True se houver regressão."""
+    regressao = False
+    for rota, r in atual["rotas"].items():
+        antes = base["rotas"].get(rota)
+        if antes is None:
+            continue
+        var_vazao = r["vazao_rps"] / antes["vazao_rps"] - 1
+        var_p99 = r["p99_ms"] / antes["p99_ms"] - 1 if antes["p99_ms"] else 0.0
+        marca = ""
+        if var_vazao < -limite or var_p99 > limite or r["erros"] > antes["erros"]:
+            marca = "  REGRESSÃO"
+            regressao = True
+        print(f"{rota:<10} {antes['vazao_rps']:>8,.1f} -> {r['vazao_rps']:>8,.1f} req/s ({var_vazao:+6.1%})  "
+              f"p99 {antes['p99_ms']:.2f} -> {r['p99_ms']:.2f}ms ({var_p99:+6.1%})  "
+              f"erros {antes['erros']} -> {r['erros']}{marca}")
+    return regressao
+
+def _ler(caminho: str) -> Dict[str, Any]:
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+async def _rodar(args: argparse.Namespace, mistura: Dict[str, float]) -> Tuple[Dict[str, Any], str]:
+    if args.url:
+        cliente, alvo = httpx.AsyncClient(base_url=args.url, timeout=30.0), args.url
+    else:
+        cliente, alvo = _cliente_em_processo(args.latencia_llm, args.com_limites), "em processo"
+    async with cliente as c:
+        usuarios = await preparar(c, args.usuarios, args.seed)
+        return await executar(c, usuarios, mistura, args.taxa, args.duracao, args.concorrencia, args.seed), alvo
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Servidor já rodando (padrão: app em processo)")
+    parser.add_argument("--taxa", type=float, default=100.0, help="Requisições por segundo (alvo)")
+    parser.add_argument("--duracao", type=float, default=10.0, help="Segundos de medição")
+    parser.add_argument("--concorrencia", type=int, default=256, help="Máximo de requisições em andamento")
+    parser.add_argument("--usuarios", type=int, default=50, help="Usuários virtuais preparados antes da carga")
+    parser.add_argument("--mistura", default=MISTURA_PADRAO, help="rota=peso separados por vírgula")
+    parser.add_argument("--latencia-llm", type=float, default=0.05, help="Latência do modelo falso (s)")
+    parser.add_argument("--com-limites", action="store_true", help="Mantém os limites de admissão do servidor")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--saida", help="Arquivo JSON para gravar o relatório")
+    parser.add_argument("--base", help="JSON de uma execução anterior para comparar com esta")
+    parser.add_argument("--comparar", nargs=2, metavar=("BASE", "ATUAL"), help="Só compara dois JSON")
+    parser.add_argument("--limite", type=float, default=0.10, help="Variação tolerada (fração)")
+    args = parser.parse_args(argv)
+
+    if args.comparar:
+        sys.exit(1 if comparar(_ler(args.comparar[0]), _ler(args.comparar[1]), args.limite) else 0)
+
+    mistura = parse_mistura(args.mistura)
+    # As funções do BankApp imprimem mensagens a cada operação
+    with contextlib.redirect_stdout(io.StringIO()):
+        resultado, alvo = asyncio.run(_rodar(args, mistura))
+    relatorio = {
+        "meta": {
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "alvo": alvo,
+            "taxa_alvo": args.taxa,
+            "concorrencia": args.concorrencia,
+            "usuarios": args.usuarios,
+            "mistura": mistura,
+            "latencia_llm": args.latencia_llm if not args.url else None,
+            "seed": args.seed,
+        },
+        **resultado,
+    }
+    print(f"alvo {alvo}, taxa {args.taxa:,.0f} req/s, {args.usuarios} usuários, concorrência {args.concorrencia}")
+    imprimir(relatorio)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    if args.base:
+        print()
+        sys.exit(1 if comparar(_ler(args.base), relatorio, args.limite) else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Histórico em camadas (historico_frio.py) x histórico todo em memória.
+
+Monta --contas contas com --transacoes registros cada, --por-dia por dia, e
+mede a memória residente (tracemalloc), o espaço em disco dos segmentos e o
+tempo de leitura de um período recente e de um antigo. Os resumos diários
+(um por dia com movimento) continuam em memória nos dois modos.
+
+Uso: python benchmarks/bench_historico_frio.py --contas 500 --transacoes 2000 --por-dia 20 --max-recentes 200
+"""
+from __future__ import annotations
+import argparse
+import gc
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import banco  # noqa: E402
+from banco import ContaCorrente, PessoaFisica  # noqa: E402
+from historico_frio import ArquivoHistorico  # noqa: E402
+
+def _contas(n: int, transacoes: int, por_dia: int) -> list:
+    rng = random.Random(7)
+    dias = [(date(2024, 1, 1) + timedelta(days=d)).isoformat() for d in range(transacoes // por_dia + 1)]
+    contas = []
+    for i in range(n):
+        conta = ContaCorrente(i + 1, PessoaFisica(f"Cliente {i}", f"{i:011d}", "01/01/1990", "-"))
+        historico = conta.historico
+        saldo = 0.0
+        for k in range(transacoes):
+            valor = float(rng.randint(1, 1_000))
+            saldo += valor
+            historico._anexar("Deposito", valor, f"{dias[k // por_dia]} {k % 24:02d}:{k % 60:02d}:00", saldo)
+        conta._saldo = saldo
+        conta._publicar()
+        contas.append(conta)
+    return contas
+
+def _medir(args, arquivo) -> None:
+    banco.definir_arquivo_historico(arquivo)
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    contas = _contas(args.contas, args.transacoes, args.por_dia)
+    dt = time.perf_counter() - t0
+    memoria = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    banco.definir_arquivo_historico(None)
+
+    ultimo = contas[0].historico.transacoes[-1]["data"][:10]
+    primeiro = contas[0].historico.transacoes[0]["data"][:10]
+    leituras = {}
+    for nome, (inicio, fim) in (("recente", (ultimo, ultimo)), ("antigo", (primeiro, primeiro))):
+        t = time.perf_counter()
+        n = sum(len(c.historico.transacoes_periodo(inicio, fim)) for c in contas)
+        leituras[nome] = (time.perf_counter() - t, n)
+
+    modo = "em camadas" if arquivo else "em memória"
+    disco = sum(os.path.getsize(os.path.join(args.dir, f)) for f in os.listdir(args.dir)) if arquivo else 0
+    print(f"{modo:<11} montagem {dt:6.1f}s  residente {memoria / 2**20:8.1f} MiB "
+          f"({memoria / args.contas:9,.0f} B/conta)  disco {disco / 2**20:7.1f} MiB")
+    for nome, (t, n) in leituras.items():
+        print(f"{'':<11} período {nome:<8} {t * 1_000:8.1f} ms  ({n} registros)")
+    del contas
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--contas", type=int, default=2_000)
+    parser.add_argument("--transacoes", type=int, default=2_000)
+    parser.add_argument("--por-dia", type=int, default=20)
+    parser.add_argument("--max-recentes", type=int, default=200)
+    args = parser.parse_args()
+    args.dir = tempfile.mkdtemp(prefix="historico_frio_")
+    try:
+        _medir(args, None)
+        _medir(args, ArquivoHistorico(args.dir, max_recentes=args.max_recentes, tamanho_segmento=500))
+    finally:
+        shutil.rmtree(args.dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
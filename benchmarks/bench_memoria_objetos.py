@@ -0,0 +1,67 @@
+"""Memória dos objetos de domínio: clientes, contas e transações.
+
+Cria --contas contas correntes (um cliente PessoaFisica por conta), cada uma
+com --transacoes registros no histórico, e mede com tracemalloc os bytes
+alocados por conta. Também projeta o total para --projetar contas (por
+padrão 10 milhões), já que o custo cresce linearmente.
+
+Uso: python benchmarks/bench_memoria_objetos.py --contas 1000000 --transacoes 2
+"""
+from __future__ import annotations
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from banco import ContaCorrente, Deposito, PessoaFisica  # noqa: E402
+
+def _criar(n: int, transacoes: int) -> list:
+    contas = []
+    for i in range(n):
+        cliente = PessoaFisica(nome=f"Cliente {i}", cpf=f"{i:011d}", data_nascimento="01/01/1990", endereco=f"Rua {i}")
+        conta = ContaCorrente(i + 1, cliente)
+        cliente.contas.append(conta)
+        for _ in range(transacoes):
+            conta.historico.adicionar_transacao(Deposito(10.0), conta._saldo)
+        contas.append(conta)
+    return contas
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--contas", type=int, default=1_000_000)
+    parser.add_argument("--transacoes", type=int, default=0, help="registros no histórico de cada conta")
+    parser.add_argument("--projetar", type=int, default=10_000_000)
+    args = parser.parse_args()
+
+    # Textos do cliente são únicos por conta em ambos os casos; medidos à parte
+    gc.collect()
+    tracemalloc.start()
+    textos = [(f"Cliente {i}", f"{i:011d}", f"Rua {i}") for i in range(args.contas)]
+    bytes_textos = tracemalloc.get_traced_memory()[0]
+    del textos
+    gc.collect()
+    tracemalloc.stop()
+
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    contas = _criar(args.contas, args.transacoes)
+    dt = time.perf_counter() - t0
+    total = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    por_conta = total / args.contas
+    objetos = (total - bytes_textos) / args.contas
+    print(f"contas={args.contas:,} transações/conta={args.transacoes} criadas em {dt:.1f}s")
+    print(f"total       {total / 2**20:10,.1f} MiB  {por_conta:8,.0f} B/conta")
+    print(f"sem textos  {(total - bytes_textos) / 2**20:10,.1f} MiB  {objetos:8,.0f} B/conta "
+          f"(nome, CPF e endereço únicos: {bytes_textos / args.contas:,.0f} B/conta)")
+    print(f"projeção para {args.projetar:,} contas: {por_conta * args.projetar / 2**30:,.2f} GiB")
+    del contas
+
+if __name__ == "__main__":
+    main()
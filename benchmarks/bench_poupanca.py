@@ -0,0 +1,56 @@
+"""Acúmulo diário de juros: lote vetorizado (CarteiraPoupanca) x laço por objeto.
+
+Uso: python benchmarks/bench_poupanca.py --contas 1000000
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import poupanca  # noqa: E402
+from banco import ContaPoupanca, PessoaFisica  # noqa: E402
+
+def _contas(n: int, seed: int):
+    rng = random.Random(seed)
+    cliente = PessoaFisica(nome="Bench", cpf="0", data_nascimento="01/01/1990", endereco="-")
+    contas = []
+    for i in range(n):
+        conta = ContaPoupanca(i + 1, cliente, taxa_diaria=0.0002 + rng.random() * 0.0001)
+        conta._saldo = 0.0 if i % 10 == 0 else rng.uniform(50, 50_000)
+        contas.append(conta)
+    return contas
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--contas", type=int, default=1_000_000)
+    args = parser.parse_args()
+    print(f"numpy {'disponível' if poupanca.np is not None else 'ausente (laço Python)'}; contas={args.contas:,}")
+
+    contas = _contas(args.contas, 3)
+    t0 = time.perf_counter()
+    ref = poupanca.acumular_por_objeto(contas)
+    dt_obj = time.perf_counter() - t0
+    print(f"por objeto  {dt_obj:7.2f}s  {args.contas / dt_obj:>12,.0f} contas/s  {ref}")
+    del contas
+
+    contas = _contas(args.contas, 3)
+    carteira = poupanca.CarteiraPoupanca()
+    for conta in contas:
+        carteira.adicionar(conta)
+    t0 = time.perf_counter()
+    lote = carteira.acumular()
+    dt_lote = time.perf_counter() - t0
+    print(f"lote        {dt_lote:7.2f}s  {args.contas / dt_lote:>12,.0f} contas/s  {lote}")
+
+    t0 = time.perf_counter()
+    carteira._calcular_juros()
+    dt_calc = time.perf_counter() - t0
+    print(f"  só cálculo vetorizado (sem crédito/histórico): {dt_calc:.2f}s")
+    print(f"ganho total: {dt_obj / dt_lote:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Provisionamento de usuários: /auth/register + /user por usuário x /users/bulk.
+
+Roda o app em processo (TestClient) com o store em memória. Os CPFs do lote
+incluem ~1% de repetições para exercitar a checagem de duplicados.
+
+Uso (no diretório que contém frontend/):
+    python benchmarks/bench_provisionamento.py --usuarios 2000
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("BANCO_ADMIN_TOKEN", "bench")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import server  # noqa: E402
+
+def _usuarios(n: int, prefixo: str):
+    return [
+        {"nome": f"Cliente {i}", "cpf": f"{prefixo}{i % (n - n // 100):09d}", "data_nascimento": "01/01/1990",
+         "endereco": f"Rua {i}", "password": f"senha-{i}"}
+        for i in range(n)
+    ]
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--usuarios", type=int, default=2_000)
+    args = parser.parse_args()
+    c = TestClient(server.app)
+    print(f"usuários={args.usuarios:,} núcleos={os.cpu_count()} hash_workers={server._HASH_POOL._max_workers}")
+
+    sid = c.get("/session").json()["sessionId"]
+    t0 = time.perf_counter()
+    criados = 0
+    for u in _usuarios(args.usuarios, "10"):
+        r = c.post("/auth/register", json={"cpf": u["cpf"], "password": u["password"]})
+        if r.status_code == 200:
+            c.post("/user", json={k: u[k] for k in ("nome", "cpf", "data_nascimento", "endereco")},
+                   headers={"X-Session-Id": sid})
+            criados += 1
+    dt = time.perf_counter() - t0
+    print(f"um a um  {dt:7.2f}s  {args.usuarios / dt:>8,.0f} usuários/s  criados {criados}")
+
+    t0 = time.perf_counter()
+    r = c.post("/users/bulk", json={"usuarios": _usuarios(args.usuarios, "20")}, headers={"X-Admin-Token": "bench"})
+    dt = time.perf_counter() - t0
+    corpo = r.json()
+    print(f"em lote  {dt:7.2f}s  {args.usuarios / dt:>8,.0f} usuários/s  criados {corpo['criados']} "
+          f"rejeitados {corpo['rejeitados']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Chamadas ao modelo com e sem ModeloResiliente, contra um modelo falso local.
+
+O modelo falso injeta latência e erros conforme a fase do cenário:
+- saudavel: responde em --latencia segundos
+- lento: demora --lento segundos (acima do prazo)
+- fora: falha na hora
+- recuperado: volta a responder normalmente
+
+Cada fase dispara --chamadas requisições com --concorrencia threads e mede a
+latência vista pelo chamador e a origem da resposta (modelo ou local). Sem a
+camada de resiliência, as fases lenta e fora prendem as threads pelo tempo
+todo da chamada; com ela, o prazo limita a espera e o disjuntor aberto
+responde localmente na hora.
+
+Uso: python benchmarks/bench_resiliencia_llm.py --prazo 0.5 --lento 3
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Any, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resiliencia_llm import CircuitBreaker, ModeloResiliente  # noqa: E402
+
+class ModeloFalso:
+    """Modelo local com `generate_content`; a fase atual define latência e erro."""
+
+    def __init__(self, latencia: float, lento: float) -> None:
+        self.latencias = {"saudavel": latencia, "lento": lento, "fora": 0.0, "recuperado": latencia}
+        self.fase = "saudavel"
+        self.chamadas = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, conteudo: Any) -> Any:
+        with self._lock:
+            self.chamadas += 1
+        fase = self.fase
+        time.sleep(self.latencias[fase])
+        if fase == "fora":
+            raise ConnectionError("modelo indisponível")
+        return SimpleNamespace(text="resposta do modelo")
+
+def _chamar_direto(modelo: ModeloFalso, mensagem: str) -> str:
+    try:
+        modelo.generate_content(mensagem)
+        return "modelo"
+    except Exception:
+        return "erro"
+
+def _fase(fn, chamadas: int, concorrencia: int) -> Tuple[float, List[float], List[str]]:
+    def medir(i: int) -> Tuple[float, str]:
+        t0 = time.perf_counter()
+        origem = fn(f"pergunta {i}")
+        return time.perf_counter() - t0, origem
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as pool:
+        medidas = list(pool.map(medir, range(chamadas)))
+    return time.perf_counter() - t0, sorted(m[0] for m in medidas), [m[1] for m in medidas]
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chamadas", type=int, default=40)
+    parser.add_argument("--concorrencia", type=int, default=8)
+    parser.add_argument("--latencia", type=float, default=0.05, help="latência do modelo saudável (s)")
+    parser.add_argument("--lento", type=float, default=3.0, help="latência do modelo degradado (s)")
+    parser.add_argument("--prazo", type=float, default=0.5, help="prazo por chamada (s)")
+    parser.add_argument("--reabertura", type=float, default=1.0, help="tempo com o disjuntor aberto (s)")
+    args = parser.parse_args()
+
+    print(f"{'modo':<10} {'fase':<11} {'tempo':>7} {'p50 ms':>9} {'max ms':>9}  origens  (chamadas ao modelo)")
+    for modo in ("direto", "resiliente"):
+        modelo = ModeloFalso(args.latencia, args.lento)
+        llm = ModeloResiliente(modelo, prazo=args.prazo, breaker=CircuitBreaker(
+            max_falhas=3, limiar_lento=args.prazo / 2, reabertura=args.reabertura))
+        fn = (lambda m: _chamar_direto(modelo, m)) if modo == "direto" else (lambda m: llm.gerar(m).origem)
+        for fase in ("saudavel", "lento", "fora", "recuperado"):
+            modelo.fase = fase
+            if fase == "recuperado" and modo == "resiliente":
+                time.sleep(args.reabertura)  # deixa o disjuntor passar a meio aberto
+            antes = modelo.chamadas
+            dt, latencias, origens = _fase(fn, args.chamadas, args.concorrencia)
+            contagem = {o: origens.count(o) for o in sorted(set(origens))}
+            print(f"{modo:<10} {fase:<11} {dt:>6.2f}s {latencias[len(latencias) // 2] * 1_000:>9.1f} "
+                  f"{latencias[-1] * 1_000:>9.1f}  {contagem}  ({modelo.chamadas - antes})")
+        llm.encerrar()
+
+if __name__ == "__main__":
+    main()
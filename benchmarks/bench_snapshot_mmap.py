@@ -0,0 +1,99 @@
+"""Abertura de um banco grande: snapshot mapeado (mmap) x pickle.
+
+Monta um banco com N clientes/contas e histórico, grava nos dois formatos e
+mede o tempo de abertura, o tempo das primeiras operações (login + saldo +
+extrato em contas aleatórias) e o heap Python alocado (tracemalloc).
+
+Uso: python benchmarks/bench_snapshot_mmap.py --contas 1000000 --acessos 1000
+"""
+from __future__ import annotations
+import argparse
+import gc
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import snapshot_mmap  # noqa: E402
+from banco import ContaCorrente, PessoaFisica  # noqa: E402
+from bank_service import BankApp  # noqa: E402
+
+def _montar(n: int, transacoes: int, seed: int) -> BankApp:
+    rng = random.Random(seed)
+    bank = BankApp()
+    datas = [f"2024-01-{d:02d} 10:00:00" for d in range(1, 29)]
+    for i in range(n):
+        cliente = PessoaFisica(nome=f"Cliente {i}", cpf=f"{i:011d}", data_nascimento="01/01/1990", endereco=f"Rua {i}")
+        conta = ContaCorrente(i + 1, cliente)
+        saldo = 0.0
+        for d in sorted(rng.sample(range(28), transacoes)):
+            valor = float(rng.randint(1, 500))
+            saldo += valor
+            conta.historico._anexar("Deposito", valor, datas[d])
+        conta._saldo = saldo
+        conta._publicar()
+        cliente.contas.append(conta)
+        bank.clientes.append(cliente)
+        bank.contas.append(conta)
+    return bank
+
+def _acessar(bank: BankApp, n: int, acessos: int, seed: int) -> None:
+    rng = random.Random(seed)
+    for _ in range(acessos):
+        bank.login_resultado(f"{rng.randrange(n):011d}")
+        bank.saldo_resultado()
+        bank.extrato_resultado()
+
+def _medir(nome: str, abrir, n: int, acessos: int) -> None:
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    bank = abrir()
+    t_abrir = time.perf_counter() - t0
+    heap_aberto = tracemalloc.get_traced_memory()[0]
+    t0 = time.perf_counter()
+    _acessar(bank, n, acessos, seed=5)
+    t_acessos = time.perf_counter() - t0
+    heap_final = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{nome:8s} abrir {t_abrir:7.3f}s  heap {heap_aberto / 2**20:8.1f} MiB | "
+          f"{acessos} acessos {t_acessos:6.3f}s  heap {heap_final / 2**20:8.1f} MiB")
+    del bank
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--contas", type=int, default=1_000_000)
+    parser.add_argument("--transacoes", type=int, default=3, help="transações por conta")
+    parser.add_argument("--acessos", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    bank = _montar(args.contas, args.transacoes, args.seed)
+    print(f"montagem de {args.contas:,} contas: {time.perf_counter() - t0:.1f}s")
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho_mmap = os.path.join(diretorio, "banco.snap")
+        caminho_pickle = os.path.join(diretorio, "banco.pickle")
+        t0 = time.perf_counter()
+        info = snapshot_mmap.salvar(bank, caminho_mmap)
+        print(f"snapshot: {info['bytes'] / 2**20:.1f} MiB em {time.perf_counter() - t0:.1f}s")
+        t0 = time.perf_counter()
+        with open(caminho_pickle, "wb") as f:
+            pickle.dump(bank, f, protocol=pickle.HIGHEST_PROTOCOL)
+        print(f"pickle:   {os.path.getsize(caminho_pickle) / 2**20:.1f} MiB em {time.perf_counter() - t0:.1f}s")
+        del bank
+
+        def abrir_pickle() -> BankApp:
+            with open(caminho_pickle, "rb") as f:
+                return pickle.load(f)
+
+        _medir("mmap", lambda: snapshot_mmap.abrir(caminho_mmap), args.contas, args.acessos)
+        _medir("pickle", abrir_pickle, args.contas, args.acessos)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Leituras por snapshot versionado x leituras sob a trava da conta, 95/5.
+
+Várias threads executam uma mistura de 95% leituras (saldo + extrato) e 5%
+escritas (Deposito/Saque) sobre poucas contas disputadas. No modo "snapshot"
+o leitor usa `conta.estado` sem trava; no modo "trava" obtém a trava da conta
+para ler saldo e histórico juntos. Cada leitura confere que o saldo bate com
+a soma do extrato visível (consistência do par saldo/histórico).
+
+Uso: python benchmarks/bench_snapshots.py --contas 64 --operacoes 400000 --threads 8
+"""
+from __future__ import annotations
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from banco import SINAL_TRANSACAO, Conta, Deposito, PessoaFisica, Saque  # noqa: E402
+
+def _ler_snapshot(conta: Conta):
+    estado = conta.estado
+    return estado.saldo, conta.transacoes_em(estado)
+
+def _ler_com_trava(conta: Conta):
+    with conta.lock:
+        return conta.saldo, conta.historico.transacoes[:]
+
+def _consistente(saldo: float, transacoes) -> bool:
+    return abs(sum(SINAL_TRANSACAO[t["tipo"]] * t["valor"] for t in transacoes) - saldo) < 1e-6
+
+def rodar(modo: str, args) -> None:
+    cliente = PessoaFisica(nome="Bench", cpf="0", data_nascimento="01/01/1990", endereco="-")
+    contas = [Conta(i + 1, cliente) for i in range(args.contas)]
+    ler = _ler_snapshot if modo == "snapshot" else _ler_com_trava
+    por_thread = args.operacoes // args.threads
+    leituras = [0] * args.threads
+    escritas = [0] * args.threads
+    inconsistentes = [0] * args.threads
+
+    def trabalhador(indice: int) -> None:
+        rng = random.Random(args.seed + indice)
+        n = len(contas)
+        for i in range(por_thread):
+            conta = contas[rng.randrange(n)]
+            if rng.random() < args.escritas:
+                tx = Deposito(50.0) if rng.random() < 0.6 else Saque(30.0)
+                tx.registrar(conta)
+                escritas[indice] += 1
+            else:
+                saldo, transacoes = ler(conta)
+                leituras[indice] += 1
+                if i % args.verificar == 0 and not _consistente(saldo, transacoes):
+                    inconsistentes[indice] += 1
+
+    threads = [threading.Thread(target=trabalhador, args=(i,)) for i in range(args.threads)]
+    with contextlib.redirect_stdout(io.StringIO()):  # Deposito/Saque imprimem mensagens
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        dt = time.perf_counter() - t0
+    print(f"{modo:9s} {dt:6.2f}s  leituras {sum(leituras) / dt:>10,.0f}/s  "
+          f"escritas {sum(escritas) / dt:>9,.0f}/s  inconsistentes {sum(inconsistentes)}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--contas", type=int, default=64)
+    parser.add_argument("--operacoes", type=int, default=400_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--escritas", type=float, default=0.05)
+    parser.add_argument("--verificar", type=int, default=50, help="confere 1 a cada N leituras")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+    print(f"contas={args.contas} operações={args.operacoes:,} threads={args.threads} escritas={args.escritas:.0%}")
+    for modo in ("trava", "snapshot"):
+        rodar(modo, args)
+
+if __name__ == "__main__":
+    main()
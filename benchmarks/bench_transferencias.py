@@ -0,0 +1,78 @@
+"""Transferências aleatórias concorrentes entre muitas contas.
+
+Várias threads executam Transferencia entre pares aleatórios de contas e,
+ao final, confere que o dinheiro total foi conservado, que nenhum saldo
+ficou negativo e que cada transferência tem entradas ligadas nos dois
+históricos.
+
+Uso: python benchmarks/bench_transferencias.py --contas 100000 --transferencias 200000 --threads 8
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from banco import ContaCorrente, PessoaFisica, Transferencia  # noqa: E402
+
+SALDO_INICIAL = 1_000.0
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--contas", type=int, default=100_000)
+    parser.add_argument("--transferencias", type=int, default=200_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    cliente = PessoaFisica(nome="Bench", cpf="0", data_nascimento="01/01/1990", endereco="-")
+    contas = [ContaCorrente(i + 1, cliente) for i in range(args.contas)]
+    for conta in contas:
+        conta._saldo = SALDO_INICIAL
+    total_inicial = SALDO_INICIAL * args.contas
+
+    por_thread = args.transferencias // args.threads
+    efetivadas = [0] * args.threads
+
+    def trabalhador(indice: int) -> None:
+        rng = random.Random(args.seed + indice)
+        n = len(contas)
+        ok = 0
+        for _ in range(por_thread):
+            origem = contas[rng.randrange(n)]
+            destino = contas[rng.randrange(n)]
+            if Transferencia(float(rng.randint(1, 500)), destino).registrar(origem):
+                ok += 1
+        efetivadas[indice] = ok
+
+    threads = [threading.Thread(target=trabalhador, args=(i,)) for i in range(args.threads)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    dt = time.perf_counter() - t0
+
+    total_final = sum(c.saldo for c in contas)
+    negativos = sum(1 for c in contas if c.saldo < 0)
+    ligacoes = Counter(
+        t["transferencia"] for c in contas for t in c.historico.transacoes if "transferencia" in t
+    )
+    mal_ligadas = sum(1 for n in ligacoes.values() if n != 2)
+
+    tentadas = por_thread * args.threads
+    print(f"contas={args.contas:,} threads={args.threads} tentadas={tentadas:,} efetivadas={sum(efetivadas):,}")
+    print(f"tempo={dt:.2f}s  {tentadas / dt:,.0f} transferências/s")
+    print(f"total inicial={total_inicial:,.2f} final={total_final:,.2f} "
+          f"{'conservado' if abs(total_final - total_inicial) < 1e-6 else 'DIVERGENTE'}")
+    print(f"saldos negativos={negativos}  transferências sem par de entradas={mal_ligadas}")
+    if abs(total_final - total_inicial) >= 1e-6 or negativos or mal_ligadas or len(ligacoes) != sum(efetivadas):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
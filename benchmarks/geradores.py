@@ -0,0 +1,64 @@
+"""Geradores determinísticos de dados sintéticos para os benchmarks.
+
+A mesma semente sempre produz os mesmos clientes, contas e históricos, de
+modo que duas execuções (antes/depois de uma mudança) medem o mesmo dado.
+"""
+from __future__ import annotations
+import os
+import random
+import sys
+from datetime import date, timedelta
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from banco import SINAL_TRANSACAO, ContaCorrente, PessoaFisica  # noqa: E402
+
+_TIPOS = ("Deposito", "Deposito", "Saque", "PagamentoParcelaEmprestimo")
+_INICIO = date(2024, 1, 1)
+
+def cpf(i: int) -> str:
+    return f"{i:011d}"
+
+def gerar_clientes(n: int, seed: int = 42) -> List[PessoaFisica]:
+    rng = random.Random(seed)
+    return [
+        PessoaFisica(
+            nome=f"Cliente {i}",
+            cpf=cpf(i),
+            data_nascimento=f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(1950, 2005)}",
+            endereco=f"Rua {rng.randint(1, 9999)}, {rng.randint(1, 999)} - Centro - Cidade/UF",
+        )
+        for i in range(n)
+    ]
+
+def gerar_banco(n_clientes: int, contas_por_cliente: int, transacoes_por_conta: int,
+                seed: int = 42) -> Tuple[List[PessoaFisica], List[ContaCorrente]]:
+    """N clientes, M contas por cliente e K transações por conta, com saldos
+    coerentes com o histórico (débitos só quando há saldo). As datas avançam
+    de 0 a 2 dias por transação a partir de 2024-01-01.
+    """
+    rng = random.Random(seed)
+    clientes = gerar_clientes(n_clientes, seed)
+    # Datas pré-formatadas: strftime por transação dominaria a geração
+    datas = [(_INICIO + timedelta(days=d)).strftime("%Y-%m-%d") for d in range(2 * transacoes_por_conta + 1)]
+    contas: List[ContaCorrente] = []
+    for cliente in clientes:
+        for _ in range(contas_por_cliente):
+            conta = ContaCorrente(len(contas) + 1, cliente)
+            historico = conta.historico
+            saldo = 0.0
+            dia = 0
+            for k in range(transacoes_por_conta):
+                tipo = _TIPOS[rng.randrange(len(_TIPOS))]
+                valor = float(rng.randint(1, 1_000))
+                if SINAL_TRANSACAO[tipo] < 0 and valor > saldo:
+                    tipo = "Deposito"
+                saldo += SINAL_TRANSACAO[tipo] * valor
+                dia += rng.randint(0, 2)
+                historico._anexar(tipo, valor, f"{datas[dia]} {k % 24:02d}:{k % 60:02d}:00", saldo)
+            conta._saldo = saldo
+            conta._publicar()
+            cliente.contas.append(conta)
+            contas.append(conta)
+    return clientes, contas
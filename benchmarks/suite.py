@@ -0,0 +1,219 @@
+"""Microbenchmarks dos caminhos quentes de banco.py, com resultados em JSON.
+
+Casos: ContaCorrente.sacar, Historico.adicionar_transacao, filtrar_cliente,
+exibir_extrato, simular_emprestimo e pagar_parcela_emprestimo, em vários
+tamanhos de dados (geradores determinísticos em geradores.py). Por caso:
+ops/s, latência por operação (média, p50, p99) e pico de memória alocada.
+
+Uso:
+    python benchmarks/suite.py --saida antes.json
+    python benchmarks/suite.py --saida depois.json --base antes.json
+    python benchmarks/suite.py --comparar antes.json depois.json --limite 0.10
+
+Com --base/--comparar, quedas de ops/s acima de --limite são marcadas como
+regressão e o processo termina com código 1.
+"""
+from __future__ import annotations
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import banco  # noqa: E402
+from banco import Deposito, PessoaFisica  # noqa: E402
+from geradores import cpf, gerar_banco  # noqa: E402
+
+# nome -> (clientes, contas por cliente, transações por conta)
+TAMANHOS: Dict[str, Tuple[int, int, int]] = {
+    "pequeno": (1_000, 1, 20),
+    "medio": (10_000, 2, 50),
+    "grande": (50_000, 2, 20),
+}
+
+class _Nulo:
+    """Saída descartada: as funções de banco.py imprimem mensagens."""
+
+    def write(self, texto: str) -> int:
+        return len(texto)
+
+    def flush(self) -> None:
+        pass
+
+Operacao = Callable[[], Any]
+Preparo = Callable[[List[PessoaFisica], list, random.Random], Operacao]
+
+def _sacar(clientes, contas, rng) -> Operacao:
+    n = len(contas)
+    return lambda: contas[rng.randrange(n)].sacar(1.0)
+
+def _adicionar_transacao(clientes, contas, rng) -> Operacao:
+    n = len(contas)
+    tx = Deposito(10.0)
+
+    def op() -> None:
+        conta = contas[rng.randrange(n)]
+        conta.historico.adicionar_transacao(tx, conta.saldo)
+    return op
+
+def _filtrar_cliente(clientes, contas, rng) -> Operacao:
+    n = len(clientes)
+    return lambda: banco.filtrar_cliente(cpf(rng.randrange(n)), clientes)
+
+def _exibir_extrato(clientes, contas, rng) -> Operacao:
+    n = len(clientes)
+    return lambda: banco.exibir_extrato(clientes[rng.randrange(n)])
+
+def _simular_emprestimo(clientes, contas, rng) -> Operacao:
+    return lambda: banco.simular_emprestimo(float(rng.randint(100, 100_000)), rng.randint(1, 72), rng.random() / 20)
+
+def _pagar_parcela(clientes, contas, rng) -> Operacao:
+    # Empréstimos que nunca terminam e saldo de sobra: toda chamada paga uma parcela
+    for cliente in clientes:
+        cliente.emprestimo = {"valor_total": 1e12, "parcelas": 10**9, "valor_parcela": 0.01,
+                              "parcelas_pagas": 0, "saldo_devedor": 1e12}
+        cliente.contas[0]._saldo += 1e9
+        cliente.contas[0]._publicar()
+    n = len(clientes)
+    return lambda: banco.pagar_parcela_emprestimo(clientes[rng.randrange(n)])
+
+# Os casos de um tamanho compartilham os dados; os que acrescentam ao histórico
+# rodam por último para não alterar o que os anteriores medem.
+CASOS: Dict[str, Preparo] = {
+    "conta_corrente.sacar": _sacar,
+    "filtrar_cliente": _filtrar_cliente,
+    "exibir_extrato": _exibir_extrato,
+    "simular_emprestimo": _simular_emprestimo,
+    "historico.adicionar_transacao": _adicionar_transacao,
+    "pagar_parcela_emprestimo": _pagar_parcela,
+}
+
+def _percentil(ordenados: List[int], p: float) -> float:
+    return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))] / 1_000
+
+def medir(op: Operacao, tempo: float, minimo: int, amostras_memoria: int) -> Dict[str, Any]:
+    """Executa `op` por ~`tempo` segundos (ao menos `minimo` vezes), cronometrando cada chamada."""
+    latencias: List[int] = []
+    relogio = time.perf_counter_ns
+    gc.collect()
+    with contextlib.redirect_stdout(_Nulo()):
+        fim = relogio() + int(tempo * 1e9)
+        inicio = relogio()
+        while len(latencias) < minimo or relogio() < fim:
+            t0 = relogio()
+            op()
+            latencias.append(relogio() - t0)
+        total = relogio() - inicio
+
+        # Pico de memória numa passada separada (tracemalloc distorce o tempo)
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        for _ in range(amostras_memoria):
+            op()
+        pico = tracemalloc.get_traced_memory()[1] - base
+        tracemalloc.stop()
+
+    latencias.sort()
+    n = len(latencias)
+    return {
+        "ops": n,
+        "ops_s": n / (total / 1e9),
+        "lat_media_us": sum(latencias) / n / 1_000,
+        "lat_p50_us": _percentil(latencias, 0.50),
+        "lat_p99_us": _percentil(latencias, 0.99),
+        "pico_bytes": pico,
+    }
+
+def executar(tamanhos: List[str], casos: List[str], tempo: float, minimo: int,
+             amostras_memoria: int, seed: int) -> Dict[str, Any]:
+    resultados = []
+    for tamanho in tamanhos:
+        n_clientes, contas_por_cliente, transacoes = TAMANHOS[tamanho]
+        gc.collect()
+        tracemalloc.start()
+        clientes, contas = gerar_banco(n_clientes, contas_por_cliente, transacoes, seed)
+        memoria_dados = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{tamanho}: {n_clientes:,} clientes, {len(contas):,} contas, {len(contas) * transacoes:,} transações "
+              f"({memoria_dados / 2**20:.1f} MiB)", flush=True)
+        for caso in sorted(casos, key=list(CASOS).index):
+            op = CASOS[caso](clientes, contas, random.Random(seed))
+            medida = medir(op, tempo, minimo, amostras_memoria)
+            resultados.append({"caso": caso, "tamanho": tamanho, "memoria_dados_bytes": memoria_dados, **medida})
+            print(f"{tamanho:8s} {caso:32s} {medida['ops_s']:>12,.0f} ops/s  "
+                  f"média {medida['lat_media_us']:9.2f}µs  p50 {medida['lat_p50_us']:9.2f}µs  "
+                  f"p99 {medida['lat_p99_us']:9.2f}µs  pico {medida['pico_bytes'] / 1024:9.1f} KiB",
+                  flush=True)
+        del clientes, contas
+    return {
+        "meta": {
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "seed": seed,
+            "tempo_por_caso": tempo,
+            "tamanhos": {t: TAMANHOS[t] for t in tamanhos},
+        },
+        "resultados": resultados,
+    }
+
+def comparar(base: Dict[str, Any], atual: Dict[str, Any], limite: float) -> bool:
+    """Imprime a variação de ops/s por caso; retorna True se houver regressão."""
+    anteriores = {(r["caso"], r["tamanho"]): r for r in base["resultados"]}
+    regressao = False
+    for r in atual["resultados"]:
+        antes = anteriores.get((r["caso"], r["tamanho"]))
+        if antes is None:
+            continue
+        variacao = r["ops_s"] / antes["ops_s"] - 1
+        marca = ""
+        if variacao < -limite:
+            marca = "  REGRESSÃO"
+            regressao = True
+        elif variacao > limite:
+            marca = "  melhora"
+        print(f"{r['tamanho']:8s} {r['caso']:32s} {antes['ops_s']:>12,.0f} -> {r['ops_s']:>12,.0f} ops/s "
+              f"({variacao:+7.1%})  p99 {antes['lat_p99_us']:.2f} -> {r['lat_p99_us']:.2f}µs{marca}")
+    return regressao
+
+def _ler(caminho: str) -> Dict[str, Any]:
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanhos", default=",".join(TAMANHOS), help="Lista separada por vírgulas")
+    parser.add_argument("--casos", default=",".join(CASOS), help="Lista separada por vírgulas")
+    parser.add_argument("--tempo", type=float, default=1.0, help="Segundos de medição por caso")
+    parser.add_argument("--minimo", type=int, default=100, help="Mínimo de operações por caso")
+    parser.add_argument("--amostras-memoria", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--saida", help="Arquivo JSON para gravar os resultados")
+    parser.add_argument("--base", help="JSON de uma execução anterior para comparar com esta")
+    parser.add_argument("--comparar", nargs=2, metavar=("BASE", "ATUAL"), help="Só compara dois JSON")
+    parser.add_argument("--limite", type=float, default=0.10, help="Queda de ops/s tolerada (fração)")
+    args = parser.parse_args(argv)
+
+    if args.comparar:
+        sys.exit(1 if comparar(_ler(args.comparar[0]), _ler(args.comparar[1]), args.limite) else 0)
+
+    resultado = executar(args.tamanhos.split(","), args.casos.split(","), args.tempo, args.minimo,
+                         args.amostras_memoria, args.seed)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+    if args.base:
+        print()
+        sys.exit(1 if comparar(_ler(args.base), resultado, args.limite) else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+from __future__ import annotations
+import argparse
+import csv
+import json
+import os
+from datetime import datetime
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Parquet é opcional: só disponível quando o pyarrow estiver instalado
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except Exception:
+    pa = None  # type: ignore
+    pq = None  # type: ignore
+
+import agregados
+from agregados import AGREGADOS
+from banco import SINAL_TRANSACAO, Conta, ContaCorrente, ContaPoupanca, PessoaFisica, tipo_conta
+from bank_service import BankApp
+import snapshot_mmap
+
+TAMANHO_LOTE = 10_000
+
+CAMPOS_CLIENTES = ["cpf", "nome", "data_nascimento", "endereco"]
+CAMPOS_CONTAS = ["numero", "cpf", "agencia", "saldo", "limite", "limite_saque", "tipo", "taxa_diaria"]
+CAMPOS_TRANSACOES = ["numero", "tipo", "valor", "data"]
+
+FORMATOS = ("csv", "jsonl", "parquet")
+
+# ---------- Exportação (geradores) ----------
+def exportar_clientes(bank: BankApp) -> Iterator[Dict[str, Any]]:
+    for cliente in bank.clientes:
+        yield {
+            "cpf": cliente.cpf,
+            "nome": cliente.nome,
+            "data_nascimento": cliente.data_nascimento,
+            "endereco": cliente.endereco,
+        }
+
+def exportar_contas(bank: BankApp) -> Iterator[Dict[str, Any]]:
+    for conta in bank.contas:
+        yield {
+            "numero": conta.numero,
+            "cpf": getattr(conta.cliente, "cpf", ""),
+            "agencia": conta.agencia,
+            "saldo": conta.saldo,
+            "limite": getattr(conta, "limite", None),
+            "limite_saque": getattr(conta, "limite_saque", None),
+            "tipo": tipo_conta(conta),
+            "taxa_diaria": getattr(conta, "taxa_diaria", None),
+        }
+
+def exportar_transacoes(bank: BankApp) -> Iterator[Dict[str, Any]]:
+    for conta in bank.contas:
+        for t in conta.historico.transacoes:
+            yield {"numero": conta.numero, "tipo": t["tipo"], "valor": t["valor"], "data": t["data"]}
+
+def _lotes(registros: Iterable[Dict[str, Any]], tamanho: int) -> Iterator[List[Dict[str, Any]]]:
+    it = iter(registros)
+    while True:
+        lote = list(islice(it, tamanho))
+        if not lote:
+            return
+        yield lote
+
+def escrever(registros: Iterable[Dict[str, Any]], caminho: str, campos: List[str],
+             formato: str = "csv", tamanho_lote: int = TAMANHO_LOTE) -> int:
+    """Grava os registros em lotes de `tamanho_lote`, mantendo a memória limitada.
+    Retorna a quantidade de linhas gravadas.
+    """
+    total = 0
+    if formato == "csv":
+        with open(caminho, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=campos)
+            writer.writeheader()
+            for lote in _lotes(registros, tamanho_lote):
+                writer.writerows(lote)
+                total += len(lote)
+    elif formato == "jsonl":
+        with open(caminho, "w", encoding="utf-8") as f:
+            for lote in _lotes(registros, tamanho_lote):
+                f.write("\n".join(json.dumps(r, ensure_ascii=False) for r in lote))
+                f.write("\n")
+                total += len(lote)
+    elif formato == "parquet":
+        _exigir_pyarrow()
+        writer = None
+        try:
+            for lote in _lotes(registros, tamanho_lote):
+                tabela = pa.Table.from_pylist(lote)
+                if writer is None:
+                    writer = pq.ParquetWriter(caminho, tabela.schema)
+                writer.write_table(tabela)
+                total += len(lote)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        raise ValueError(f"Formato não suportado: {formato}")
+    return total
+
+# ---------- Importação (geradores + validação em lote) ----------
+def ler(caminho: str, formato: str = "csv", tamanho_lote: int = TAMANHO_LOTE) -> Iterator[Dict[str, Any]]:
+    if formato == "csv":
+        with open(caminho, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+    elif formato == "jsonl":
+        with open(caminho, encoding="utf-8") as f:
+            for linha in f:
+                if linha.strip():
+                    yield json.loads(linha)
+    elif formato == "parquet":
+        _exigir_pyarrow()
+        arquivo = pq.ParquetFile(caminho)
+        for lote in arquivo.iter_batches(batch_size=tamanho_lote):
+            yield from lote.to_pylist()
+    else:
+        raise ValueError(f"Formato não suportado: {formato}")
+
+def _exigir_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError("Formato parquet requer o pacote 'pyarrow' (pip install pyarrow).")
+
+def _importar_em_lotes(registros: Iterable[Dict[str, Any]], validar: Callable[[Dict[str, Any]], Any],
+                       efetivar: Callable[[List[Any]], None], tamanho_lote: int) -> Dict[str, Any]:
+    """Valida um lote inteiro e só então efetiva as linhas válidas de uma vez.
+    `validar` devolve o objeto a efetivar ou lança ValueError com o motivo.
+    """
+    aceitos = 0
+    rejeitados: List[Tuple[int, str]] = []
+    linha = 0
+    for lote in _lotes(registros, tamanho_lote):
+        validos: List[Any] = []
+        for registro in lote:
+            linha += 1
+            try:
+                validos.append(validar(registro))
+            except (ValueError, KeyError, TypeError) as exc:
+                rejeitados.append((linha, str(exc)))
+        efetivar(validos)
+        aceitos += len(validos)
+    return {"aceitos": aceitos, "rejeitados": rejeitados}
+
+def importar_clientes(bank: BankApp, registros: Iterable[Dict[str, Any]],
+                      tamanho_lote: int = TAMANHO_LOTE) -> Dict[str, Any]:
+    cpfs = {c.cpf for c in bank.clientes}
+
+    def validar(r: Dict[str, Any]) -> PessoaFisica:
+        cpf = str(r["cpf"]).strip()
+        if not cpf:
+            raise ValueError("CPF vazio")
+        if cpf in cpfs:
+            raise ValueError(f"CPF já cadastrado: {cpf}")
+        cpfs.add(cpf)
+        return PessoaFisica(nome=r["nome"], cpf=cpf, data_nascimento=r["data_nascimento"], endereco=r["endereco"])
+
+    return _importar_em_lotes(registros, validar, bank.clientes.extend, tamanho_lote)
+
+def importar_contas(bank: BankApp, registros: Iterable[Dict[str, Any]],
+                    tamanho_lote: int = TAMANHO_LOTE) -> Dict[str, Any]:
+    por_cpf = {c.cpf: c for c in bank.clientes}
+    numeros = {c.numero for c in bank.contas}
+
+    def validar(r: Dict[str, Any]) -> Conta:
+        numero = int(r["numero"])
+        if numero in numeros:
+            raise ValueError(f"Conta já existente: {numero}")
+        cliente = por_cpf.get(str(r["cpf"]))
+        if cliente is None:
+            raise ValueError(f"Cliente não encontrado: {r['cpf']}")
+        # Arquivos sem a coluna "tipo" (exportações antigas) só tinham contas correntes
+        tipo = r.get("tipo") or "corrente"
+        if tipo == "poupanca":
+            conta: Conta = ContaPoupanca(numero, cliente)
+            if r.get("taxa_diaria") not in (None, ""):
+                conta.taxa_diaria = float(r["taxa_diaria"])
+        elif tipo == "corrente":
+            conta = ContaCorrente(numero, cliente)
+            if r.get("limite") not in (None, ""):
+                conta.limite = float(r["limite"])
+            if r.get("limite_saque") not in (None, ""):
+                conta.limite_saque = int(r["limite_saque"])
+        else:
+            raise ValueError(f"Tipo de conta inválido: {tipo}")
+        conta._saldo = float(r.get("saldo") or 0.0)
+        numeros.add(numero)
+        return conta
+
+    def efetivar(contas: List[Conta]) -> None:
+        bank.contas.extend(contas)
+        for conta in contas:
+            conta.cliente.adicionar_conta(conta)
+            if isinstance(conta, ContaPoupanca):
+                bank.poupancas.adicionar(conta)
+            # Publicada só aqui: linhas recusadas na validação não chegam aos agregados
+            conta._publicar()
+            AGREGADOS.conta_aberta(tipo_conta(conta))
+
+    return _importar_em_lotes(registros, validar, efetivar, tamanho_lote)
+
+def importar_transacoes(bank: BankApp, registros: Iterable[Dict[str, Any]],
+                        tamanho_lote: int = TAMANHO_LOTE) -> Dict[str, Any]:
+    """Importa o histórico sem reexecutar saques/depósitos: o saldo das contas
+    vem da importação de contas, aqui apenas o histórico e seus resumos são montados.
+    Só recebem linhas as contas ainda sem histórico (as criadas pela importação
+    de contas): reimportar o extrato de uma conta existente o duplicaria.
+    As linhas devem estar em ordem cronológica por conta; as que voltam no
+    tempo são rejeitadas, pois os resumos diários só atualizam o último dia.
+    Ao final, os saldos dos resumos são ancorados no saldo importado da conta.
+    """
+    por_numero = {c.numero: c for c in bank.contas}
+    # Número -> data da última linha aceita; None para contas que já tinham histórico
+    ultima_data: Dict[int, Optional[str]] = {}
+    importadas: Dict[int, Conta] = {}
+
+    def validar(r: Dict[str, Any]) -> Tuple[Any, str, float, str]:
+        conta = por_numero.get(int(r["numero"]))
+        if conta is None:
+            raise ValueError(f"Conta não encontrada: {r['numero']}")
+        if conta.numero not in ultima_data:
+            ultima_data[conta.numero] = None if len(conta.historico) else ""
+        anterior = ultima_data[conta.numero]
+        if anterior is None:
+            raise ValueError(f"Conta {conta.numero} já possui histórico; o extrato não é reimportado")
+        tipo = r["tipo"]
+        if tipo not in SINAL_TRANSACAO:
+            raise ValueError(f"Tipo de transação desconhecido: {tipo}")
+        valor = float(r["valor"])
+        if valor <= 0:
+            raise ValueError(f"Valor inválido: {valor}")
+        data = str(r["data"])
+        momento = datetime.fromisoformat(data)
+        if len(data) != 19 or data[10] != " ":
+            data = momento.strftime("%Y-%m-%d %H:%M:%S")
+        if data < anterior:
+            raise ValueError(f"Data fora de ordem para a conta {conta.numero}: {data} antes de {anterior}")
+        ultima_data[conta.numero] = data
+        return conta, tipo, valor, data
+
+    def efetivar(validos: List[Tuple[Any, str, float, str]]) -> None:
+        alteradas = {}
+        for conta, tipo, valor, data in validos:
+            conta.historico._restaurar(tipo, valor, data)
+            alteradas[id(conta)] = conta
+        for conta in alteradas.values():
+            conta._publicar()
+            importadas[conta.numero] = conta
+        # Histórico importado entra nos totais de uma vez, não como transações novas
+        AGREGADOS.somar(*agregados.contribuicao(
+            movimentos=((tipo, 1, valor, data[:10]) for _, tipo, valor, data in validos),
+            dias_retidos=AGREGADOS.dias_retidos,
+        ))
+
+    resultado = _importar_em_lotes(registros, validar, efetivar, tamanho_lote)
+    for conta in importadas.values():
+        _ancorar_saldos(conta)
+    return resultado
+
+def _ancorar_saldos(conta: Conta) -> None:
+    """Os resumos do histórico importado partem de saldo zero; o saldo real
+    da conta (importado com ela) fixa o fechamento do último dia, e a
+    diferença vale como saldo anterior ao primeiro registro."""
+    resumos = conta.historico.resumos_diarios
+    if not resumos:
+        return
+    diferenca = conta.saldo - resumos[-1]["fechamento"]
+    if diferenca:
+        for resumo in resumos:
+            resumo["abertura"] += diferenca
+            resumo["fechamento"] += diferenca
+
+# ---------- Linha de comando ----------
+_ARQUIVOS = (
+    ("clientes", CAMPOS_CLIENTES, exportar_clientes, importar_clientes),
+    ("contas", CAMPOS_CONTAS, exportar_contas, importar_contas),
+    ("transacoes", CAMPOS_TRANSACOES, exportar_transacoes, importar_transacoes),
+)
+
+def exportar_banco(bank: BankApp, diretorio: str, formato: str = "csv",
+                   tamanho_lote: int = TAMANHO_LOTE) -> Dict[str, int]:
+    os.makedirs(diretorio, exist_ok=True)
+    return {
+        nome: escrever(exportar(bank), os.path.join(diretorio, f"{nome}.{formato}"), campos, formato, tamanho_lote)
+        for nome, campos, exportar, _ in _ARQUIVOS
+    }
+
+def importar_banco(bank: BankApp, diretorio: str, formato: str = "csv",
+                   tamanho_lote: int = TAMANHO_LOTE) -> Dict[str, Dict[str, Any]]:
+    resultado: Dict[str, Dict[str, Any]] = {}
+    for nome, _, _, importar in _ARQUIVOS:
+        caminho = os.path.join(diretorio, f"{nome}.{formato}")
+        if os.path.exists(caminho):
+            resultado[nome] = importar(bank, ler(caminho, formato, tamanho_lote), tamanho_lote)
+    return resultado
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Importação/exportação em massa de clientes, contas e transações.")
+    parser.add_argument("origem", help="Diretório com clientes/contas/transacoes a importar")
+    parser.add_argument("--formato", choices=FORMATOS, default="csv")
+    parser.add_argument("--destino", help="Diretório para reexportar os dados importados")
+    parser.add_argument("--formato-destino", choices=FORMATOS)
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE)
+    parser.add_argument("--snapshot", help="Arquivo para gravar o snapshot binário (snapshot_mmap) dos dados importados")
+    args = parser.parse_args(argv)
+
+    bank = BankApp()
+    for nome, resultado in importar_banco(bank, args.origem, args.formato, args.lote).items():
+        print(f"{nome}: {resultado['aceitos']} importados, {len(resultado['rejeitados'])} rejeitados")
+        for linha, motivo in resultado["rejeitados"][:10]:
+            print(f"  linha {linha}: {motivo}")
+    if args.destino:
+        formato = args.formato_destino or args.formato
+        for nome, total in exportar_banco(bank, args.destino, formato, args.lote).items():
+            print(f"{nome}: {total} exportados para {args.destino}")
+    if args.snapshot:
+        info = snapshot_mmap.salvar(bank, args.snapshot)
+        print(f"snapshot: {info['contas']} contas, {info['transacoes']} transações, {info['bytes']} bytes em {args.snapshot}")
+
+if __name__ == "__main__":
+    main()
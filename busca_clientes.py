@@ -0,0 +1,222 @@
+from __future__ import annotations
+import heapq
+import re
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+CAMPOS = ("nome", "endereco")
+_PALAVRA = re.compile(r"\w+")
+# Termos novos ficam numa lista pequena até este tamanho, depois entram na principal
+_MAX_TERMOS_NOVOS = 4096
+# Termos com até tantas posições entram na interseção de conjuntos; acima disso,
+# são conferidos cliente a cliente
+_MAX_INTERSECAO = 250_000
+# Conferência por bisect nas listas do termo enquanto forem até tantas listas
+_MAX_LISTAS_BISECT = 32
+
+def normalizar(texto: str) -> str:
+    """Sem acentos e em minúsculas: "São Paulo" -> "sao paulo"."""
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+def termos(texto: str) -> List[str]:
+    """Palavras normalizadas do texto (letras e dígitos; o resto separa)."""
+    return _PALAVRA.findall(normalizar(texto or ""))
+
+def _casa(termos_cliente: Sequence[str], termo: str, prefixo: bool) -> bool:
+    if prefixo:
+        return any(t.startswith(termo) for t in termos_cliente)
+    return termo in termos_cliente
+
+def _termos_do_cliente(cliente: Any, campos: Sequence[str]) -> List[str]:
+    return [t for campo in campos for t in termos(getattr(cliente, campo, "") or "")]
+
+class _TermosDoCampo:
+    """Lista invertida de um campo: termo -> posições dos clientes, crescentes.
+
+    Os termos ficam também ordenados para a busca por prefixo (bisect). Termos
+    novos entram numa lista pequena; quando ela enche, as duas são fundidas
+    numa lista nova, trocada de uma vez para não atrapalhar buscas em curso.
+    """
+    __slots__ = ("posicoes", "_ordenados", "_novos")
+
+    def __init__(self) -> None:
+        self.posicoes: Dict[str, array] = {}
+        self._ordenados: List[str] = []
+        self._novos: List[str] = []
+
+    def adicionar(self, posicao: int, termos_campo: Iterable[str]) -> None:
+        for termo in set(termos_campo):
+            lista = self.posicoes.get(termo)
+            if lista is None:
+                lista = self.posicoes[termo] = array("I")
+                insort(self._novos, termo)
+            lista.append(posicao)
+        if len(self._novos) > _MAX_TERMOS_NOVOS:
+            self._ordenados = sorted(self._ordenados + self._novos)
+            self._novos = []
+
+    def listas(self, termo: str, prefixo: bool) -> List[array]:
+        """Listas de posições dos termos iguais a `termo` (ou começados por ele)."""
+        if not prefixo:
+            lista = self.posicoes.get(termo)
+            return [lista] if lista is not None else []
+        fim = termo + "\uffff"
+        encontrados = set()
+        for ordenados in (self._ordenados, self._novos):
+            i = bisect_left(ordenados, termo)
+            while i < len(ordenados) and ordenados[i] < fim:
+                encontrados.add(ordenados[i])
+                i += 1
+        return [self.posicoes[t] for t in encontrados]
+
+class IndiceClientes:
+    """Índice de busca por nome e endereço, atualizado a cada cliente incluído.
+
+    A consulta é quebrada em termos normalizados (sem acento, minúsculas); um
+    cliente casa se cada termo da consulta for prefixo (ou, com
+    `prefixo=False`, igual) de algum termo do nome ou do endereço.
+
+    As posições do termo mais seletivo são percorridas em ordem de cadastro e
+    os demais termos conferidos em cada uma, até `limite` resultados. Quando a
+    estimativa de resultados é pequena (seriam percorridas muitas posições à
+    toa), as posições dos termos são antes intersectadas como conjuntos.
+    """
+
+    def __init__(self, clientes: Sequence[Any]) -> None:
+        self._clientes = clientes
+        self._campos: Dict[str, _TermosDoCampo] = {campo: _TermosDoCampo() for campo in CAMPOS}
+
+    def adicionar(self, posicao: int, cliente: Any) -> None:
+        for campo, indice in self._campos.items():
+            indice.adicionar(posicao, termos(getattr(cliente, campo, "") or ""))
+
+    def buscar(self, consulta: str, limite: int = 20, campo: Optional[str] = None,
+               prefixo: bool = True) -> List[Any]:
+        procurados = list(dict.fromkeys(termos(consulta)))
+        if not procurados or limite <= 0:
+            return []
+        campos = (campo,) if campo else CAMPOS
+        grupos: List[Tuple[int, str, List[array]]] = []
+        for termo in procurados:
+            listas = [lista for c in campos for lista in self._campos[c].listas(termo, prefixo)]
+            total = sum(map(len, listas))
+            if not total:
+                return []
+            grupos.append((total, termo, listas))
+        grupos.sort(key=lambda g: g[0])
+        restantes = grupos[1:]
+        # Resultados esperados supondo termos independentes
+        esperados = float(grupos[0][0])
+        for total, _, _ in restantes:
+            esperados *= total / max(1, len(self._clientes))
+        if restantes and esperados < 4 * limite and grupos[0][0] <= _MAX_INTERSECAO:
+            candidatas = set(chain.from_iterable(grupos[0][2]))
+            frequentes = []
+            for grupo in restantes:
+                if grupo[0] <= _MAX_INTERSECAO and candidatas:
+                    candidatas = candidatas.intersection(chain.from_iterable(grupo[2]))
+                else:
+                    frequentes.append(grupo)
+            posicoes: Iterable[int] = sorted(candidatas)
+            restantes = frequentes
+        else:
+            posicoes = _unicas(heapq.merge(*grupos[0][2]))
+        por_bisect = [listas for _, _, listas in restantes if len(listas) <= _MAX_LISTAS_BISECT]
+        por_termos = [termo for _, termo, listas in restantes if len(listas) > _MAX_LISTAS_BISECT]
+
+        resultado: List[Any] = []
+        for posicao in posicoes:
+            if not all(_contem(listas, posicao) for listas in por_bisect):
+                continue
+            cliente = self._clientes[posicao]
+            if por_termos:
+                termos_cliente = _termos_do_cliente(cliente, campos)
+                if not all(_casa(termos_cliente, t, prefixo) for t in por_termos):
+                    continue
+            resultado.append(cliente)
+            if len(resultado) >= limite:
+                break
+        return resultado
+
+def _contem(listas: Sequence[array], posicao: int) -> bool:
+    for lista in listas:
+        i = bisect_left(lista, posicao)
+        if i < len(lista) and lista[i] == posicao:
+            return True
+    return False
+
+def _unicas(posicoes: Iterable[int]) -> Iterator[int]:
+    anterior = -1
+    for posicao in posicoes:
+        if posicao != anterior:
+            yield posicao
+            anterior = posicao
+
+def buscar_em(clientes: Iterable[Any], consulta: str, limite: int = 20, campo: Optional[str] = None,
+              prefixo: bool = True) -> List[Any]:
+    """Mesma busca do índice, por varredura (listas de clientes sem índice)."""
+    procurados = list(dict.fromkeys(termos(consulta)))
+    if not procurados or limite <= 0:
+        return []
+    campos = (campo,) if campo else CAMPOS
+    resultado: List[Any] = []
+    for cliente in clientes:
+        termos_cliente = _termos_do_cliente(cliente, campos)
+        if all(_casa(termos_cliente, t, prefixo) for t in procurados):
+            resultado.append(cliente)
+            if len(resultado) >= limite:
+                break
+    return resultado
+
+class ListaClientes(list):
+    """Lista de clientes com índice por CPF e índice de busca (IndiceClientes),
+    mantidos a cada `append`/`extend`. Clientes só entram: as posições no
+    índice são as posições na lista.
+    """
+
+    def __init__(self, clientes: Iterable[Any] = ()) -> None:
+        super().__init__()
+        self._lock = threading.Lock()
+        self._por_cpf: Dict[str, Any] = {}
+        self.indice = IndiceClientes(self)
+        self.extend(clientes)
+
+    def _incluir(self, cliente: Any) -> None:
+        posicao = len(self)
+        super().append(cliente)
+        self._por_cpf.setdefault(cliente.cpf, cliente)
+        self.indice.adicionar(posicao, cliente)
+
+    def append(self, cliente: Any) -> None:
+        with self._lock:
+            self._incluir(cliente)
+
+    def extend(self, clientes: Iterable[Any]) -> None:
+        with self._lock:
+            for cliente in clientes:
+                self._incluir(cliente)
+
+    def __iadd__(self, clientes: Iterable[Any]) -> "ListaClientes":
+        self.extend(clientes)
+        return self
+
+    def _somente_inclusao(self, *args: Any, **kwargs: Any) -> Any:
+        raise TypeError("ListaClientes só aceita inclusões (append/extend)")
+
+    insert = remove = pop = clear = sort = reverse = __setitem__ = __delitem__ = _somente_inclusao
+
+    def buscar_cpf(self, cpf: str) -> Optional[Any]:
+        return self._por_cpf.get(cpf)
+
+    def buscar(self, consulta: str, limite: int = 20, campo: Optional[str] = None,
+               prefixo: bool = True) -> List[Any]:
+        return self.indice.buscar(consulta, limite, campo, prefixo)
+
+    def __reduce__(self) -> Any:
+        # Só os clientes são serializados; os índices são refeitos ao carregar
+        return (ListaClientes, (list(self),))
@@ -0,0 +1,230 @@
+from __future__ import annotations
+import glob
+import json
+import os
+import threading
+import zlib
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Union
+
+class Segmento(NamedTuple):
+    """Bloco selado do histórico de uma conta, com seu índice de tempo."""
+    arquivo: str
+    offset: int
+    tamanho: int
+    inicio: int  # posição do primeiro registro no histórico da conta
+    quantidade: int
+    data_inicio: str  # "%Y-%m-%d %H:%M:%S" do primeiro e do último registro
+    data_fim: str
+
+class Recentes(list):
+    """Camada quente de um histórico com camada fria: os registros mais novos,
+    mais o índice dos segmentos selados antes deles. É trocada inteira a cada
+    selagem, então um leitor que a obteve vê sempre um histórico consistente.
+    """
+    __slots__ = ("arquivados", "segmentos")
+
+    def __init__(self, registros: Sequence[Dict[str, Any]] = (), arquivados: int = 0,
+                 segmentos: tuple = ()) -> None:
+        super().__init__(registros)
+        self.arquivados = arquivados
+        self.segmentos = segmentos
+
+class TransacoesEmCamadas(Sequence):
+    """Visão somente leitura do histórico completo (segmentos + recentes).
+    Índices e fatias leem do disco só os segmentos que cobrem o intervalo.
+    """
+
+    def __init__(self, arquivo: "ArquivoHistorico", recentes: Recentes) -> None:
+        self._arquivo = arquivo
+        self._recentes = recentes
+        self._arquivados = recentes.arquivados
+        self._segmentos = recentes.segmentos
+        self._inicios = [s.inicio for s in self._segmentos]
+
+    def __len__(self) -> int:
+        return self._arquivados + len(self._recentes)
+
+    def _registro(self, i: int) -> Dict[str, Any]:
+        if i >= self._arquivados:
+            return self._recentes[i - self._arquivados]
+        seg = self._segmentos[bisect_right(self._inicios, i) - 1]
+        return self._arquivo.ler(seg)[i - seg.inicio]
+
+    def __getitem__(self, indice: Union[int, slice]) -> Any:
+        if isinstance(indice, slice):
+            inicio, fim, passo = indice.indices(len(self))
+            if passo != 1:
+                return [self._registro(i) for i in range(inicio, fim, passo)]
+            return self._intervalo(inicio, fim)
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError("índice fora do histórico")
+        return self._registro(indice)
+
+    def _intervalo(self, inicio: int, fim: int) -> List[Dict[str, Any]]:
+        resultado: List[Dict[str, Any]] = []
+        if inicio < min(fim, self._arquivados):
+            k = max(0, bisect_right(self._inicios, inicio) - 1)
+            for seg in self._segmentos[k:]:
+                if seg.inicio >= fim:
+                    break
+                registros = self._arquivo.ler(seg)
+                resultado.extend(registros[max(0, inicio - seg.inicio):fim - seg.inicio])
+        if fim > self._arquivados:
+            resultado.extend(self._recentes[max(0, inicio - self._arquivados):fim - self._arquivados])
+        return resultado
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for seg in self._segmentos:
+            yield from self._arquivo.ler(seg)
+        yield from self._recentes
+
+    def periodo(self, inicio: str, fim: str) -> List[Dict[str, Any]]:
+        """Registros com data em [inicio, fim] (prefixos de "%Y-%m-%d %H:%M:%S"),
+        lendo apenas os segmentos cujo índice de tempo intercepta o período."""
+        fim = fim + "\uffff"
+        resultado = [
+            r
+            for seg in self._segmentos if seg.data_fim >= inicio and seg.data_inicio <= fim
+            for r in self._arquivo.ler(seg) if inicio <= r["data"] <= fim
+        ]
+        resultado.extend(r for r in self._recentes if inicio <= r["data"] <= fim)
+        return resultado
+
+class ArquivoHistorico:
+    """Camada fria dos históricos: segmentos comprimidos (zlib, JSON) em
+    arquivos de log só de acréscimo, compartilhados por todas as contas.
+
+    Cada histórico mantém em memória no máximo `max_recentes` registros: ao
+    passar disso, a metade mais antiga é selada em segmentos de até
+    `tamanho_segmento` registros. `selar_antigos` (rotina periódica) sela o que
+    tiver mais de `janela_dias`. Segmentos lidos ficam num cache LRU de
+    `cache_segmentos` entradas.
+    """
+
+    def __init__(self, diretorio: str, janela_dias: int = 30, max_recentes: int = 1000,
+                 tamanho_segmento: int = 1000, max_bytes_arquivo: int = 256 * 2**20,
+                 cache_segmentos: int = 256) -> None:
+        self.diretorio = diretorio
+        self.janela_dias = janela_dias
+        self.max_recentes = max(2, max_recentes)
+        self.tamanho_segmento = max(1, tamanho_segmento)
+        self.max_bytes_arquivo = max_bytes_arquivo
+        self.cache_segmentos = cache_segmentos
+        os.makedirs(diretorio, exist_ok=True)
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[tuple, List[Dict[str, Any]]]" = OrderedDict()
+        # Um prefixo por processo: workers no mesmo diretório não disputam arquivos
+        prefixo = os.path.join(diretorio, f"segmentos-{os.getpid()}-")
+        self._numero = len(glob.glob(glob.escape(prefixo) + "*.zlog"))
+        self._prefixo = prefixo
+        self._atual: Optional[str] = None
+        self._tamanho_atual = 0
+
+    @classmethod
+    def do_ambiente(cls) -> Optional["ArquivoHistorico"]:
+        """BANCO_HISTORICO_FRIO=<diretório> liga a camada fria; BANCO_HISTORICO_JANELA_DIAS
+        e BANCO_HISTORICO_MAX_RECENTES definem a janela quente."""
+        diretorio = os.getenv("BANCO_HISTORICO_FRIO")
+        if not diretorio:
+            return None
+        return abrir(
+            diretorio,
+            janela_dias=int(os.getenv("BANCO_HISTORICO_JANELA_DIAS", "30")),
+            max_recentes=int(os.getenv("BANCO_HISTORICO_MAX_RECENTES", "1000")),
+        )
+
+    def __reduce__(self) -> Any:
+        # Sessões serializadas reabrem o mesmo diretório (os segmentos continuam válidos)
+        return (abrir, (self.diretorio, self.janela_dias, self.max_recentes, self.tamanho_segmento,
+                        self.max_bytes_arquivo, self.cache_segmentos))
+
+    # ---------- Escrita ----------
+    def _escrever(self, dados: bytes) -> tuple:
+        with self._lock:
+            if self._atual is None or self._tamanho_atual + len(dados) > self.max_bytes_arquivo:
+                self._numero += 1
+                self._atual = f"{self._prefixo}{self._numero:06d}.zlog"
+                self._tamanho_atual = 0
+            with open(self._atual, "ab") as f:
+                offset = f.tell()
+                f.write(dados)
+            self._tamanho_atual = offset + len(dados)
+            return self._atual, offset
+
+    def selar(self, historico: Any, quantidade: Optional[int] = None) -> int:
+        """Sela os `quantidade` registros mais antigos da camada quente (padrão:
+        metade do limite). Chamar com a trava da conta, como as demais escritas."""
+        atual = historico._transacoes
+        if quantidade is None:
+            quantidade = len(atual) - self.max_recentes // 2
+        quantidade = min(quantidade, len(atual) - 1)  # o registro mais novo fica sempre na memória
+        if quantidade <= 0:
+            return 0
+        arquivados = getattr(atual, "arquivados", 0)
+        segmentos = list(getattr(atual, "segmentos", ()))
+        for k in range(0, quantidade, self.tamanho_segmento):
+            bloco = atual[k:min(k + self.tamanho_segmento, quantidade)]
+            dados = zlib.compress(json.dumps(bloco, separators=(",", ":"), ensure_ascii=False).encode())
+            arquivo, offset = self._escrever(dados)
+            segmentos.append(Segmento(arquivo, offset, len(dados), arquivados + k, len(bloco),
+                                      bloco[0]["data"], bloco[-1]["data"]))
+        # Publica a nova camada quente de uma vez: leitores sem trava veem a antiga ou a nova
+        historico._transacoes = Recentes(atual[quantidade:], arquivados + quantidade, tuple(segmentos))
+        return quantidade
+
+    def selar_antigos(self, historico: Any, hoje: Optional[Union[date, datetime]] = None) -> int:
+        """Sela os registros com mais de `janela_dias` (rotina periódica)."""
+        limite = ((hoje or datetime.now()) - timedelta(days=self.janela_dias)).strftime("%Y-%m-%d")
+        atual = historico._transacoes
+        quantidade = 0
+        for registro in atual:
+            if registro["data"] >= limite:
+                break
+            quantidade += 1
+        return self.selar(historico, quantidade) if quantidade else 0
+
+    def selar_contas(self, contas: Sequence[Any], hoje: Optional[Union[date, datetime]] = None) -> Dict[str, int]:
+        """Aplica `selar_antigos` a cada conta, sob a trava da conta. Históricos
+        criados sem esta camada fria (antes de ligá-la) ficam como estão."""
+        total = 0
+        for conta in contas:
+            if conta.historico._frio is not self:
+                continue
+            with conta.lock:
+                total += self.selar_antigos(conta.historico, hoje)
+        return {"contas": len(contas), "selados": total}
+
+    # ---------- Leitura ----------
+    def ler(self, seg: Segmento) -> List[Dict[str, Any]]:
+        chave = (seg.arquivo, seg.offset)
+        with self._lock:
+            registros = self._cache.get(chave)
+            if registros is not None:
+                self._cache.move_to_end(chave)
+                return registros
+        with open(seg.arquivo, "rb") as f:
+            f.seek(seg.offset)
+            registros = json.loads(zlib.decompress(f.read(seg.tamanho)))
+        with self._lock:
+            self._cache[chave] = registros
+            if len(self._cache) > self.cache_segmentos:
+                self._cache.popitem(last=False)
+        return registros
+
+_ABERTOS: Dict[str, ArquivoHistorico] = {}
+_ABERTOS_LOCK = threading.Lock()
+
+def abrir(diretorio: str, *args: Any, **kwargs: Any) -> ArquivoHistorico:
+    """Um ArquivoHistorico por diretório no processo: quem escreve nos arquivos
+    de um prefixo é sempre a mesma instância."""
+    chave = os.path.abspath(diretorio)
+    with _ABERTOS_LOCK:
+        arquivo = _ABERTOS.get(chave)
+        if arquivo is None:
+            arquivo = _ABERTOS[chave] = ArquivoHistorico(diretorio, *args, **kwargs)
+        return arquivo
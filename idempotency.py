@@ -0,0 +1,110 @@
+from __future__ import annotations
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+class EmAndamento(Exception):
+    """A primeira execução com a mesma chave não terminou dentro do prazo de espera."""
+
+class ChaveReutilizada(Exception):
+    """A chave já foi usada com uma requisição diferente."""
+
+class Lotado(Exception):
+    """Capacidade esgotada só com execuções em andamento, que não podem ser descartadas."""
+
+class _Entrada:
+    __slots__ = ("evento", "resposta", "concluida", "expira_em", "assinatura")
+
+    def __init__(self, assinatura: Optional[str]) -> None:
+        self.evento = threading.Event()
+        self.resposta: Any = None
+        self.concluida = False
+        self.expira_em = float("inf")
+        self.assinatura = assinatura
+
+class IdempotencyStore:
+    """Cache limitado de respostas por chave de idempotência.
+    - Respostas concluídas ficam disponíveis por `ttl` segundos (replay em O(1)).
+    - Enquanto a primeira execução está em andamento, duplicatas esperam por ela.
+    - Acima de `capacidade`, as respostas concluídas mais antigas são
+      descartadas. Execuções em andamento nunca são: se ocupam toda a
+      capacidade, chaves novas são recusadas (Lotado) até alguma terminar.
+    Falhas (exceções) não são armazenadas: a próxima tentativa executa de novo.
+    """
+
+    def __init__(self, capacidade: int = 10_000, ttl: float = 24 * 3600,
+                 relogio: Callable[[], float] = time.monotonic) -> None:
+        self.capacidade = capacidade
+        self.ttl = ttl
+        self._relogio = relogio
+        self._em_andamento: Dict[str, _Entrada] = {}
+        # Em ordem de conclusão, que é a ordem de expiração (TTL fixo)
+        self._concluidas: "OrderedDict[str, _Entrada]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._em_andamento) + len(self._concluidas)
+
+    def _expirar(self, agora: float) -> None:
+        concluidas = self._concluidas
+        while concluidas and next(iter(concluidas.values())).expira_em <= agora:
+            concluidas.popitem(last=False)
+
+    def _abrir_espaco(self, chave: str) -> None:
+        while len(self) >= self.capacidade:
+            if not self._concluidas:
+                raise Lotado(chave)
+            self._concluidas.popitem(last=False)
+
+    def executar(self, chave: str, fn: Callable[[], Any], assinatura: Optional[str] = None,
+                 espera: float = 30.0) -> Any:
+        """Executa `fn` uma única vez por chave e devolve a resposta armazenada
+        nas repetições. `assinatura` identifica o conteúdo da requisição; reusar
+        a chave com outra assinatura lança ChaveReutilizada; com a capacidade
+        ocupada só por execuções em andamento, uma chave nova lança Lotado.
+        """
+        while True:
+            with self._lock:
+                self._expirar(self._relogio())
+                entrada = self._em_andamento.get(chave) or self._concluidas.get(chave)
+                dono = entrada is None
+                if dono:
+                    self._abrir_espaco(chave)
+                    entrada = _Entrada(assinatura)
+                    self._em_andamento[chave] = entrada
+            assert entrada is not None
+
+            if dono:
+                return self._executar_como_dono(chave, entrada, fn)
+
+            if assinatura is not None and entrada.assinatura not in (None, assinatura):
+                raise ChaveReutilizada(chave)
+            if not entrada.concluida and not entrada.evento.wait(espera):
+                raise EmAndamento(chave)
+            if entrada.concluida:
+                return entrada.resposta
+            # A primeira execução falhou: esta tentativa passa a executar
+
+    def esquecer(self, chave: str) -> None:
+        """Descarta a resposta armazenada da chave (ex.: o efeito dela não foi
+        persistido); a próxima requisição com a chave executa de novo."""
+        with self._lock:
+            self._concluidas.pop(chave, None)
+
+    def _executar_como_dono(self, chave: str, entrada: _Entrada, fn: Callable[[], Any]) -> Any:
+        try:
+            resposta = fn()
+        except BaseException:
+            with self._lock:
+                del self._em_andamento[chave]
+            entrada.evento.set()
+            raise
+        with self._lock:
+            entrada.resposta = resposta
+            entrada.concluida = True
+            entrada.expira_em = self._relogio() + self.ttl
+            del self._em_andamento[chave]
+            self._concluidas[chave] = entrada
+        entrada.evento.set()
+        return resposta
@@ -0,0 +1,86 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+# NumPy é opcional: sem ele o acúmulo usa um laço Python equivalente
+try:
+    import numpy as np  # type: ignore
+except Exception:
+    np = None  # type: ignore
+
+import banco
+from banco import ContaPoupanca, Juros
+
+class CarteiraPoupanca:
+    """Conjunto de contas poupança que acumulam juros diários em lote.
+
+    O acúmulo copia saldos e taxas das contas para arrays NumPy contíguos e
+    calcula os juros de todas as contas numa única passada vetorizada, que
+    seleciona as contas a creditar. Os juros de cada uma são então refeitos
+    sob a trava da conta, sobre o saldo daquele momento, e creditados nela.
+    """
+
+    def __init__(self, contas: Optional[Sequence[ContaPoupanca]] = None) -> None:
+        # Qualquer sequência com append/remove (ex.: contas de um snapshot mapeado)
+        self._contas: List[ContaPoupanca] = contas if contas is not None else []  # type: ignore[assignment]
+
+    def __len__(self) -> int:
+        return len(self._contas)
+
+    def adicionar(self, conta: ContaPoupanca) -> None:
+        self._contas.append(conta)
+
+    def remover(self, conta: ContaPoupanca) -> None:
+        if conta in self._contas:
+            self._contas.remove(conta)
+
+    def _calcular_juros(self, contas: Optional[Sequence[ContaPoupanca]] = None) -> List[tuple]:
+        """[(índice da conta, juros)] para as contas com juros a creditar."""
+        contas = self._contas if contas is None else contas
+        n = len(contas)
+        if np is None:
+            resultado = []
+            for i, conta in enumerate(contas):
+                juros = round(conta._saldo * conta.taxa_diaria, 2) if conta._saldo > 0 else 0.0
+                if juros > 0:
+                    resultado.append((i, juros))
+            return resultado
+        saldos = np.fromiter((c._saldo for c in contas), dtype=np.float64, count=n)
+        taxas = np.fromiter((c.taxa_diaria for c in contas), dtype=np.float64, count=n)
+        juros = np.round(np.where(saldos > 0, saldos * taxas, 0.0), 2)
+        indices = np.flatnonzero(juros > 0)
+        return list(zip(indices.tolist(), juros[indices].tolist()))
+
+    def acumular(self, momento: Optional[datetime] = None) -> Dict[str, Any]:
+        """Credita os juros do dia em todas as contas da carteira."""
+        data = (momento or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+        # Sequências mapeadas são percorridas uma única vez (materializando as contas)
+        contas = self._contas if isinstance(self._contas, list) else list(self._contas)
+        creditadas = 0
+        total = 0.0
+        for i, _ in self._calcular_juros(contas):
+            conta = contas[i]
+            with conta.lock:
+                # O saldo pode ter mudado desde a passada vetorizada
+                juros = round(conta._saldo * conta.taxa_diaria, 2) if conta._saldo > 0 else 0.0
+                if juros <= 0:
+                    continue
+                conta._saldo += juros
+                conta.historico._anexar("Juros", juros, data, conta._saldo)
+                conta._publicar()
+            if banco._OBSERVADORES:
+                banco._notificar(conta, "Juros", juros)
+            creditadas += 1
+            total += juros
+        return {"contas": len(self._contas), "creditadas": creditadas, "total": round(total, 2)}
+
+def acumular_por_objeto(contas: List[ContaPoupanca]) -> Dict[str, Any]:
+    """Acúmulo conta a conta via Transacao Juros (referência para comparação)."""
+    creditadas = 0
+    total = 0.0
+    for conta in contas:
+        juros = round(conta.saldo * conta.taxa_diaria, 2) if conta.saldo > 0 else 0.0
+        if juros > 0 and Juros(juros).registrar(conta):
+            creditadas += 1
+            total += juros
+    return {"contas": len(contas), "creditadas": creditadas, "total": round(total, 2)}
@@ -0,0 +1,68 @@
+from __future__ import annotations
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Tuple
+
+class _Balde:
+    __slots__ = ("fichas", "atualizado")
+
+    def __init__(self, fichas: float, atualizado: float) -> None:
+        self.fichas = fichas
+        self.atualizado = atualizado
+
+class RateLimiter:
+    """Token bucket por chave (CPF, sessão...): `capacidade` fichas, repostas a
+    `taxa` fichas por segundo. Cada verificação é O(1) e cada chave ativa ocupa
+    um balde de dois números.
+
+    Baldes sem uso há mais tempo que o necessário para encherem de novo são
+    descartados (em ordem LRU): recriá-lo cheio dá o mesmo resultado, então a
+    memória acompanha apenas as chaves ativas. `max_chaves` é um teto duro.
+    """
+
+    def __init__(self, capacidade: float, taxa: float, max_chaves: int = 100_000,
+                 relogio: Callable[[], float] = time.monotonic) -> None:
+        self.capacidade = float(capacidade)
+        self.taxa = float(taxa)
+        self.max_chaves = max_chaves
+        self.ociosidade = self.capacidade / self.taxa if self.taxa > 0 else math.inf
+        self._relogio = relogio
+        self._baldes: "OrderedDict[Hashable, _Balde]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._baldes)
+
+    def _despejar(self, agora: float) -> None:
+        while self._baldes:
+            balde = next(iter(self._baldes.values()))
+            if len(self._baldes) <= self.max_chaves and agora - balde.atualizado < self.ociosidade:
+                break
+            self._baldes.popitem(last=False)
+
+    def permitir(self, chave: Hashable, custo: float = 1.0) -> Tuple[bool, float]:
+        """Consome `custo` fichas da chave. Retorna (permitido, segundos até haver fichas)."""
+        with self._lock:
+            agora = self._relogio()
+            balde = self._baldes.get(chave)
+            if balde is None:
+                self._despejar(agora)
+                balde = _Balde(self.capacidade, agora)
+                self._baldes[chave] = balde
+            else:
+                balde.fichas = min(self.capacidade, balde.fichas + (agora - balde.atualizado) * self.taxa)
+                balde.atualizado = agora
+                self._baldes.move_to_end(chave)
+
+            if balde.fichas >= custo:
+                balde.fichas -= custo
+                return True, 0.0
+            espera = (custo - balde.fichas) / self.taxa if self.taxa > 0 else math.inf
+            return False, espera
+
+def parse_limite(texto: str) -> Tuple[float, float]:
+    """Converte "capacidade/taxa_por_segundo" (ex.: "20/5") em números."""
+    capacidade, taxa = texto.split("/", 1)
+    return float(capacidade), float(taxa)
@@ -0,0 +1,146 @@
+from __future__ import annotations
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from bank_service import help_text
+
+FECHADO, ABERTO, MEIO_ABERTO = "fechado", "aberto", "meio_aberto"
+
+# Respostas locais por palavra-chave, usadas quando o modelo não responde a tempo
+FAQ = (
+    (("horário", "horario", "atendimento"), "O banco virtual funciona 24 horas por dia pelos comandos do chat."),
+    (("senha", "acesso", "token"), "O acesso é feito com CPF e senha em /auth/token; depois use /login <cpf>."),
+    (("emprést", "emprest", "parcela", "juros"),
+     "Use /simular_emprestimo <valor> <parcelas> <taxa> para ver as condições e "
+     "/contratar_emprestimo com os mesmos valores para contratar."),
+    (("transfer", "pix"), "Use /transferir <conta> <valor> para transferir entre contas."),
+    (("conta", "abrir"), "Use /nova_conta (corrente) ou /nova_conta poupanca depois do /login."),
+)
+
+def resposta_local(mensagem: str) -> str:
+    """Resposta instantânea sem LLM: FAQ por palavra-chave ou o texto de ajuda."""
+    texto = mensagem.lower()
+    for chaves, resposta in FAQ:
+        if any(chave in texto for chave in chaves):
+            return f"{resposta}\n(Assistente indisponível no momento; resposta automática.)"
+    return f"Assistente indisponível no momento. Comandos disponíveis:\n{help_text()}"
+
+class CircuitBreaker:
+    """Disjuntor para um serviço externo.
+
+    Fechado: as chamadas passam; `max_falhas` falhas consecutivas (erro,
+    estouro de prazo ou resposta mais lenta que `limiar_lento`) abrem o
+    circuito. Aberto: as chamadas são recusadas na hora por `reabertura`
+    segundos. Depois disso, meio aberto: uma única chamada de teste passa;
+    sucesso fecha o circuito e falha o abre de novo.
+    """
+
+    def __init__(self, max_falhas: int = 5, limiar_lento: float = 5.0, reabertura: float = 30.0,
+                 relogio: Callable[[], float] = time.monotonic) -> None:
+        self.max_falhas = max_falhas
+        self.limiar_lento = limiar_lento
+        self.reabertura = reabertura
+        self._relogio = relogio
+        self._lock = threading.Lock()
+        self._estado = FECHADO
+        self._falhas = 0
+        self._aberto_em = 0.0
+        self._teste_em_andamento = False
+
+    @property
+    def estado(self) -> str:
+        with self._lock:
+            if self._estado == ABERTO and self._relogio() - self._aberto_em >= self.reabertura:
+                return MEIO_ABERTO
+            return self._estado
+
+    def permitir(self) -> bool:
+        """True se a chamada pode seguir (no meio aberto, só a primeira)."""
+        with self._lock:
+            if self._estado == FECHADO:
+                return True
+            if self._estado == ABERTO:
+                if self._relogio() - self._aberto_em < self.reabertura:
+                    return False
+                self._estado = MEIO_ABERTO
+            if self._teste_em_andamento:
+                return False
+            self._teste_em_andamento = True
+            return True
+
+    def registrar(self, sucesso: bool, duracao: float = 0.0) -> None:
+        """Resultado de uma chamada permitida; respostas lentas contam como falha."""
+        with self._lock:
+            self._teste_em_andamento = False
+            if sucesso and duracao <= self.limiar_lento:
+                self._estado = FECHADO
+                self._falhas = 0
+                return
+            self._falhas += 1
+            if self._estado == MEIO_ABERTO or self._falhas >= self.max_falhas:
+                self._estado = ABERTO
+                self._aberto_em = self._relogio()
+
+@dataclass
+class RespostaModelo:
+    texto: str
+    origem: str  # "modelo" ou "local"
+    motivo: Optional[str] = None  # por que caiu na resposta local: timeout, erro ou circuito_aberto
+    erro: Optional[str] = None
+
+    @property
+    def do_modelo(self) -> bool:
+        return self.origem == "modelo"
+
+class ModeloResiliente:
+    """Envolve um modelo com `generate_content` (Gemini) com prazo por chamada e disjuntor.
+
+    A chamada roda num pool próprio e o chamador espera no máximo `prazo`
+    segundos; uma chamada que estoura o prazo continua ocupando sua thread até
+    o modelo responder, por isso o pool é limitado e o disjuntor, ao abrir,
+    para de enviar novas chamadas. Qualquer falha devolve `resposta_local`.
+    """
+
+    def __init__(self, modelo: Any, prazo: float = 10.0, breaker: Optional[CircuitBreaker] = None,
+                 max_chamadas: int = 8) -> None:
+        self.modelo = modelo
+        self.prazo = prazo
+        self.breaker = breaker or CircuitBreaker(limiar_lento=prazo / 2)
+        self._pool = ThreadPoolExecutor(max_workers=max_chamadas, thread_name_prefix="llm")
+
+    @classmethod
+    def do_ambiente(cls, modelo: Any) -> "ModeloResiliente":
+        """GEMINI_TIMEOUT_SECONDS, GEMINI_CB_FALHAS, GEMINI_CB_LENTO_SECONDS e
+        GEMINI_CB_REABERTURA_SECONDS ajustam prazo e disjuntor."""
+        prazo = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "10"))
+        return cls(modelo, prazo=prazo, breaker=CircuitBreaker(
+            max_falhas=int(os.getenv("GEMINI_CB_FALHAS", "5")),
+            limiar_lento=float(os.getenv("GEMINI_CB_LENTO_SECONDS", str(prazo / 2))),
+            reabertura=float(os.getenv("GEMINI_CB_REABERTURA_SECONDS", "30")),
+        ))
+
+    def gerar(self, conteudo: Any, mensagem: Optional[str] = None) -> RespostaModelo:
+        """Chama o modelo com `conteudo` (prompt ou histórico); `mensagem` orienta a resposta local."""
+        local = mensagem if mensagem is not None else str(conteudo)
+        if not self.breaker.permitir():
+            return RespostaModelo(resposta_local(local), "local", "circuito_aberto")
+        inicio = time.monotonic()
+        futuro = self._pool.submit(self.modelo.generate_content, conteudo)
+        try:
+            resp = futuro.result(timeout=self.prazo)
+        except FuturesTimeout:
+            futuro.cancel()
+            self.breaker.registrar(False, time.monotonic() - inicio)
+            return RespostaModelo(resposta_local(local), "local", "timeout")
+        except Exception as exc:
+            self.breaker.registrar(False, time.monotonic() - inicio)
+            return RespostaModelo(resposta_local(local), "local", "erro", erro=str(exc))
+        self.breaker.registrar(True, time.monotonic() - inicio)
+        return RespostaModelo(getattr(resp, "text", str(resp)), "modelo")
+
+    def encerrar(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -1,15 +1,26 @@
 from __future__ import annotations
+import asyncio
+import hmac
+import math
 import os
+import time
 import uuid
-from typing import Any, Dict, Optional
-
-from fastapi import FastAPI, HTTPException, Header, Depends
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException, Header, Depends, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from jose import JWTError, jwt  # type: ignore
 from passlib.context import CryptContext  # type: ignore
 from fastapi.security import OAuth2PasswordBearer
+from starlette.concurrency import run_in_threadpool
+from anyio import from_thread
 
 # .env
 try:
@@ -24,7 +35,20 @@ try:
 except Exception:
     genai = None  # type: ignore
 
-from bank_service import BankApp, help_text
+from bank_service import CPF_JA_CADASTRADO, BankApp, Resultado, help_text
+from agregados import AGREGADOS
+from agendador import Agendador, Agendamento, definir_agendador, executar_agendamento
+from statement_export import FORMATOS as FORMATOS_EXTRATO, gerar_extrato
+from idempotency import ChaveReutilizada, EmAndamento, IdempotencyStore, Lotado
+from actors import SistemaAtores
+from rate_limit import RateLimiter, parse_limite
+from stores import criar_stores
+from anomalias import DetectorAnomalias
+from static_assets import AssetsEstaticos
+from traces import ARGS_CHAT, GravadorTrace
+from resiliencia_llm import ModeloResiliente
+from historico_frio import ArquivoHistorico
+from banco import definir_arquivo_historico
 
 def _get_api_key() -> Optional[str]:
     return os.getenv("GEMINI_API_KEY")
@@ -51,10 +75,207 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Sessões simples em memória (apenas demo)
-SESSIONS: Dict[str, BankApp] = {}
+# Usuários de acesso ({cpf: {"hashed_password": str}}) e sessões (BankApp por sessão).
+# BANCO_STORE=memory (padrão) mantém tudo no processo; BANCO_STORE=sqlite
+# compartilha entre workers do mesmo host (uvicorn --workers N). Só usuários e
+# sessões são compartilhados: Idempotency-Key, limites de taxa e atores
+# continuam por worker (ver stores.SQLiteSessionStore).
+USERS, SESSIONS = criar_stores()
 MODEL = _setup_gemini()
-USERS: Dict[str, Dict[str, str]] = {}  # {cpf: {"hashed_password": str}}
+# Chamadas ao modelo com prazo e disjuntor; falhas caem numa resposta local imediata
+LLM = ModeloResiliente.do_ambiente(MODEL) if MODEL is not None else None
+
+# Sessões usadas pela requisição atual ({sid: (versão carregada, BankApp)}),
+# persistidas ao final por _persistir_sessoes, e as Idempotency-Keys que ela
+# executou (esquecidas se a gravação da sessão for recusada)
+_SESSOES_USADAS: ContextVar[Optional[Dict[str, Tuple[int, BankApp]]]] = ContextVar("sessoes_usadas", default=None)
+_CHAVES_EXECUTADAS: ContextVar[Optional[List[str]]] = ContextVar("chaves_executadas", default=None)
+
+# Respostas de operações com Idempotency-Key (repetições do gateway não reexecutam).
+# O cache é do processo: com vários workers, uma repetição atendida por outro
+# worker executa de novo.
+IDEMPOTENCY = IdempotencyStore(
+    capacidade=int(os.getenv("IDEMPOTENCY_CAPACITY", "10000")),
+    ttl=float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400")),
+)
+
+# Modo de execução das operações de conta:
+# - "threadpool" (padrão): cada requisição roda no pool de threads do servidor
+# - "actor": cada conta ativa tem um ator asyncio que serializa suas operações
+EXEC_MODE = os.getenv("BANCO_EXEC_MODE", "threadpool").lower()
+ATORES: Optional[SistemaAtores] = (
+    SistemaAtores(ociosidade=float(os.getenv("BANCO_ACTOR_IDLE_SECONDS", "60")))
+    if EXEC_MODE == "actor" else None
+)
+
+# Detecção de anomalias em streaming (alertas vão para o logger "banco.anomalias")
+DETECTOR = DetectorAnomalias().conectar() if os.getenv("BANCO_ANOMALIAS", "0") == "1" else None
+
+# Camada fria dos históricos (BANCO_HISTORICO_FRIO=<diretório>): transações fora
+# da janela quente vão para segmentos comprimidos em disco
+HISTORICO_FRIO = ArquivoHistorico.do_ambiente()
+definir_arquivo_historico(HISTORICO_FRIO)
+
+# Com store compartilhado, requisições e agendamentos de uma mesma sessão
+# rodam um de cada vez no processo. As travas (uma por sessão em uso, com
+# contagem de usuários) são asyncio.Lock do event loop: quem espera não ocupa
+# uma thread do pool do servidor. Só o event loop mexe no dict.
+_TRAVAS_SESSAO: Dict[str, Tuple[asyncio.Lock, int]] = {}
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+async def _travar_sessao(sid: str) -> None:
+    trava, usos = _TRAVAS_SESSAO.get(sid) or (asyncio.Lock(), 0)
+    _TRAVAS_SESSAO[sid] = (trava, usos + 1)
+    try:
+        await trava.acquire()
+    except BaseException:
+        _soltar_sessao(sid, liberar=False)
+        raise
+
+def _soltar_sessao(sid: str, liberar: bool = True) -> None:
+    trava, usos = _TRAVAS_SESSAO[sid]
+    if liberar:
+        trava.release()
+    if usos == 1:
+        del _TRAVAS_SESSAO[sid]
+    else:
+        _TRAVAS_SESSAO[sid] = (trava, usos - 1)
+
+@asynccontextmanager
+async def _trava_sessao(sid: str) -> AsyncIterator[None]:
+    await _travar_sessao(sid)
+    try:
+        yield
+    finally:
+        _soltar_sessao(sid)
+
+@contextmanager
+def _trava_sessao_thread(sid: str) -> Iterator[None]:
+    """A mesma trava, tomada de uma thread fora do pool do servidor (agendador,
+    asyncio.to_thread). Antes do startup não há requisições a excluir."""
+    loop = _LOOP
+    if loop is None:
+        yield
+        return
+    asyncio.run_coroutine_threadsafe(_travar_sessao(sid), loop).result()
+    try:
+        yield
+    finally:
+        loop.call_soon_threadsafe(_soltar_sessao, sid)
+
+# Agendamentos (transferências, depósitos, saques e parcelas futuros/recorrentes),
+# disparados por uma thread do processo; BANCO_AGENDADOR=0 desliga o disparo
+def _executar_agendado(ag: Agendamento) -> bool:
+    """Com sessões compartilhadas, a conta vem da versão atual da sessão, sob a
+    trava da sessão, e a gravação só vale se ninguém (outro worker) gravou
+    depois da carga; senão a execução é refeita sobre a versão nova."""
+    if not SESSIONS.compartilhado or ag.origem is None:
+        return executar_agendamento(ag)
+    with _trava_sessao_thread(ag.origem):
+        for _ in range(3):
+            carregada = SESSIONS.carregar(ag.origem)
+            if carregada is None:
+                return False
+            versao, bank = carregada
+            conta = bank._conta_por_numero(ag.conta.numero)
+            if conta is None:
+                return False
+            destino = bank._conta_por_numero(ag.destino.numero) if ag.destino is not None else None
+            ok = executar_agendamento(ag, conta, destino)
+            if SESSIONS.salvar(ag.origem, bank, versao=versao):
+                return ok
+    return False
+
+def _juros_da_sessao(sid: str, momento: Optional[datetime]) -> Optional[Dict[str, Any]]:
+    """Como em _executar_agendado: grava só sobre a versão carregada; se outro
+    worker gravou antes, recalcula sobre a versão nova."""
+    with _trava_sessao_thread(sid):
+        for _ in range(3):
+            carregada = SESSIONS.carregar(sid)
+            if carregada is None:
+                return None
+            versao, bank = carregada
+            if not len(bank.poupancas):
+                return None
+            r = bank.acumular_juros_poupanca(momento)
+            if r["repetido"] or SESSIONS.salvar(sid, bank, versao=versao):
+                return r
+            SESSIONS.descartar(sid, bank)
+    return None
+
+def acumular_juros_sessoes(momento: Optional[datetime] = None) -> Dict[str, Any]:
+    """Juros do dia nas poupanças de todas as sessões (uma vez por dia em cada
+    sessão, mesmo com vários workers: ver BankApp.acumular_juros_poupanca)."""
+    totais: Dict[str, Any] = {"sessoes": 0, "contas": 0, "creditadas": 0, "total": 0.0}
+    for sid in SESSIONS.sids():
+        r = _juros_da_sessao(sid, momento)
+        if r is None:
+            continue
+        totais["sessoes"] += 1
+        totais["contas"] += r["contas"]
+        totais["creditadas"] += r["creditadas"]
+        totais["total"] = round(totais["total"] + r["total"], 2)
+    return totais
+
+def _selar_sessao(sid: str, hoje: Optional[datetime]) -> Optional[Dict[str, int]]:
+    """Como em _juros_da_sessao: sela sobre a versão carregada e só grava se
+    ninguém gravou depois (segmentos de uma tentativa refeita ficam órfãos no log)."""
+    with _trava_sessao_thread(sid):
+        for _ in range(3):
+            carregada = SESSIONS.carregar(sid)
+            if carregada is None:
+                return None
+            versao, bank = carregada
+            r = HISTORICO_FRIO.selar_contas(bank.contas, hoje)
+            if not r["selados"] or SESSIONS.salvar(sid, bank, versao=versao):
+                return r
+            SESSIONS.descartar(sid, bank)
+    return None
+
+def selar_historicos_sessoes(hoje: Optional[datetime] = None) -> Dict[str, int]:
+    """Sela na camada fria as transações fora da janela quente
+    (BANCO_HISTORICO_JANELA_DIAS) em todas as sessões."""
+    totais = {"sessoes": 0, "contas": 0, "selados": 0}
+    for sid in SESSIONS.sids():
+        r = _selar_sessao(sid, hoje)
+        if r is None:
+            continue
+        totais["sessoes"] += 1
+        totais["contas"] += r["contas"]
+        totais["selados"] += r["selados"]
+    return totais
+
+AGENDADOR = Agendador.do_ambiente(executar=_executar_agendado)
+definir_agendador(AGENDADOR)
+# Juros das poupanças: todo dia à meia-noite
+AGENDADOR.rotina(
+    acumular_juros_sessoes,
+    datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1),
+    "diaria",
+)
+# Camada fria dos históricos: todo dia às 3h, sela o que saiu da janela quente
+if HISTORICO_FRIO is not None:
+    AGENDADOR.rotina(
+        selar_historicos_sessoes,
+        datetime.now().replace(hour=3, minute=0, second=0, microsecond=0) + timedelta(days=1),
+        "diaria",
+    )
+
+@app.on_event("startup")
+async def _iniciar_agendador() -> None:
+    global _LOOP
+    _LOOP = asyncio.get_running_loop()
+    if os.getenv("BANCO_AGENDADOR", "1") != "0":
+        AGENDADOR.iniciar()
+
+@app.on_event("shutdown")
+def _encerrar_agendador() -> None:
+    AGENDADOR.encerrar()
+
+# Gravação opcional de traces anonimizados das operações (BANCO_TRACE=<arquivo>),
+# para replay com `python traces.py <arquivo>`
+TRACE = GravadorTrace.do_ambiente()
+_TRACE_ATUAL: ContextVar[Optional[Dict[str, Any]]] = ContextVar("trace_atual", default=None)
 
 # Auth/JWT config
 SECRET_KEY = os.getenv("JWT_SECRET", "dev-secret-change-me")
@@ -63,6 +284,12 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRE_MINUTES", "60"))
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
+# Provisionamento em lote: PBKDF2 (hashlib) libera o GIL, então threads usam todos os núcleos
+BULK_MAX_USUARIOS = int(os.getenv("BULK_MAX_USUARIOS", "10000"))
+_HASH_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("BULK_HASH_WORKERS", str(os.cpu_count() or 1))), thread_name_prefix="hash"
+)
+
 class NewUser(BaseModel):
     nome: str
     cpf: str
@@ -72,24 +299,123 @@ class NewUser(BaseModel):
 class Amount(BaseModel):
     valor: float
 
+class TransferenciaIn(BaseModel):
+    numero_destino: int
+    valor: float
+
 class Loan(BaseModel):
     valor: float
     parcelas: int
     taxa: float
 
+class UsuarioLote(NewUser):
+    cpf: str = Field(min_length=1)
+    password: str = Field(min_length=1)
+
+class LoteUsuarios(BaseModel):
+    usuarios: List[UsuarioLote]
+
+class ResultadoOut(BaseModel):
+    """Resposta estruturada das operações bancárias (ver bank_service.Resultado)."""
+    operacao: str
+    status: str
+    saldo: Optional[float] = None
+    transacao_id: Optional[str] = None
+    codigo_erro: Optional[str] = None
+    dados: Dict[str, Any] = {}
+
+class UsuarioCriadoOut(ResultadoOut):
+    sessionId: Optional[str] = None
+
+class LoteUsuariosOut(BaseModel):
+    sessionId: str
+    criados: int
+    rejeitados: int
+    resultados: List[ResultadoOut]
+
+class AgendamentoIn(BaseModel):
+    tipo: str  # deposito, saque, transferencia ou parcela
+    valor: float = 0.0
+    quando: datetime
+    periodicidade: Optional[str] = None  # diaria, semanal ou mensal
+    vezes: Optional[int] = None
+    numero_destino: Optional[int] = None
+
 class ChatMsg(BaseModel):
     message: str
     
 class ContaId(BaseModel):
     numero: int
 
+def _usar_sessao(sid: str, versao: int, bank: BankApp) -> BankApp:
+    usadas = _SESSOES_USADAS.get()
+    if usadas is not None and SESSIONS.compartilhado:
+        usadas[sid] = (versao, bank)
+    return bank
+
+def _rastrear(op: str, sid: Optional[str], **params: Any) -> None:
+    """Anota a operação da requisição atual para o trace (sem efeito se desligado)."""
+    atual = _TRACE_ATUAL.get()
+    if atual is not None:
+        atual.update(op=op, sid=sid, params=params)
+
 def _get_bank(session_id: Optional[str]) -> BankApp:
-    if not session_id or session_id not in SESSIONS:
+    carregada = SESSIONS.carregar(session_id) if session_id else None
+    sid = session_id
+    if carregada is None:
         # cria nova sessão
         sid = session_id or str(uuid.uuid4())
         SESSIONS[sid] = BankApp()
-        return SESSIONS[sid]
-    return SESSIONS[session_id]
+        carregada = SESSIONS.carregar(sid)
+        assert carregada is not None
+    versao, bank = carregada
+    return _usar_sessao(sid, versao, bank)
+
+def _idempotente(chave: Optional[str], escopo: str, fn: Callable[[], Any], assinatura: Optional[str] = None) -> Any:
+    """Executa `fn` uma única vez por `Idempotency-Key` (dentro do escopo usuário/sessão/rota)."""
+    if not chave:
+        return fn()
+    executadas = _CHAVES_EXECUTADAS.get()
+    if executadas is not None:
+        executadas.append(f"{escopo}:{chave}")
+    try:
+        return IDEMPOTENCY.executar(f"{escopo}:{chave}", fn, assinatura)
+    except ChaveReutilizada:
+        raise HTTPException(422, "Idempotency-Key já utilizada com outra requisição")
+    except EmAndamento:
+        raise HTTPException(409, "Requisição com a mesma Idempotency-Key ainda em andamento")
+    except Lotado:
+        raise HTTPException(503, "Muitas requisições com Idempotency-Key em andamento; tente novamente")
+
+def _alvo_ator(bank: BankApp, sid: Optional[str]) -> Any:
+    """Chave do ator: (sessão, número da conta logada). Com store compartilhado
+    cada requisição carrega objetos Conta novos, então a chave não pode ser o
+    objeto; sem sessão informada, o banco é novo e só esta requisição o vê."""
+    if not sid:
+        return bank
+    conta = bank.conta_logada()
+    return (sid, conta.numero if conta is not None else None)
+
+async def _operacao_conta(bank: BankApp, sid: Optional[str], fn: Callable[[], Any], chave: Optional[str],
+                          escopo: str, assinatura: Optional[str] = None) -> Any:
+    """Executa uma operação de conta no modo configurado, respeitando a Idempotency-Key."""
+    if ATORES is None:
+        return await run_in_threadpool(_idempotente, chave, escopo, fn, assinatura)
+    atores = ATORES
+    alvo = _alvo_ator(bank, sid)
+    if not chave:
+        return await atores.executar(alvo, fn)
+    # A espera por duplicatas em andamento bloqueia: fica no pool de threads,
+    # e a execução em si volta ao ator da conta no event loop.
+    return await run_in_threadpool(
+        _idempotente, chave, escopo, lambda: from_thread.run(atores.executar, alvo, fn), assinatura
+    )
+
+def _operacao_conta_sincrona(bank: BankApp, sid: Optional[str], fn: Callable[[], Any]) -> Any:
+    """Como `_operacao_conta` (sem Idempotency-Key), para rotas que já rodam no pool de threads."""
+    if ATORES is None:
+        return fn()
+    return from_thread.run(ATORES.executar, _alvo_ator(bank, sid), fn)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -117,6 +443,40 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> str:
     except JWTError:
         raise HTTPException(401, "Token inválido/expirado")
 
+# Admissão por token bucket, por CPF autenticado e por sessão, com orçamento
+# separado por classe de rota ("capacidade/fichas_por_segundo", via env)
+LIMITES: Dict[str, RateLimiter] = {
+    classe: RateLimiter(*parse_limite(os.getenv(f"RATE_LIMIT_{classe.upper()}", padrao)))
+    for classe, padrao in (("llm", "5/0.2"), ("mutacao", "30/5"), ("leitura", "60/20"))
+}
+
+def _cobrar(classe: str, current_user: str, x_session_id: Optional[str]) -> None:
+    """Consome uma ficha da classe para o CPF e a sessão; sem fichas, 429."""
+    limitador = LIMITES[classe]
+    chaves = [("cpf", current_user)] + ([("sid", x_session_id)] if x_session_id else [])
+    for chave in chaves:
+        permitido, espera = limitador.permitir(chave)
+        if not permitido:
+            raise HTTPException(429, "Muitas requisições. Tente novamente em instantes.",
+                                headers={"Retry-After": str(max(1, math.ceil(espera)))})
+
+def limitar(classe: str) -> Callable[..., str]:
+    """Dependência que autentica (get_current_user) e aplica o limite da classe."""
+    def dependencia(x_session_id: Optional[str] = Header(None), current_user: str = Depends(get_current_user)) -> str:
+        _cobrar(classe, current_user, x_session_id)
+        return current_user
+
+    return dependencia
+
+def exigir_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Rotas administrativas exigem o cabeçalho X-Admin-Token igual a BANCO_ADMIN_TOKEN
+    (sem a variável configurada, ficam desabilitadas)."""
+    esperado = os.getenv("BANCO_ADMIN_TOKEN")
+    if not esperado:
+        raise HTTPException(403, "Rotas administrativas desabilitadas (defina BANCO_ADMIN_TOKEN)")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, esperado):
+        raise HTTPException(403, "Token administrativo inválido")
+
 class AuthRegister(BaseModel):
     cpf: str
     password: str
@@ -125,9 +485,65 @@ class AuthLogin(BaseModel):
     cpf: str
     password: str
 
+@app.middleware("http")
+async def _persistir_sessoes(request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
+    """Com store compartilhado, grava ao final da requisição as sessões que ela
+    alterou, sobre a versão carregada (SESSIONS.salvar(..., versao=)); leituras
+    não gravam. Se outro worker gravou a sessão no meio da requisição, a
+    alteração é descartada e a resposta vira 409 (as Idempotency-Keys da
+    requisição são esquecidas, para a repetição executar de novo).
+    A sessão do cabeçalho fica travada durante a requisição e a gravação,
+    para não se intercalar com agendamentos dela (_executar_agendado); a
+    espera pela trava é no event loop. Rotas administrativas que percorrem
+    sessões usam as travas por conta própria."""
+    if not SESSIONS.compartilhado:
+        return await call_next(request)
+    sid_cabecalho = request.headers.get("x-session-id")
+    administrativa = request.url.path.startswith("/admin/")
+    trava = _trava_sessao(sid_cabecalho) if sid_cabecalho and not administrativa else nullcontext()
+    async with trava:
+        usadas: Dict[str, Tuple[int, BankApp]] = {}
+        executadas: List[str] = []
+        token = _SESSOES_USADAS.set(usadas)
+        token_chaves = _CHAVES_EXECUTADAS.set(executadas)
+        try:
+            response = await call_next(request)
+        finally:
+            _SESSOES_USADAS.reset(token)
+            _CHAVES_EXECUTADAS.reset(token_chaves)
+        conflito = False
+        for sid, (versao, bank) in usadas.items():
+            if not await run_in_threadpool(SESSIONS.salvar, sid, bank, versao):
+                await run_in_threadpool(SESSIONS.descartar, sid, bank)
+                conflito = True
+        if conflito:
+            for chave in executadas:
+                IDEMPOTENCY.esquecer(chave)
+            return JSONResponse(
+                {"detail": "Sessão alterada por outra requisição ao mesmo tempo; tente novamente"}, status_code=409
+            )
+        return response
+
+@app.middleware("http")
+async def _gravar_trace(request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
+    """Com BANCO_TRACE, grava a operação anotada por _rastrear, sua duração e o status."""
+    if TRACE is None:
+        return await call_next(request)
+    atual: Dict[str, Any] = {}
+    token = _TRACE_ATUAL.set(atual)
+    inicio, t0 = time.time(), time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        _TRACE_ATUAL.reset(token)
+    if "op" in atual:
+        TRACE.gravar(atual["op"], atual["sid"], atual["params"], inicio, time.perf_counter() - t0, response.status_code)
+    return response
+
 @app.get("/session")
 def new_session() -> Dict[str, str]:
     sid = str(uuid.uuid4())
+    _rastrear("sessao", sid)
     SESSIONS[sid] = BankApp()
     return {"sessionId": sid}
 
@@ -137,12 +553,14 @@ def health() -> Dict[str, str]:
 
 @app.post("/auth/register")
 def auth_register(payload: AuthRegister) -> Dict[str, str]:
+    _rastrear("registro", None, cpf=payload.cpf)
     try:
         if not payload.cpf or not payload.password:
             raise HTTPException(400, "CPF e senha são obrigatórios")
         if payload.cpf in USERS:
             raise HTTPException(409, "Usuário já existe")
-        USERS[payload.cpf] = {"hashed_password": get_password_hash(payload.password)}
+        if not USERS.adicionar(payload.cpf, {"hashed_password": get_password_hash(payload.password)}):
+            raise HTTPException(409, "Usuário já existe")
         return {"message": "Usuário de acesso registrado com sucesso."}
     except HTTPException:
         raise
@@ -151,101 +569,259 @@ def auth_register(payload: AuthRegister) -> Dict[str, str]:
 
 @app.post("/auth/token")
 def auth_token(payload: AuthLogin) -> Dict[str, str]:
+    _rastrear("token", None, cpf=payload.cpf)
     user = USERS.get(payload.cpf)
     if not user or not verify_password(payload.password, user.get("hashed_password", "")):
         raise HTTPException(401, "CPF ou senha inválidos")
     token = create_access_token({"sub": payload.cpf})
     return {"access_token": token, "token_type": "bearer"}
 
-@app.post("/user")
-def create_user(payload: NewUser, x_session_id: Optional[str] = Header(None)) -> Dict[str, str]:
+@app.post("/user", response_model=UsuarioCriadoOut, response_model_exclude_none=True)
+def create_user(payload: NewUser, x_session_id: Optional[str] = Header(None)) -> Dict[str, Any]:
     """Cria um usuário do domínio bancário sem exigir JWT.
     Se não houver `X-Session-Id`, cria uma sessão e a retorna para o cliente persistir.
     """
-    if not x_session_id or x_session_id not in SESSIONS:
+    bank = SESSIONS.get(x_session_id) if x_session_id else None
+    if bank is None:
         sid = x_session_id or str(uuid.uuid4())
-        SESSIONS[sid] = BankApp()
-        bank = SESSIONS[sid]
-        msg = bank.novo_usuario(payload.nome, payload.cpf, payload.data_nascimento, payload.endereco)
-        return {"message": msg, "sessionId": sid}
-    bank = SESSIONS[x_session_id]
-    msg = bank.novo_usuario(payload.nome, payload.cpf, payload.data_nascimento, payload.endereco)
-    return {"message": msg}
-
-@app.post("/login/{cpf}")
-def login(cpf: str, x_session_id: Optional[str] = Header(None), current_user: str = Depends(get_current_user)) -> Dict[str, str]:
+        _rastrear("usuario", sid, cpf=payload.cpf)
+        bank = _get_bank(sid)
+        r = bank.novo_usuario_resultado(payload.nome, payload.cpf, payload.data_nascimento, payload.endereco)
+        return {**asdict(r), "sessionId": sid}
+    _rastrear("usuario", x_session_id, cpf=payload.cpf)
+    bank = _get_bank(x_session_id)
+    r = bank.novo_usuario_resultado(payload.nome, payload.cpf, payload.data_nascimento, payload.endereco)
+    return asdict(r)
+
+@app.post("/users/bulk", response_model=LoteUsuariosOut, response_model_exclude_none=True,
+          dependencies=[Depends(exigir_admin)])
+def create_users_bulk(payload: LoteUsuarios, x_session_id: Optional[str] = Header(None)) -> Dict[str, Any]:
+    """Provisiona usuários de acesso e clientes em lote (onboarding de parceiros).
+    Duplicados (no lote, em USERS ou na sessão) são detectados antes de qualquer
+    hash; as senhas restantes são hasheadas em paralelo e as inserções em USERS
+    e na lista de clientes são feitas em bloco. Devolve um resultado por linha.
+    """
+    if len(payload.usuarios) > BULK_MAX_USUARIOS:
+        raise HTTPException(413, f"Lote acima do máximo de {BULK_MAX_USUARIOS} usuários")
+    sid = x_session_id or str(uuid.uuid4())
+    _rastrear("usuarios_lote", sid, cpfs=[u.cpf for u in payload.usuarios])
+    bank = _get_bank(sid)
+    usuarios = payload.usuarios
+    cpfs = [u.cpf for u in usuarios]
+    ja_cadastrados = USERS.existentes(cpfs) | bank.cpfs_cadastrados(cpfs)
+
+    # Primeira ocorrência de cada CPF ainda livre; repetições ficam para o BankApp apontar
+    candidatos: Dict[str, UsuarioLote] = {}
+    for u in usuarios:
+        if u.cpf not in ja_cadastrados and u.cpf not in candidatos:
+            candidatos[u.cpf] = u
+    hashes = list(_HASH_POOL.map(get_password_hash, (u.password for u in candidatos.values())))
+    inseridos = USERS.adicionar_lote(
+        (cpf, {"hashed_password": h}) for cpf, h in zip(candidatos, hashes)
+    )
+    aceitos = {cpf for cpf, ok in zip(candidatos, inseridos) if ok}
+
+    # Repetições no lote vão ao BankApp (que as rejeita); CPFs recusados em USERS não
+    resultados: List[Optional[Resultado]] = [None] * len(usuarios)
+    registros, posicoes = [], []
+    for i, u in enumerate(usuarios):
+        if u.cpf in aceitos:
+            registros.append({"nome": u.nome, "cpf": u.cpf, "data_nascimento": u.data_nascimento, "endereco": u.endereco})
+            posicoes.append(i)
+        else:
+            resultados[i] = Resultado("novo_usuario", status="erro", codigo_erro=CPF_JA_CADASTRADO, dados={"cpf": u.cpf})
+    for i, r in zip(posicoes, bank.novos_usuarios_resultado(registros)):
+        resultados[i] = r
+    criados = sum(1 for r in resultados if r is not None and r.ok)
+    return {
+        "sessionId": sid, "criados": criados, "rejeitados": len(usuarios) - criados,
+        "resultados": [asdict(r) for r in resultados if r is not None],
+    }
+
+@app.get("/admin/estatisticas", dependencies=[Depends(exigir_admin)])
+def estatisticas() -> Dict[str, Any]:
+    """Totais do banco para os painéis de operação (saldo sob custódia, contas,
+    empréstimos, volume diário), mantidos a cada evento: não percorre contas."""
+    return AGREGADOS.instantaneo()
+
+@app.post("/admin/juros", dependencies=[Depends(exigir_admin)])
+async def acumular_juros() -> Dict[str, Any]:
+    """Credita já os juros do dia nas poupanças (o agendador o faz à meia-noite);
+    sessões que já receberam os juros do dia não são creditadas de novo.
+    Roda fora do pool do servidor: a espera pelas travas das sessões não
+    ocupa threads das requisições."""
+    return await asyncio.to_thread(acumular_juros_sessoes)
+
+@app.get("/clientes/busca", response_model=ResultadoOut, dependencies=[Depends(exigir_admin)])
+def buscar_clientes(q: str, limite: int = 20, campo: Optional[str] = None,
+                    x_session_id: Optional[str] = Header(None)) -> Resultado:
+    """Busca de clientes da sessão para o atendimento: termos parciais de nome
+    e/ou endereço (`campo`), sem diferenciar acentos e maiúsculas."""
+    # A consulta (nomes, endereços) não vai para o trace, só o seu formato
+    _rastrear("buscar_clientes", x_session_id, termos=len(q.split()), limite=limite, campo=campo)
+    bank = _get_bank(x_session_id)
+    return bank.buscar_clientes_resultado(q, limite, campo)
+
+@app.post("/login/{cpf}", response_model=ResultadoOut)
+def login(cpf: str, x_session_id: Optional[str] = Header(None), current_user: str = Depends(limitar("mutacao"))) -> Resultado:
+    _rastrear("login", x_session_id, cpf=cpf)
     bank = _get_bank(x_session_id)
-    msg = bank.login(cpf)
-    return {"message": msg}
+    return bank.login_resultado(cpf)
 
-@app.post("/logout")
-def logout(x_session_id: Optional[str] = Header(None), current_user: str = Depends(get_current_user)) -> Dict[str, str]:
+@app.post("/logout", response_model=ResultadoOut)
+def logout(x_session_id: Optional[str] = Header(None), current_user: str = Depends(limitar("mutacao"))) -> Resultado:
+    _rastrear("logout", x_session_id)
     bank = _get_bank(x_session_id)
-    msg = bank.logout()
-    return {"message": msg}
+    return bank.logout_resultado()
 
-@app.post("/conta")
-def nova_conta(x_session_id: Optional[str] = Header(None), current_user: str = Depends(get_current_user)) -> Dict[str, str]:
+@app.post("/conta", response_model=ResultadoOut)
+def nova_conta(tipo: str = "corrente", x_session_id: Optional[str] = Header(None), current_user: str = Depends(limitar("mutacao"))) -> Resultado:
+    _rastrear("nova_conta", x_session_id, tipo=tipo)
     bank = _get_bank(x_session_id)
-    return {"message": bank.nova_conta()}
+    return bank.nova_conta_resultado(tipo)
 
-@app.get("/saldo")
-def saldo(x_session_id: Optional[str] = Header(None), current_user: str = Depends(get_current_user)) -> Dict[str, str]:
+@app.get("/saldo", response_model=ResultadoOut)
+def saldo(x_session_id: Optional[str] = Header(None), current_user: str = Depends(limitar("leitura"))) -> Resultado:
+    _rastrear("saldo", x_session_id)
     bank = _get_bank(x_session_id)
-    return {"message": bank.saldo()}
+    return bank.saldo_resultado()
 
-@app.get("/extrato")
-def extrato(x_session_id: Optional[str] = Header(None), current_user: str = Depends(get_current_user)) -> Dict[str, str]:
+@app.get("/extrato", response_model=ResultadoOut)
+def extrato(x_session_id: Optional[str] = Header(None), current_user: str = Depends(limitar("leitura"))) -> Resultado:
+    _rastrear("extrato", x_session_id)
     bank = _get_bank(x_session_id)
-    return {"message": bank.extrato()}
+    return bank.extrato_resultado()
+
+@app.get("/extrato/exportar")
+def exportar_extrato(formato: str = "csv", x_session_id: Optional[str] = Header(None), current_user: str = Depends(limitar("leitura"))) -> StreamingResponse:
+    """Exporta o extrato da conta logada (CSV ou OFX) em streaming."""
+    formato = formato.lower()
+    _rastrear("extrato_exportar", x_session_id, formato=formato)
+    if formato not in FORMATOS_EXTRATO:
+        raise HTTPException(400, f"Formato inválido. Use: {', '.join(FORMATOS_EXTRATO)}")
+    bank = _get_bank(x_session_id)
+    conta = bank.conta_logada()
+    if conta is None:
+        raise HTTPException(404, "Faça login e crie uma conta antes de exportar o extrato.")
+    return StreamingResponse(
+        gerar_extrato(conta, formato),
+        media_type=FORMATOS_EXTRATO[formato],
+        headers={"Content-Disposition": f'attachment; filename="extrato-{conta.agencia}-{conta.numero}.{formato}"'},
+    )
+
+@app.get("/contas", response_model=ResultadoOut)
+def listar_contas(x_session_id: Optional[str] = Header(None), current_user: str = Depends(limitar("leitura"))) -> Resultado:
+    _rastrear("listar_contas", x_session_id)
+    bank = _get_bank(x_session_id)
+    return bank.listar_contas_resultado()
 
-@app.get("/contas")
-def listar_contas(x_session_id: Optional[str] = Header(None), current_user: str = Depends(get_current_user)) -> Dict[str, str]:
+@app.post("/depositar", response_model=ResultadoOut)
+async def depositar(payload: Amount, x_session_id: Optional[str] = Header(None), idempotency_key: Optional[str] = Header(None), current_user: str = Depends(limitar("mutacao"))) -> Resultado:
+    _rastrear("depositar", x_session_id, valor=payload.valor)
     bank = _get_bank(x_session_id)
-    return {"message": bank.listar_contas()}
+    return await _operacao_conta(
+        bank, x_session_id, lambda: bank.depositar_resultado(payload.valor), idempotency_key, f"{current_user}:{x_session_id}:depositar", str(payload)
+    )
 
-@app.post("/depositar")
-def depositar(payload: Amount, x_session_id: Optional[str] = Header(None), current_user: str = Depends(get_current_user)) -> Dict[str, str]:
+@app.post("/sacar", response_model=ResultadoOut)
+async def sacar(payload: Amount, x_session_id: Optional[str] = Header(None), idempotency_key: Optional[str] = Header(None), current_user: str = Depends(limitar("mutacao"))) -> Resultado:
+    _rastrear("sacar", x_session_id, valor=payload.valor)
     bank = _get_bank(x_session_id)
-    return {"message": bank.depositar(payload.valor)}
+    return await _operacao_conta(
+        bank, x_session_id, lambda: bank.sacar_resultado(payload.valor), idempotency_key, f"{current_user}:{x_session_id}:sacar", str(payload)
+    )
 
-@app.post("/sacar")
-def sacar(payload: Amount, x_session_id: Optional[str] = Header(None), current_user: str = Depends(get_current_user)) -> Dict[str, str]:
+@app.post("/transferir", response_model=ResultadoOut)
+async def transferir(payload: TransferenciaIn, x_session_id: Optional[str] = Header(None), idempotency_key: Optional[str] = Header(None), current_user: str = Depends(limitar("mutacao"))) -> Resultado:
+    _rastrear("transferir", x_session_id, numero_destino=payload.numero_destino, valor=payload.valor)
     bank = _get_bank(x_session_id)
-    return {"message": bank.sacar(payload.valor)}
+    return await _operacao_conta(
+        bank, x_session_id, lambda: bank.transferir_resultado(payload.numero_destino, payload.valor), idempotency_key, f"{current_user}:{x_session_id}:transferir", str(payload)
+    )
 
-@app.delete("/conta/{numero}")
-def remover_conta(numero: int, x_session_id: Optional[str] = Header(None), current_user: str = Depends(get_current_user)) -> Dict[str, str]:
+@app.delete("/conta/{numero}", response_model=ResultadoOut)
+def remover_conta(numero: int, x_session_id: Optional[str] = Header(None), current_user: str = Depends(limitar("mutacao"))) -> Resultado:
+    _rastrear("remover_conta", x_session_id, numero=numero)
+    bank = _get_bank(x_session_id)
+    return bank.remover_conta_resultado(numero)
+
+@app.post("/agendamentos", response_model=ResultadoOut)
+def agendar(payload: AgendamentoIn, x_session_id: Optional[str] = Header(None), current_user: str = Depends(limitar("mutacao"))) -> Resultado:
+    quando = payload.quando  # o agendador usa horário local sem fuso
+    if quando.tzinfo is not None:
+        quando = quando.astimezone().replace(tzinfo=None)
+    _rastrear("agendar", x_session_id, tipo=payload.tipo, valor=payload.valor,
+              em_s=max(0, round((quando - datetime.now()).total_seconds())),
+              periodicidade=payload.periodicidade, vezes=payload.vezes, numero_destino=payload.numero_destino)
     bank = _get_bank(x_session_id)
-    return {"message": bank.remover_conta(numero)}
+    return bank.agendar_resultado(payload.tipo, payload.valor, quando, payload.periodicidade,
+                                  payload.vezes, payload.numero_destino, origem=x_session_id)
 
-@app.post("/simular_emprestimo")
-def simular_emprestimo(payload: Loan, x_session_id: Optional[str] = Header(None), current_user: str = Depends(get_current_user)) -> Dict[str, str]:
+@app.get("/agendamentos", response_model=ResultadoOut)
+def listar_agendamentos(x_session_id: Optional[str] = Header(None), current_user: str = Depends(limitar("leitura"))) -> Resultado:
+    _rastrear("agendamentos", x_session_id)
     bank = _get_bank(x_session_id)
-    return {"message": bank.simular_emprestimo(payload.valor, payload.parcelas, payload.taxa)}
+    return bank.agendamentos_resultado(origem=x_session_id)
 
-@app.post("/contratar_emprestimo")
-def contratar_emprestimo(payload: Loan, x_session_id: Optional[str] = Header(None), current_user: str = Depends(get_current_user)) -> Dict[str, str]:
+@app.delete("/agendamentos/{id}", response_model=ResultadoOut)
+def cancelar_agendamento(id: str, x_session_id: Optional[str] = Header(None), current_user: str = Depends(limitar("mutacao"))) -> Resultado:
+    _rastrear("cancelar_agendamento", x_session_id, id=id)
     bank = _get_bank(x_session_id)
-    return {"message": bank.contratar_emprestimo(payload.valor, payload.parcelas, payload.taxa)}
+    return bank.cancelar_agendamento_resultado(id, origem=x_session_id)
 
-@app.post("/pagar_parcela")
-def pagar_parcela(x_session_id: Optional[str] = Header(None), current_user: str = Depends(get_current_user)) -> Dict[str, str]:
+@app.post("/simular_emprestimo", response_model=ResultadoOut)
+def simular_emprestimo(payload: Loan, x_session_id: Optional[str] = Header(None), current_user: str = Depends(limitar("leitura"))) -> Resultado:
+    _rastrear("simular_emprestimo", x_session_id, valor=payload.valor, parcelas=payload.parcelas, taxa=payload.taxa)
     bank = _get_bank(x_session_id)
-    return {"message": bank.pagar_parcela()}
+    return bank.simular_emprestimo_resultado(payload.valor, payload.parcelas, payload.taxa)
 
-@app.post("/quitar_emprestimo")
-def quitar_emprestimo(x_session_id: Optional[str] = Header(None), current_user: str = Depends(get_current_user)) -> Dict[str, str]:
+@app.post("/contratar_emprestimo", response_model=ResultadoOut)
+async def contratar_emprestimo(payload: Loan, x_session_id: Optional[str] = Header(None), idempotency_key: Optional[str] = Header(None), current_user: str = Depends(limitar("mutacao"))) -> Resultado:
+    _rastrear("contratar_emprestimo", x_session_id, valor=payload.valor, parcelas=payload.parcelas, taxa=payload.taxa)
     bank = _get_bank(x_session_id)
-    return {"message": bank.quitar_emprestimo()}
+    return await _operacao_conta(
+        bank, x_session_id, lambda: bank.contratar_emprestimo_resultado(payload.valor, payload.parcelas, payload.taxa), idempotency_key, f"{current_user}:{x_session_id}:contratar_emprestimo", str(payload)
+    )
+
+@app.post("/pagar_parcela", response_model=ResultadoOut)
+async def pagar_parcela(x_session_id: Optional[str] = Header(None), idempotency_key: Optional[str] = Header(None), current_user: str = Depends(limitar("mutacao"))) -> Resultado:
+    _rastrear("pagar_parcela", x_session_id)
+    bank = _get_bank(x_session_id)
+    return await _operacao_conta(
+        bank, x_session_id, lambda: bank.pagar_parcela_resultado(), idempotency_key, f"{current_user}:{x_session_id}:pagar_parcela"
+    )
+
+@app.post("/quitar_emprestimo", response_model=ResultadoOut)
+async def quitar_emprestimo(x_session_id: Optional[str] = Header(None), idempotency_key: Optional[str] = Header(None), current_user: str = Depends(limitar("mutacao"))) -> Resultado:
+    _rastrear("quitar_emprestimo", x_session_id)
+    bank = _get_bank(x_session_id)
+    return await _operacao_conta(
+        bank, x_session_id, lambda: bank.quitar_emprestimo_resultado(), idempotency_key, f"{current_user}:{x_session_id}:quitar_emprestimo"
+    )
 
 @app.post("/chat")
 def chat(payload: ChatMsg, x_session_id: Optional[str] = Header(None), current_user: str = Depends(get_current_user)) -> Dict[str, str]:
     """Chat focado no banco: primeiro tenta interpretar comandos/intenções e executar no BankApp.
     Fallback: usar LLM com um prompt restrito ao domínio bancário.
+    Cada comando consome o limite da rota REST equivalente ("leitura"/"mutacao");
+    só o fallback para o modelo consome o limite "llm". Operações de conta
+    (`na_conta`) seguem, como nas rotas REST, pelo ator da conta no modo actor.
     """
     bank = _get_bank(x_session_id)
+
+    def responder(classe: str, fn: Callable[[], str], na_conta: bool = False) -> Dict[str, str]:
+        _cobrar(classe, current_user, x_session_id)
+        return {"message": _operacao_conta_sincrona(bank, x_session_id, fn) if na_conta else fn()}
+
     text = payload.message.strip()
+    if TRACE is not None:
+        # Só comandos têm parâmetros gravados; texto livre entra apenas pelo tamanho
+        palavras = text.split()
+        cmd = palavras[0].lower().lstrip("/") if palavras else ""
+        if cmd in ARGS_CHAT:
+            _rastrear("chat", x_session_id, cmd=cmd, **dict(zip(ARGS_CHAT[cmd], palavras[1:])))
+        else:
+            _rastrear("chat", x_session_id, livre=len(text))
 
     # 1) Comandos explícitos com barra
     import shlex
@@ -255,45 +831,51 @@ def chat(payload: ChatMsg, x_session_id: Optional[str] = Header(None), current_u
         args = parts[1:]
         try:
             if cmd in {"/help", "help"}:
-                return {"message": help_text()}
+                return responder("leitura", help_text)
             if cmd in {"/listar_contas", "listar_contas"}:
-                return {"message": bank.listar_contas()}
+                return responder("leitura", bank.listar_contas)
             if cmd in {"/login", "login"} and len(args) >= 1:
-                return {"message": bank.login(args[0])}
+                return responder("mutacao", lambda: bank.login(args[0]))
             if cmd in {"/logout", "logout"}:
-                return {"message": bank.logout()}
+                return responder("mutacao", bank.logout)
             if cmd in {"/remover_conta", "remover_conta"} and len(args) >= 1:
                 try:
                     numero = int(args[0])
                 except ValueError:
                     return {"message": "Uso: /remover_conta <numero> (número da conta)"}
-                return {"message": bank.remover_conta(numero)}
+                return responder("mutacao", lambda: bank.remover_conta(numero))
             if cmd in {"/nova_conta", "nova_conta"}:
-                return {"message": bank.nova_conta()}
+                return responder("mutacao", lambda: bank.nova_conta(args[0].lower() if args else "corrente"))
             if cmd in {"/saldo", "saldo"}:
-                return {"message": bank.saldo()}
+                return responder("leitura", bank.saldo)
             if cmd in {"/extrato", "extrato"}:
-                return {"message": bank.extrato()}
+                return responder("leitura", bank.extrato)
             if cmd in {"/depositar", "depositar"} and len(args) >= 1:
                 valor = float(str(args[0]).replace(',', '.'))
-                return {"message": bank.depositar(valor)}
+                return responder("mutacao", lambda: bank.depositar(valor), na_conta=True)
             if cmd in {"/sacar", "sacar"} and len(args) >= 1:
                 valor = float(str(args[0]).replace(',', '.'))
-                return {"message": bank.sacar(valor)}
+                return responder("mutacao", lambda: bank.sacar(valor), na_conta=True)
+            if cmd in {"/transferir", "transferir"} and len(args) >= 2:
+                numero = int(args[0])
+                valor = float(str(args[1]).replace(',', '.'))
+                return responder("mutacao", lambda: bank.transferir(numero, valor), na_conta=True)
             if cmd in {"/simular_emprestimo", "simular_emprestimo"} and len(args) >= 3:
                 valor = float(str(args[0]).replace(',', '.'))
                 parcelas = int(args[1])
                 taxa = float(str(args[2]).replace(',', '.'))
-                return {"message": bank.simular_emprestimo(valor, parcelas, taxa)}
+                return responder("leitura", lambda: bank.simular_emprestimo(valor, parcelas, taxa))
             if cmd in {"/contratar_emprestimo", "contratar_emprestimo"} and len(args) >= 3:
                 valor = float(str(args[0]).replace(',', '.'))
                 parcelas = int(args[1])
                 taxa = float(str(args[2]).replace(',', '.'))
-                return {"message": bank.contratar_emprestimo(valor, parcelas, taxa)}
+                return responder("mutacao", lambda: bank.contratar_emprestimo(valor, parcelas, taxa), na_conta=True)
             if cmd in {"/pagar_parcela", "pagar_parcela"}:
-                return {"message": bank.pagar_parcela()}
+                return responder("mutacao", bank.pagar_parcela, na_conta=True)
             if cmd in {"/quitar_emprestimo", "quitar_emprestimo"}:
-                return {"message": bank.quitar_emprestimo()}
+                return responder("mutacao", bank.quitar_emprestimo, na_conta=True)
+        except HTTPException:
+            raise
         except Exception as exc:
             return {"message": f"Não consegui executar o comando. Erro: {exc}"}
 
@@ -301,23 +883,23 @@ def chat(payload: ChatMsg, x_session_id: Optional[str] = Header(None), current_u
     t = text.lower()
     try:
         if "saldo" in t:
-            return {"message": bank.saldo()}
+            return responder("leitura", bank.saldo)
         if "extrato" in t:
-            return {"message": bank.extrato()}
+            return responder("leitura", bank.extrato)
         if ("listar" in t or "mostrar" in t) and "conta" in t:
-            return {"message": bank.listar_contas()}
+            return responder("leitura", bank.listar_contas)
         if "deposit" in t or "depositar" in t:
             import re
             m = re.search(r"(\d+[\.,]?\d*)", t)
             if m:
                 valor = float(m.group(1).replace(',', '.'))
-                return {"message": bank.depositar(valor)}
+                return responder("mutacao", lambda: bank.depositar(valor), na_conta=True)
         if "sac" in t:  # saque/sacar
             import re
             m = re.search(r"(\d+[\.,]?\d*)", t)
             if m:
                 valor = float(m.group(1).replace(',', '.'))
-                return {"message": bank.sacar(valor)}
+                return responder("mutacao", lambda: bank.sacar(valor), na_conta=True)
         if "simul" in t and "emprest" in t:
             import re
             nums = re.findall(r"\d+[\.,]?\d*", t)
@@ -325,29 +907,29 @@ def chat(payload: ChatMsg, x_session_id: Optional[str] = Header(None), current_u
                 valor = float(nums[0].replace(',', '.'))
                 parcelas = int(float(nums[1]))
                 taxa = float(nums[2].replace(',', '.'))
-                return {"message": bank.simular_emprestimo(valor, parcelas, taxa)}
+                return responder("leitura", lambda: bank.simular_emprestimo(valor, parcelas, taxa))
+    except HTTPException:
+        raise
     except Exception:
         pass
 
     # 3) Fallback: LLM focado no domínio bancário
-    if MODEL is None:
+    if LLM is None:
+        _cobrar("leitura", current_user, x_session_id)
         return {"message": (
             "comandos do banco (ex: /help, /saldo, /extrato, /depositar 100)."
         )}
-    try:
-        system = (
-            "Você é um assistente bancário para um banco virtual com comandos fixos. "
-            "Seja objetivo, responda em pt-br. Quando possível, oriente a usar os comandos: "
-            "/help, /login <cpf>, /logout, /nova_conta, /saldo, /extrato, /depositar <valor>, /sacar <valor>, "
-            "/simular_emprestimo <valor> <parcelas> <taxa>, /contratar_emprestimo <valor> <parcelas> <taxa>, "
-            "/pagar_parcela, /quitar_emprestimo. Não fale de assuntos que não sejam bancários."
-        )
-        prompt = f"{system}\nUsuário: {payload.message}\nAssistente:"
-        resp = MODEL.generate_content(prompt)  # type: ignore[attr-defined]
-        text = getattr(resp, "text", str(resp))
-        return {"message": text}
-    except Exception as exc:
-        return {"message": f"Falha no chat: {exc}"}
-
-# Servir o frontend estático em /app
-app.mount("/app", StaticFiles(directory="frontend", html=True), name="frontend")
+    _cobrar("llm", current_user, x_session_id)
+    system = (
+        "Você é um assistente bancário para um banco virtual com comandos fixos. "
+        "Seja objetivo, responda em pt-br. Quando possível, oriente a usar os comandos: "
+        "/help, /login <cpf>, /logout, /nova_conta, /saldo, /extrato, /depositar <valor>, /sacar <valor>, "
+        "/transferir <conta> <valor>, "
+        "/simular_emprestimo <valor> <parcelas> <taxa>, /contratar_emprestimo <valor> <parcelas> <taxa>, "
+        "/pagar_parcela, /quitar_emprestimo. Não fale de assuntos que não sejam bancários."
+    )
+    prompt = f"{system}\nUsuário: {payload.message}\nAssistente:"
+    return {"message": LLM.gerar(prompt, mensagem=payload.message).texto}
+
+# Servir o frontend estático em /app (pré-comprimido, com ETag e URLs com hash)
+app.mount("/app", AssetsEstaticos(directory="frontend", html=True), name="frontend")
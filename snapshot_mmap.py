@@ -0,0 +1,414 @@
+from __future__ import annotations
+import json
+import mmap
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+import agregados
+from agregados import AGREGADOS
+from banco import SINAL_TRANSACAO, Conta, ContaCorrente, ContaPoupanca, Historico, PessoaFisica
+from bank_service import BankApp
+from poupanca import CarteiraPoupanca
+
+# Formato binário (little-endian), segmentos alinhados em 8 bytes:
+#   cabeçalho | clientes | contas por cliente (u32) | contas | saldos (f64)
+#   | poupanças (u32) | índice por CPF (u32) | índice por número (i64 + u32)
+#   | histórico | textos (UTF-8)
+# Clientes, contas e transações são registros de largura fixa; textos são
+# referenciados por (offset, tamanho) no segmento de textos.
+MAGICO = b"BANCOMM1"
+VERSAO = 1
+
+# Códigos gravados no arquivo: a posição na tupla. Novos tipos só ao final.
+_TIPOS_CONTA = (Conta, ContaCorrente, ContaPoupanca)
+_TIPOS_TRANSACAO = tuple(SINAL_TRANSACAO)
+
+_SEGMENTOS = (
+    "clientes", "contas_cliente", "contas", "saldos", "poupancas",
+    "idx_cpf", "idx_numero", "idx_numero_pos", "historico", "textos",
+)
+_CONTADORES = ("clientes", "contas", "transacoes", "contas_cliente", "poupancas")
+_CABECALHO = struct.Struct(f"<8sI4x{len(_CONTADORES) + len(_SEGMENTOS)}Q")
+# nome, cpf, nascimento, endereço, empréstimo (JSON): (offset, tamanho); contas: (início, quantidade)
+_CLIENTE = struct.Struct("<QIQIQIQIQIQI")
+_CPF = struct.Struct("<QI")
+_OFFSET_CPF = 12
+# número, cliente, tipo, limite, limite_saque, taxa_diaria, histórico (início, quantidade), agência (offset, tamanho)
+_CONTA = struct.Struct("<qIBxxxdidQIQI")
+# tipo, valor, data ("%Y-%m-%d %H:%M:%S"), número da transferência (0 = nenhuma), contraparte
+_TRANSACAO = struct.Struct("<Bd19sQq")
+
+def _alinhar(buffer: bytearray) -> None:
+    buffer.extend(b"\0" * (-len(buffer) % 8))
+
+# ---------- Escrita ----------
+def salvar(bank: BankApp, caminho: str) -> Dict[str, int]:
+    """Grava clientes, contas, saldos e históricos do banco num snapshot binário.
+    Cada conta é lida pela sua versão publicada (saldo e histórico consistentes).
+    A gravação é atômica: o arquivo é escrito ao lado e depois renomeado.
+    """
+    textos = bytearray()
+    codigos_transacao = {tipo: i for i, tipo in enumerate(_TIPOS_TRANSACAO)}
+
+    def texto(valor: str) -> tuple:
+        dados = valor.encode("utf-8")
+        inicio = len(textos)
+        textos.extend(dados)
+        return inicio, len(dados)
+
+    clientes = list(bank.clientes)
+    contas = list(bank.contas)
+    pos_cliente = {id(c): i for i, c in enumerate(clientes)}
+    pos_conta = {id(c): i for i, c in enumerate(contas)}
+
+    seg_clientes = bytearray()
+    contas_cliente = array("I")
+    for cliente in clientes:
+        inicio = len(contas_cliente)
+        contas_cliente.extend(pos_conta[id(c)] for c in cliente.contas if id(c) in pos_conta)
+        emprestimo = json.dumps(cliente.emprestimo) if cliente.emprestimo is not None else ""
+        seg_clientes += _CLIENTE.pack(
+            *texto(cliente.nome or ""), *texto(cliente.cpf), *texto(cliente.data_nascimento),
+            *texto(cliente.endereco or ""), *texto(emprestimo), inicio, len(contas_cliente) - inicio,
+        )
+
+    seg_contas = bytearray()
+    seg_historico = bytearray()
+    saldos = array("d")
+    poupancas = array("I")
+    n_transacoes = 0
+    for i, conta in enumerate(contas):
+        estado = conta.estado
+        transacoes = conta.transacoes_em(estado)
+        for t in transacoes:
+            transferencia = t.get("transferencia")
+            seg_historico += _TRANSACAO.pack(
+                codigos_transacao[t["tipo"]], float(t["valor"]), t["data"].encode("ascii"),
+                int(transferencia[1:]) if transferencia else 0, int(t.get("contraparte", -1)),
+            )
+        seg_contas += _CONTA.pack(
+            conta.numero, pos_cliente[id(conta.cliente)], _TIPOS_CONTA.index(type(conta)),
+            float(getattr(conta, "limite", 0.0)), int(getattr(conta, "limite_saque", 0)),
+            float(getattr(conta, "taxa_diaria", 0.0)), n_transacoes, len(transacoes), *texto(conta.agencia),
+        )
+        saldos.append(estado.saldo)
+        if isinstance(conta, ContaPoupanca):
+            poupancas.append(i)
+        n_transacoes += len(transacoes)
+
+    idx_cpf = array("I", sorted(range(len(clientes)), key=lambda i: clientes[i].cpf.encode("utf-8")))
+    ordem_numero = sorted(range(len(contas)), key=lambda i: contas[i].numero)
+    idx_numero = array("q", (contas[i].numero for i in ordem_numero))
+    idx_numero_pos = array("I", ordem_numero)
+
+    segmentos = {
+        "clientes": seg_clientes, "contas_cliente": contas_cliente.tobytes(), "contas": seg_contas,
+        "saldos": saldos.tobytes(), "poupancas": poupancas.tobytes(), "idx_cpf": idx_cpf.tobytes(),
+        "idx_numero": idx_numero.tobytes(), "idx_numero_pos": idx_numero_pos.tobytes(),
+        "historico": seg_historico, "textos": textos,
+    }
+    corpo = bytearray()
+    offsets = []
+    for nome in _SEGMENTOS:
+        _alinhar(corpo)
+        offsets.append(_CABECALHO.size + len(corpo))
+        corpo += segmentos[nome]
+    contadores = (len(clientes), len(contas), n_transacoes, len(contas_cliente), len(poupancas))
+
+    temporario = caminho + ".tmp"
+    with open(temporario, "wb") as f:
+        f.write(_CABECALHO.pack(MAGICO, VERSAO, *contadores, *offsets))
+        f.write(corpo)
+    os.replace(temporario, caminho)
+    return {**dict(zip(_CONTADORES, contadores)), "bytes": _CABECALHO.size + len(corpo)}
+
+# ---------- Leitura ----------
+class _Chaves:
+    """Visão ordenada para bisseção: a chave da k-ésima entrada de um índice."""
+
+    def __init__(self, tamanho: int, chave: Callable[[int], Any]) -> None:
+        self._tamanho = tamanho
+        self._chave = chave
+
+    def __len__(self) -> int:
+        return self._tamanho
+
+    def __getitem__(self, k: int) -> Any:
+        return self._chave(k)
+
+class ArquivoSnapshot:
+    """Snapshot aberto via mmap. Clientes e contas são materializados como
+    objetos Python no primeiro acesso e ficam em cache (a mesma linha devolve
+    sempre o mesmo objeto); linhas nunca acessadas não ocupam heap.
+    """
+
+    def __init__(self, caminho: str) -> None:
+        with open(caminho, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magico, versao, *campos = _CABECALHO.unpack_from(self._mm, 0)
+        if magico != MAGICO or versao != VERSAO:
+            raise ValueError(f"Snapshot inválido ou de versão não suportada: {caminho}")
+        contadores = dict(zip(_CONTADORES, campos))
+        self._offsets = dict(zip(_SEGMENTOS, campos[len(_CONTADORES):]))
+        self.n_clientes = contadores["clientes"]
+        self.n_contas = contadores["contas"]
+        self.n_transacoes = contadores["transacoes"]
+
+        mv = memoryview(self._mm)
+
+        def vetor(segmento: str, formato: str, tamanho: int) -> memoryview:
+            inicio = self._offsets[segmento]
+            return mv[inicio:inicio + tamanho * struct.calcsize(formato)].cast(formato)
+
+        self._contas_cliente = vetor("contas_cliente", "I", contadores["contas_cliente"])
+        self._saldos = vetor("saldos", "d", self.n_contas)
+        self.poupancas = vetor("poupancas", "I", contadores["poupancas"])
+        self._idx_cpf = vetor("idx_cpf", "I", self.n_clientes)
+        self._idx_numero = vetor("idx_numero", "q", self.n_contas)
+        self._idx_numero_pos = vetor("idx_numero_pos", "I", self.n_contas)
+
+        self._clientes: Dict[int, PessoaFisica] = {}
+        self._contas: Dict[int, Conta] = {}
+        # id(objeto materializado) -> linha no arquivo
+        self._linhas: Dict[int, int] = {}
+        # Materialização: objetos em construção (cliente <-> contas se referenciam),
+        # visíveis só à thread que constrói; publicados nos caches ao final
+        self._lock = threading.RLock()
+        self._construindo: Dict[Tuple[str, int], Any] = {}
+
+    def _texto(self, inicio: int, tamanho: int) -> str:
+        inicio += self._offsets["textos"]
+        return self._mm[inicio:inicio + tamanho].decode("utf-8")
+
+    def linha(self, objeto: Any) -> Optional[int]:
+        return self._linhas.get(id(objeto))
+
+    @property
+    def materializados(self) -> int:
+        return len(self._clientes) + len(self._contas)
+
+    def _materializar(self, tipo: str, i: int, construir: Callable[[int], Any]) -> Any:
+        """Constrói o objeto da linha `i` (e os que ele referencia) sob a trava e
+        só então o publica: outra thread nunca recebe um objeto pela metade, e
+        cada linha é construída uma única vez (identidade estável)."""
+        cache = self._clientes if tipo == "cliente" else self._contas
+        with self._lock:
+            objeto = cache.get(i)
+            if objeto is None:
+                objeto = self._construindo.get((tipo, i))
+            if objeto is not None:
+                return objeto
+            externo = not self._construindo
+            try:
+                objeto = construir(i)
+                if externo:
+                    for (tipo_linha, linha), construido in self._construindo.items():
+                        self._linhas[id(construido)] = linha
+                        (self._clientes if tipo_linha == "cliente" else self._contas)[linha] = construido
+            finally:
+                if externo:
+                    self._construindo.clear()
+            return objeto
+
+    def cliente(self, i: int) -> PessoaFisica:
+        cliente = self._clientes.get(i)
+        if cliente is not None:
+            return cliente
+        return self._materializar("cliente", i, self._construir_cliente)
+
+    def _construir_cliente(self, i: int) -> PessoaFisica:
+        (nome_o, nome_n, cpf_o, cpf_n, nasc_o, nasc_n, end_o, end_n,
+         emp_o, emp_n, inicio, quantidade) = _CLIENTE.unpack_from(self._mm, self._offsets["clientes"] + i * _CLIENTE.size)
+        cliente = PessoaFisica(
+            nome=self._texto(nome_o, nome_n), cpf=self._texto(cpf_o, cpf_n),
+            data_nascimento=self._texto(nasc_o, nasc_n), endereco=self._texto(end_o, end_n),
+        )
+        emprestimo = self._texto(emp_o, emp_n)
+        cliente.emprestimo = json.loads(emprestimo) if emprestimo else None
+        # Registrado antes das contas: a conta referencia o cliente e vice-versa
+        self._construindo[("cliente", i)] = cliente
+        cliente.contas = [self.conta(k) for k in self._contas_cliente[inicio:inicio + quantidade]]
+        return cliente
+
+    def conta(self, i: int) -> Conta:
+        conta = self._contas.get(i)
+        if conta is not None:
+            return conta
+        return self._materializar("conta", i, self._construir_conta)
+
+    def _construir_conta(self, i: int) -> Conta:
+        (numero, cliente, tipo, limite, limite_saque, taxa, h_inicio, h_quantidade,
+         ag_o, ag_n) = _CONTA.unpack_from(self._mm, self._offsets["contas"] + i * _CONTA.size)
+        cls = _TIPOS_CONTA[tipo]
+        conta = cls.__new__(cls)
+        self._construindo[("conta", i)] = conta
+
+        historico = Historico()
+        base = self._offsets["historico"]
+        for k in range(h_inicio, h_inicio + h_quantidade):
+            codigo, valor, data, transferencia, contraparte = _TRANSACAO.unpack_from(self._mm, base + k * _TRANSACAO.size)
+            registro = historico._restaurar(_TIPOS_TRANSACAO[codigo], valor, data.decode("ascii"))
+            if transferencia:
+                registro.update(transferencia=f"T{transferencia}", contraparte=contraparte)
+
+        estado: Dict[str, Any] = {
+            "_saldo": self._saldos[i], "_numero": numero, "_agencia": self._texto(ag_o, ag_n),
+            "_cliente": self.cliente(cliente), "_historico": historico,
+        }
+        if cls is ContaCorrente:
+            estado.update(limite=limite, limite_saque=limite_saque)
+        elif cls is ContaPoupanca:
+            estado["taxa_diaria"] = taxa
+        conta.__setstate__(estado)
+        return conta
+
+    def _registros(self, segmento: str, formato: struct.Struct, quantidade: int) -> Iterator[tuple]:
+        inicio = self._offsets[segmento]
+        return formato.iter_unpack(self._mm[inicio:inicio + quantidade * formato.size])
+
+    def contribuicao(self, dias_retidos: int = 31) -> agregados.Contribuicao:
+        """Totais do arquivo para os agregados, direto dos registros (sem materializar)."""
+        tipos = ("poupanca" if _TIPOS_CONTA[r[2]] is ContaPoupanca else "corrente"
+                 for r in self._registros("contas", _CONTA, self.n_contas))
+        movimentos = ((_TIPOS_TRANSACAO[r[0]], 1, r[1], r[2][:10].decode("ascii"))
+                      for r in self._registros("historico", _TRANSACAO, self.n_transacoes))
+        devedores = (float(json.loads(self._texto(r[8], r[9])).get("saldo_devedor", 0.0)) if r[9] else 0.0
+                     for r in self._registros("clientes", _CLIENTE, self.n_clientes))
+        return agregados.contribuicao(self._saldos, tipos, movimentos, devedores, dias_retidos)
+
+    def buscar_cpf(self, cpf: str) -> Optional[int]:
+        """Linha do cliente com o CPF, por bisseção no índice (O(log n))."""
+        alvo = cpf.encode("utf-8")
+        base = self._offsets["clientes"] + _OFFSET_CPF
+
+        def chave(k: int) -> bytes:
+            inicio, tamanho = _CPF.unpack_from(self._mm, base + self._idx_cpf[k] * _CLIENTE.size)
+            inicio += self._offsets["textos"]
+            return self._mm[inicio:inicio + tamanho]
+
+        k = bisect_left(_Chaves(self.n_clientes, chave), alvo)
+        return self._idx_cpf[k] if k < self.n_clientes and chave(k) == alvo else None
+
+    def buscar_numero(self, numero: int) -> Optional[int]:
+        """Linha da conta com o número, por bisseção no índice (O(log n))."""
+        k = bisect_left(self._idx_numero, numero)
+        return self._idx_numero_pos[k] if k < self.n_contas and self._idx_numero[k] == numero else None
+
+def _contem(linhas: Sequence, linha: int) -> bool:
+    k = bisect_left(linhas, linha)
+    return k < len(linhas) and linhas[k] == linha
+
+class _Mapeados(Sequence):
+    """Lista de objetos sobre linhas do snapshot (em ordem crescente),
+    materializados sob demanda, mais os objetos acrescentados após a abertura.
+    Suporta as operações de lista usadas pelo BankApp (iterar, len, append,
+    extend, remove, `in`). Ao ser serializada vira uma lista comum.
+    """
+
+    def __init__(self, arquivo: ArquivoSnapshot, linhas: Sequence, obter: Callable[[int], Any]) -> None:
+        self._arquivo = arquivo
+        self._linhas = linhas
+        self._obter = obter
+        self._removidas: Set[int] = set()
+        self._extras: List[Any] = []
+
+    def _base(self) -> Iterator[int]:
+        if not self._removidas:
+            return iter(self._linhas)
+        return (linha for linha in self._linhas if linha not in self._removidas)
+
+    def __len__(self) -> int:
+        return len(self._linhas) - len(self._removidas) + len(self._extras)
+
+    def __iter__(self) -> Iterator[Any]:
+        for linha in self._base():
+            yield self._obter(linha)
+        yield from list(self._extras)
+
+    def __getitem__(self, k: Any) -> Any:
+        if isinstance(k, slice):
+            return [self[i] for i in range(*k.indices(len(self)))]
+        n = len(self)
+        if k < 0:
+            k += n
+        if not 0 <= k < n:
+            raise IndexError(k)
+        n_base = len(self._linhas) - len(self._removidas)
+        if k >= n_base:
+            return self._extras[k - n_base]
+        if not self._removidas:
+            return self._obter(self._linhas[k])
+        return self._obter(next(islice(self._base(), k, None)))
+
+    def _linha_base(self, objeto: Any) -> Optional[int]:
+        linha = self._arquivo.linha(objeto)
+        if linha is None or linha in self._removidas or not _contem(self._linhas, linha):
+            return None
+        return linha
+
+    def __contains__(self, objeto: object) -> bool:
+        return self._linha_base(objeto) is not None or any(x is objeto for x in self._extras)
+
+    def append(self, objeto: Any) -> None:
+        self._extras.append(objeto)
+
+    def extend(self, objetos: Any) -> None:
+        self._extras.extend(objetos)
+
+    def remove(self, objeto: Any) -> None:
+        for i, x in enumerate(self._extras):
+            if x is objeto:
+                del self._extras[i]
+                return
+        linha = self._linha_base(objeto)
+        if linha is None:
+            raise ValueError("objeto não está na lista")
+        self._removidas.add(linha)
+
+    def __reduce__(self) -> Any:
+        return (list, (list(self),))
+
+class ClientesMapeados(_Mapeados):
+    def __init__(self, arquivo: ArquivoSnapshot) -> None:
+        super().__init__(arquivo, range(arquivo.n_clientes), arquivo.cliente)
+
+    def buscar_cpf(self, cpf: str) -> Optional[PessoaFisica]:
+        for cliente in self._extras:
+            if cliente.cpf == cpf:
+                return cliente
+        linha = self._arquivo.buscar_cpf(cpf)
+        if linha is None or linha in self._removidas:
+            return None
+        return self._obter(linha)
+
+class ContasMapeadas(_Mapeados):
+    def __init__(self, arquivo: ArquivoSnapshot, linhas: Optional[Sequence] = None) -> None:
+        super().__init__(arquivo, range(arquivo.n_contas) if linhas is None else linhas, arquivo.conta)
+
+    def buscar_numero(self, numero: int) -> Optional[Conta]:
+        for conta in self._extras:
+            if conta.numero == numero:
+                return conta
+        linha = self._arquivo.buscar_numero(numero)
+        if linha is None or linha in self._removidas or not _contem(self._linhas, linha):
+            return None
+        return self._obter(linha)
+
+def abrir(caminho: str) -> BankApp:
+    """Abre um snapshot como BankApp sem materializar clientes nem contas:
+    o custo de abertura independe do tamanho do arquivo. Os totais do arquivo
+    entram nos agregados na próxima leitura deles.
+    """
+    arquivo = ArquivoSnapshot(caminho)
+    AGREGADOS.incorporar_depois(lambda: arquivo.contribuicao(AGREGADOS.dias_retidos))
+    bank = BankApp()
+    bank.clientes = ClientesMapeados(arquivo)  # type: ignore[assignment]
+    bank.contas = ContasMapeadas(arquivo)  # type: ignore[assignment]
+    bank.poupancas = CarteiraPoupanca(ContasMapeadas(arquivo, arquivo.poupancas))  # type: ignore[arg-type]
+    return bank
@@ -0,0 +1,93 @@
+from __future__ import annotations
+import csv
+import io
+from datetime import datetime
+from typing import Any, Dict, Iterator, List
+from xml.sax.saxutils import escape
+
+from banco import SINAL_TRANSACAO, Conta, ContaPoupanca, id_transacao
+
+TAMANHO_BLOCO = 500  # linhas por bloco de bytes enviado ao cliente
+
+FORMATOS = {
+    "csv": "text/csv; charset=utf-8",
+    "ofx": "application/x-ofx",
+}
+
+def _blocos(transacoes: List[Dict[str, Any]], total: int) -> Iterator[List[Dict[str, Any]]]:
+    """Percorre o histórico em blocos até `total`, a versão publicada da conta no
+    início da exportação: transações registradas durante o envio não entram neste extrato.
+    """
+    for inicio in range(0, total, TAMANHO_BLOCO):
+        yield transacoes[inicio:min(inicio + TAMANHO_BLOCO, total)]
+
+def _valor_assinado(t: Dict[str, Any]) -> float:
+    return SINAL_TRANSACAO.get(t["tipo"], 1) * float(t["valor"])
+
+def gerar_extrato_csv(conta: Conta) -> Iterator[str]:
+    """Gera o extrato da conta em CSV, em blocos de texto."""
+    estado = conta.estado
+    transacoes = conta.historico.transacoes
+    total = estado.transacoes
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["data", "tipo", "valor", "agencia", "conta"])
+    yield buffer.getvalue()
+    for bloco in _blocos(transacoes, total):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            [t["data"], t["tipo"], f"{_valor_assinado(t):.2f}", conta.agencia, conta.numero] for t in bloco
+        )
+        yield buffer.getvalue()
+
+def _data_ofx(data: str) -> str:
+    return datetime.strptime(data, "%Y-%m-%d %H:%M:%S").strftime("%Y%m%d%H%M%S")
+
+def gerar_extrato_ofx(conta: Conta) -> Iterator[str]:
+    """Gera o extrato da conta em OFX 2.2 (XML), em blocos de texto."""
+    estado = conta.estado
+    transacoes = conta.historico.transacoes
+    total = estado.transacoes
+    agora = datetime.now().strftime("%Y%m%d%H%M%S")
+    inicio = _data_ofx(transacoes[0]["data"]) if total else agora
+    fim = _data_ofx(transacoes[total - 1]["data"]) if total else agora
+
+    yield (
+        '<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
+        '<?OFX OFXHEADER="200" VERSION="220" SECURITY="NONE" OLDFILEUID="NONE" NEWFILEUID="NONE"?>\n'
+        "<OFX>\n"
+        "<SIGNONMSGSRSV1><SONRS><STATUS><CODE>0</CODE><SEVERITY>INFO</SEVERITY></STATUS>"
+        f"<DTSERVER>{agora}</DTSERVER><LANGUAGE>POR</LANGUAGE></SONRS></SIGNONMSGSRSV1>\n"
+        "<BANKMSGSRSV1><STMTTRNRS><TRNUID>1</TRNUID>"
+        "<STATUS><CODE>0</CODE><SEVERITY>INFO</SEVERITY></STATUS>\n"
+        "<STMTRS><CURDEF>BRL</CURDEF>\n"
+        f"<BANKACCTFROM><BANKID>0001</BANKID><BRANCHID>{escape(conta.agencia)}</BRANCHID>"
+        f"<ACCTID>{conta.numero}</ACCTID><ACCTTYPE>{'SAVINGS' if isinstance(conta, ContaPoupanca) else 'CHECKING'}</ACCTTYPE></BANKACCTFROM>\n"
+        f"<BANKTRANLIST><DTSTART>{inicio}</DTSTART><DTEND>{fim}</DTEND>\n"
+    )
+    seq = 0
+    for bloco in _blocos(transacoes, total):
+        partes: List[str] = []
+        for t in bloco:
+            seq += 1
+            valor = _valor_assinado(t)
+            partes.append(
+                f"<STMTTRN><TRNTYPE>{'CREDIT' if valor >= 0 else 'DEBIT'}</TRNTYPE>"
+                f"<DTPOSTED>{_data_ofx(t['data'])}</DTPOSTED><TRNAMT>{valor:.2f}</TRNAMT>"
+                f"<FITID>{id_transacao(conta, seq)}</FITID><MEMO>{escape(t['tipo'])}</MEMO></STMTTRN>\n"
+            )
+        yield "".join(partes)
+    yield (
+        "</BANKTRANLIST>\n"
+        f"<LEDGERBAL><BALAMT>{estado.saldo:.2f}</BALAMT><DTASOF>{agora}</DTASOF></LEDGERBAL>\n"
+        "</STMTRS></STMTTRNRS></BANKMSGSRSV1>\n"
+        "</OFX>\n"
+    )
+
+def gerar_extrato(conta: Conta, formato: str = "csv") -> Iterator[str]:
+    if formato == "csv":
+        return gerar_extrato_csv(conta)
+    if formato == "ofx":
+        return gerar_extrato_ofx(conta)
+    raise ValueError(f"Formato não suportado: {formato}")
@@ -0,0 +1,258 @@
+from __future__ import annotations
+import argparse
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Brotli é opcional: sem ele os arquivos são pré-comprimidos só em gzip
+try:
+    import brotli  # type: ignore
+except Exception:
+    brotli = None  # type: ignore
+
+TAMANHO_MINIMO = 256  # abaixo disso comprimir não compensa
+CACHE_IMUTAVEL = "public, max-age=31536000, immutable"
+CACHE_REVALIDAR = "no-cache"
+
+_COMPRIMIVEIS = {
+    "application/javascript", "application/json", "application/manifest+json",
+    "application/wasm", "application/xml", "image/svg+xml",
+}
+# src="..." / href="..." relativos nos HTML, reescritos para a URL com hash
+_REFERENCIA = re.compile(r"""(?P<attr>\b(?:src|href)=)(?P<aspas>["'])(?P<url>[^"'#?:]+)(?P=aspas)""")
+
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+class _Recurso:
+    """Um arquivo carregado em memória com suas variantes pré-comprimidas."""
+
+    __slots__ = ("caminho", "tipo", "hash", "variantes", "url_hash")
+
+    def __init__(self, caminho: str, conteudo: bytes, tipo: str) -> None:
+        self.caminho = caminho
+        self.tipo = tipo
+        self.hash = hashlib.sha256(conteudo).hexdigest()
+        # codificação -> (corpo, ETag forte própria da representação)
+        self.variantes: Dict[str, Tuple[bytes, str]] = {"identity": (conteudo, f'"{self.hash[:20]}"')}
+        if len(conteudo) >= TAMANHO_MINIMO and _comprimivel(tipo):
+            comprimido = gzip.compress(conteudo, compresslevel=9, mtime=0)
+            if len(comprimido) < len(conteudo):
+                self.variantes["gzip"] = (comprimido, f'"{self.hash[:20]}-gz"')
+            if brotli is not None:
+                comprimido = brotli.compress(conteudo, quality=11)
+                if len(comprimido) < len(conteudo):
+                    self.variantes["br"] = (comprimido, f'"{self.hash[:20]}-br"')
+        raiz, extensao = posixpath.splitext(caminho)
+        self.url_hash = f"{raiz}.{self.hash[:12]}{extensao}"
+
+def _comprimivel(tipo: str) -> bool:
+    return tipo.startswith("text/") or tipo in _COMPRIMIVEIS
+
+def _tipo(caminho: str) -> str:
+    tipo = mimetypes.guess_type(caminho)[0] or "application/octet-stream"
+    return f"{tipo}; charset=utf-8" if _comprimivel(tipo) and tipo != "application/wasm" else tipo
+
+def _aceitas(accept_encoding: str) -> Dict[str, float]:
+    """Codificações do cabeçalho Accept-Encoding com seus pesos (q)."""
+    pesos: Dict[str, float] = {}
+    for parte in accept_encoding.split(","):
+        nome, _, parametros = parte.strip().partition(";")
+        if not nome:
+            continue
+        q = 1.0
+        parametro = parametros.strip()
+        if parametro.startswith("q="):
+            try:
+                q = float(parametro[2:])
+            except ValueError:
+                q = 0.0
+        pesos[nome.strip().lower()] = q
+    return pesos
+
+def escolher_codificacao(accept_encoding: str, disponiveis: Any) -> str:
+    """Melhor codificação disponível para o cliente (br > gzip > identity em empate)."""
+    pesos = _aceitas(accept_encoding)
+    melhor, melhor_q = "identity", pesos.get("identity", pesos.get("*", 1.0))
+    for codificacao in ("gzip", "br"):
+        if codificacao not in disponiveis:
+            continue
+        q = pesos.get(codificacao, pesos.get("*", 0.0))
+        if q > 0 and q >= melhor_q:
+            melhor, melhor_q = codificacao, q
+    return melhor
+
+class AssetsEstaticos:
+    """Aplicação ASGI para o frontend estático, no lugar de StaticFiles.
+
+    Na inicialização cada arquivo de `diretorio` é lido, recebe um hash de
+    conteúdo (SHA-256) e é pré-comprimido em gzip (e brotli, se instalado).
+    Cada arquivo responde em dois endereços:
+    - o caminho original, com `Cache-Control: no-cache` e ETag forte
+      (revisitas custam um 304);
+    - `nome.<hash>.ext`, com `Cache-Control: immutable` por um ano (revisitas
+      não fazem requisição).
+    Referências relativas `src`/`href` dos HTML são reescritas para a URL com
+    hash, então basta o index revalidar. Arquivos ficam em memória: adequado
+    a um bundle de frontend, não a uploads.
+    """
+
+    def __init__(self, directory: str, html: bool = False, check_dir: bool = True) -> None:
+        if check_dir and not os.path.isdir(directory):
+            raise RuntimeError(f"Directory '{directory}' does not exist")
+        self.diretorio = directory
+        self.html = html
+        self._rotas: Dict[str, Tuple[_Recurso, bool]] = {}
+        if os.path.isdir(directory):
+            self.carregar()
+
+    def carregar(self) -> None:
+        """(Re)lê e comprime todos os arquivos do diretório."""
+        arquivos: Dict[str, bytes] = {}
+        for raiz, _, nomes in os.walk(self.diretorio):
+            for nome in nomes:
+                completo = os.path.join(raiz, nome)
+                relativo = os.path.relpath(completo, self.diretorio).replace(os.sep, "/")
+                with open(completo, "rb") as f:
+                    arquivos[relativo] = f.read()
+
+        recursos: Dict[str, _Recurso] = {}
+        html = [c for c in arquivos if c.endswith((".html", ".htm"))]
+        for caminho, conteudo in arquivos.items():
+            if caminho not in html:
+                recursos[caminho] = _Recurso(caminho, conteudo, _tipo(caminho))
+        for caminho in html:
+            conteudo = self._reescrever(caminho, arquivos[caminho], recursos)
+            recursos[caminho] = _Recurso(caminho, conteudo, _tipo(caminho))
+
+        rotas: Dict[str, Tuple[_Recurso, bool]] = {}
+        for caminho, recurso in recursos.items():
+            rotas[caminho] = (recurso, False)
+            rotas[recurso.url_hash] = (recurso, True)
+        self._rotas = rotas
+
+    @staticmethod
+    def _reescrever(caminho: str, conteudo: bytes, recursos: Dict[str, _Recurso]) -> bytes:
+        base = posixpath.dirname(caminho)
+        try:
+            texto = conteudo.decode("utf-8")
+        except UnicodeDecodeError:
+            return conteudo
+
+        def trocar(m: "re.Match[str]") -> str:
+            url = m.group("url")
+            if url.startswith("/"):
+                return m.group(0)
+            alvo = posixpath.normpath(posixpath.join(base, url))
+            recurso = recursos.get(alvo)
+            if recurso is None:
+                return m.group(0)
+            novo = posixpath.relpath(recurso.url_hash, base or ".")
+            return f"{m.group('attr')}{m.group('aspas')}{novo}{m.group('aspas')}"
+
+        return _REFERENCIA.sub(trocar, texto).encode("utf-8")
+
+    def url(self, caminho: str) -> Optional[str]:
+        """URL com hash (relativa ao ponto de montagem) de um arquivo, para templates."""
+        rota = self._rotas.get(caminho.lstrip("/"))
+        return rota[0].url_hash if rota else None
+
+    def _localizar(self, caminho: str) -> Tuple[Optional[Tuple[_Recurso, bool]], bool]:
+        """(rota, redirecionar_com_barra) para o caminho pedido."""
+        caminho = caminho.lstrip("/")
+        rota = self._rotas.get(caminho)
+        if rota is not None or not self.html:
+            return rota, False
+        indice = posixpath.join(caminho, "index.html") if caminho else "index.html"
+        rota = self._rotas.get(indice)
+        if rota is not None and caminho and not caminho.endswith("/"):
+            return rota, True
+        return rota, False
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Send) -> None:
+        assert scope["type"] == "http"
+        metodo = scope["method"]
+        if metodo not in ("GET", "HEAD"):
+            await _enviar(send, 405, [(b"allow", b"GET, HEAD")], b"Method Not Allowed", metodo)
+            return
+
+        rota, redirecionar = self._localizar(_caminho_da_rota(scope))
+        if redirecionar:
+            destino = scope["path"] + "/"
+            if scope.get("query_string"):
+                destino += "?" + scope["query_string"].decode("latin-1")
+            await _enviar(send, 307, [(b"location", destino.encode("latin-1"))], b"", metodo)
+            return
+        status = 200
+        if rota is None:
+            rota = self._rotas.get("404.html") if self.html else None
+            if rota is None:
+                await _enviar(send, 404, [(b"content-type", b"text/plain; charset=utf-8")], b"Not Found", metodo)
+                return
+            status = 404
+
+        recurso, imutavel = rota
+        cabecalhos = dict((k.lower(), v) for k, v in scope["headers"])
+        codificacao = escolher_codificacao(cabecalhos.get(b"accept-encoding", b"").decode("latin-1"), recurso.variantes)
+        corpo, etag = recurso.variantes[codificacao]
+        headers: List[Tuple[bytes, bytes]] = [
+            (b"etag", etag.encode()),
+            (b"cache-control", (CACHE_IMUTAVEL if imutavel else CACHE_REVALIDAR).encode()),
+        ]
+        if len(recurso.variantes) > 1:
+            headers.append((b"vary", b"Accept-Encoding"))
+
+        if status == 200 and _corresponde(cabecalhos.get(b"if-none-match"), recurso):
+            await _enviar(send, 304, headers, b"", metodo)
+            return
+        headers.append((b"content-type", recurso.tipo.encode()))
+        if codificacao != "identity":
+            headers.append((b"content-encoding", codificacao.encode()))
+        await _enviar(send, status, headers, corpo, metodo)
+
+def _caminho_da_rota(scope: Dict[str, Any]) -> str:
+    """Caminho relativo ao ponto de montagem (mesma regra do Starlette)."""
+    caminho: str = scope["path"]
+    raiz = scope.get("root_path", "")
+    if raiz and caminho.startswith(raiz) and (caminho == raiz or caminho[len(raiz)] == "/"):
+        return caminho[len(raiz):]
+    return caminho
+
+def _corresponde(if_none_match: Optional[bytes], recurso: _Recurso) -> bool:
+    """If-None-Match usa comparação fraca: qualquer variante do mesmo conteúdo vale."""
+    if not if_none_match:
+        return False
+    etags = {etag for _, etag in recurso.variantes.values()}
+    for etag in if_none_match.decode("latin-1").split(","):
+        etag = etag.strip()
+        if etag == "*" or etag.removeprefix("W/") in etags:
+            return True
+    return False
+
+async def _enviar(send: Send, status: int, headers: List[Tuple[bytes, bytes]], corpo: bytes, metodo: str) -> None:
+    if status != 304:
+        headers = headers + [(b"content-length", str(len(corpo)).encode())]
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": b"" if metodo == "HEAD" else corpo})
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Relatório de pré-compressão dos assets estáticos.")
+    parser.add_argument("diretorio", nargs="?", default="frontend")
+    args = parser.parse_args(argv)
+    assets = AssetsEstaticos(args.diretorio)
+    total = dict.fromkeys(("identity", "gzip", "br") if brotli is not None else ("identity", "gzip"), 0)
+    for caminho, (recurso, imutavel) in sorted(assets._rotas.items()):
+        if imutavel:
+            continue
+        tamanhos = {c: len(corpo) for c, (corpo, _) in recurso.variantes.items()}
+        for c in total:
+            total[c] += tamanhos.get(c, tamanhos["identity"])
+        partes = "  ".join(f"{c} {t:>9,}" for c, t in tamanhos.items())
+        print(f"{caminho:40s} -> {recurso.url_hash:50s} {partes}")
+    print("total: " + "  ".join(f"{c} {t:,}" for c, t in total.items()) + ("" if brotli else "  (brotli não instalado)"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+from __future__ import annotations
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from agregados import AGREGADOS
+from bank_service import BankApp
+
+# ---------- Usuários de acesso (auth) ----------
+class MemoryUserStore:
+    """Usuários de acesso em um dict do processo (um único worker)."""
+
+    compartilhado = False
+
+    def __init__(self) -> None:
+        self._usuarios: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, cpf: object) -> bool:
+        return cpf in self._usuarios
+
+    def get(self, cpf: str) -> Optional[Dict[str, str]]:
+        return self._usuarios.get(cpf)
+
+    def adicionar(self, cpf: str, dados: Dict[str, str]) -> bool:
+        """Insere se o CPF ainda não existir. Retorna False se já existia."""
+        with self._lock:
+            if cpf in self._usuarios:
+                return False
+            self._usuarios[cpf] = dados
+            return True
+
+    def existentes(self, cpfs: Iterable[str]) -> Set[str]:
+        return {cpf for cpf in cpfs if cpf in self._usuarios}
+
+    def adicionar_lote(self, itens: Iterable[Tuple[str, Dict[str, str]]]) -> List[bool]:
+        """Insere vários usuários sob uma única trava; um bool por item, como `adicionar`."""
+        with self._lock:
+            inseridos = []
+            for cpf, dados in itens:
+                novo = cpf not in self._usuarios
+                if novo:
+                    self._usuarios[cpf] = dados
+                inseridos.append(novo)
+            return inseridos
+
+class _SQLite:
+    """Conexões SQLite por thread, em modo WAL (leitores não bloqueiam o escritor)."""
+
+    def __init__(self, caminho: str) -> None:
+        self.caminho = caminho
+        self._local = threading.local()
+
+    def conexao(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.caminho, timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+class SQLiteUserStore:
+    """Usuários de acesso compartilhados entre workers via SQLite (mesmo host).
+    Usuários nunca mudam depois de criados, então ficam em cache local após a
+    primeira leitura; CPFs ausentes sempre consultam o banco.
+    """
+
+    compartilhado = True
+
+    def __init__(self, caminho: str) -> None:
+        self._db = _SQLite(caminho)
+        self._db.conexao().execute(
+            "CREATE TABLE IF NOT EXISTS usuarios (cpf TEXT PRIMARY KEY, hashed_password TEXT NOT NULL)"
+        )
+        self._cache: Dict[str, Dict[str, str]] = {}
+
+    def __contains__(self, cpf: object) -> bool:
+        return isinstance(cpf, str) and self.get(cpf) is not None
+
+    def get(self, cpf: str) -> Optional[Dict[str, str]]:
+        dados = self._cache.get(cpf)
+        if dados is not None:
+            return dados
+        linha = self._db.conexao().execute(
+            "SELECT hashed_password FROM usuarios WHERE cpf = ?", (cpf,)
+        ).fetchone()
+        if linha is None:
+            return None
+        dados = {"hashed_password": linha[0]}
+        self._cache[cpf] = dados
+        return dados
+
+    def adicionar(self, cpf: str, dados: Dict[str, str]) -> bool:
+        cursor = self._db.conexao().execute(
+            "INSERT OR IGNORE INTO usuarios (cpf, hashed_password) VALUES (?, ?)",
+            (cpf, dados["hashed_password"]),
+        )
+        if cursor.rowcount == 0:
+            return False
+        self._cache[cpf] = dados
+        return True
+
+    def existentes(self, cpfs: Iterable[str]) -> Set[str]:
+        cpfs = list(cpfs)
+        conn = self._db.conexao()
+        encontrados: Set[str] = set()
+        for i in range(0, len(cpfs), 500):
+            parte = cpfs[i:i + 500]
+            marcadores = ",".join("?" * len(parte))
+            encontrados.update(
+                linha[0] for linha in conn.execute(f"SELECT cpf FROM usuarios WHERE cpf IN ({marcadores})", parte)
+            )
+        return encontrados
+
+    def adicionar_lote(self, itens: Iterable[Tuple[str, Dict[str, str]]]) -> List[bool]:
+        """Insere vários usuários numa única transação; um bool por item, como `adicionar`."""
+        itens = list(itens)
+        conn = self._db.conexao()
+        inseridos = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for cpf, dados in itens:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO usuarios (cpf, hashed_password) VALUES (?, ?)",
+                    (cpf, dados["hashed_password"]),
+                )
+                inseridos.append(cursor.rowcount == 1)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        for (cpf, dados), novo in zip(itens, inseridos):
+            if novo:
+                self._cache[cpf] = dados
+        return inseridos
+
+# ---------- Sessões (estado do BankApp) ----------
+class MemorySessionStore:
+    """Sessões em um dict do processo; `salvar` não precisa fazer nada."""
+
+    compartilhado = False
+
+    def __init__(self) -> None:
+        self._sessoes: Dict[str, BankApp] = {}
+
+    def __contains__(self, sid: object) -> bool:
+        return sid in self._sessoes
+
+    def get(self, sid: str) -> Optional[BankApp]:
+        return self._sessoes.get(sid)
+
+    def __getitem__(self, sid: str) -> BankApp:
+        return self._sessoes[sid]
+
+    def __setitem__(self, sid: str, bank: BankApp) -> None:
+        self._sessoes[sid] = bank
+
+    def carregar(self, sid: str) -> Optional[Tuple[int, BankApp]]:
+        bank = self._sessoes.get(sid)
+        return (0, bank) if bank is not None else None
+
+    def salvar(self, sid: str, bank: BankApp, versao: Optional[int] = None) -> bool:
+        return True
+
+    def descartar(self, sid: str, bank: BankApp) -> None:
+        pass
+
+    def sids(self) -> List[str]:
+        return list(self._sessoes)
+
+def _resumo(estado: bytes) -> bytes:
+    return hashlib.blake2b(estado, digest_size=16).digest()
+
+class SQLiteSessionStore:
+    """Sessões compartilhadas entre workers: o BankApp é serializado no SQLite
+    com um número de versão. O cache local guarda (versão, BankApp, resumo do
+    estado gravado); cada acesso consulta apenas a versão e só desserializa
+    quando outro worker gravou uma versão mais nova.
+
+    Quem altera uma sessão grava com `salvar(sid, bank, versao=)`, a versão
+    obtida em `carregar`: a gravação só vale se ninguém gravou depois da carga
+    (senão devolve False e a alteração deve ser refeita ou recusada), e uma
+    sessão sem mudanças desde a carga não é gravada nem muda de versão.
+
+    Cada versão desserializada substitui nos agregados do processo a versão
+    que estava em cache (ou entra neles, na primeira carga após o início).
+
+    Só as sessões são compartilhadas: o cache de Idempotency-Key, os limites
+    de taxa e os atores continuam por worker (uma repetição com a mesma
+    Idempotency-Key atendida por outro worker executa de novo).
+    """
+
+    compartilhado = True
+
+    def __init__(self, caminho: str) -> None:
+        self._db = _SQLite(caminho)
+        self._db.conexao().execute(
+            "CREATE TABLE IF NOT EXISTS sessoes (sid TEXT PRIMARY KEY, versao INTEGER NOT NULL, estado BLOB NOT NULL)"
+        )
+        self._cache: Dict[str, Tuple[int, BankApp, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, sid: object) -> bool:
+        return isinstance(sid, str) and self.get(sid) is not None
+
+    def get(self, sid: str) -> Optional[BankApp]:
+        conn = self._db.conexao()
+        linha = conn.execute("SELECT versao FROM sessoes WHERE sid = ?", (sid,)).fetchone()
+        if linha is None:
+            self._cache.pop(sid, None)
+            return None
+        em_cache = self._cache.get(sid)
+        if em_cache is not None and em_cache[0] == linha[0]:
+            return em_cache[1]
+        linha = conn.execute("SELECT versao, estado FROM sessoes WHERE sid = ?", (sid,)).fetchone()
+        if linha is None:
+            return None
+        with self._lock:  # uma troca por vez: a mesma versão não entra duas vezes nos agregados
+            anterior = self._cache.get(sid)
+            if anterior is not None and anterior[0] >= linha[0]:
+                return anterior[1]
+            bank = pickle.loads(linha[1])
+            if anterior is not None:
+                AGREGADOS.incorporar(anterior[1].contas, anterior[1].clientes, sinal=-1)
+            AGREGADOS.incorporar(bank.contas, bank.clientes)
+            # Resumo do BankApp carregado (repicklado: o estado gravado por outro
+            # processo pode diferir byte a byte, ex. ordem de sets de strings)
+            self._cache[sid] = (linha[0], bank, _resumo(pickle.dumps(bank, protocol=pickle.HIGHEST_PROTOCOL)))
+        return bank
+
+    def __getitem__(self, sid: str) -> BankApp:
+        bank = self.get(sid)
+        if bank is None:
+            raise KeyError(sid)
+        return bank
+
+    def __setitem__(self, sid: str, bank: BankApp) -> None:
+        self.salvar(sid, bank)
+
+    def sids(self) -> List[str]:
+        return [linha[0] for linha in self._db.conexao().execute("SELECT sid FROM sessoes")]
+
+    def carregar(self, sid: str) -> Optional[Tuple[int, BankApp]]:
+        """(versão, BankApp) atuais, para gravar depois com `salvar(..., versao=)`."""
+        if self.get(sid) is None:
+            return None
+        em_cache = self._cache.get(sid)
+        return em_cache[:2] if em_cache is not None else None
+
+    def salvar(self, sid: str, bank: BankApp, versao: Optional[int] = None) -> bool:
+        """Grava a sessão. Com `versao`, só grava se a sessão ainda estiver
+        nela (ninguém gravou depois da carga) e devolve se gravou; `versao=0`
+        cria a sessão só se ela não existir. Um BankApp sem mudanças desde a
+        carga daquela versão não é regravado."""
+        estado = pickle.dumps(bank, protocol=pickle.HIGHEST_PROTOCOL)
+        resumo = _resumo(estado)
+        em_cache = self._cache.get(sid)
+        if (versao is not None and em_cache is not None and em_cache[0] == versao
+                and em_cache[1] is bank and em_cache[2] == resumo):
+            return True
+        conn = self._db.conexao()
+        if versao == 0:
+            linha = conn.execute(
+                "INSERT INTO sessoes (sid, versao, estado) VALUES (?, 1, ?) ON CONFLICT(sid) DO NOTHING RETURNING versao",
+                (sid, estado),
+            ).fetchone()
+            if linha is None:
+                return False
+        elif versao is None:
+            linha = conn.execute(
+                "INSERT INTO sessoes (sid, versao, estado) VALUES (?, 1, ?) "
+                "ON CONFLICT(sid) DO UPDATE SET versao = versao + 1, estado = excluded.estado "
+                "RETURNING versao",
+                (sid, estado),
+            ).fetchone()
+        else:
+            linha = conn.execute(
+                "UPDATE sessoes SET versao = versao + 1, estado = ? WHERE sid = ? AND versao = ? RETURNING versao",
+                (estado, sid, versao),
+            ).fetchone()
+            if linha is None:
+                return False
+        self._cache[sid] = (linha[0], bank, resumo)
+        return True
+
+    def descartar(self, sid: str, bank: BankApp) -> None:
+        """Tira do cache (e dos agregados) um BankApp alterado cuja gravação
+        foi recusada; o próximo acesso carrega a versão gravada."""
+        with self._lock:
+            em_cache = self._cache.get(sid)
+            if em_cache is not None and em_cache[1] is bank:
+                del self._cache[sid]
+                AGREGADOS.incorporar(bank.contas, bank.clientes, sinal=-1)
+
+def criar_stores(tipo: Optional[str] = None, caminho: Optional[str] = None) -> Tuple[Any, Any]:
+    """Cria (usuários, sessões) conforme BANCO_STORE ("memory" ou "sqlite")."""
+    tipo = (tipo or os.getenv("BANCO_STORE", "memory")).lower()
+    if tipo == "memory":
+        return MemoryUserStore(), MemorySessionStore()
+    if tipo == "sqlite":
+        caminho = caminho or os.getenv("BANCO_STORE_PATH", "banco_store.db")
+        return SQLiteUserStore(caminho), SQLiteSessionStore(caminho)
+    raise ValueError(f"BANCO_STORE inválido: {tipo}")
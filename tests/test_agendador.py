@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+
+import agendador
+from agendador import Agendador
+from bank_service import BankApp
+
+def _sessao() -> BankApp:
+    bank = BankApp()
+    bank.novo_usuario_resultado("Ana", "1", "01/01/1990", "Rua A")
+    bank.login_resultado("1")
+    bank.nova_conta_resultado("corrente")  # conta 1 em todas as sessões
+    return bank
+
+def test_ids_unicos_entre_agendadores():
+    conta = _sessao().conta_logada()
+    quando = datetime.now() + timedelta(days=1)
+    a = Agendador().agendar(conta, "deposito", 1.0, quando)
+    b = Agendador().agendar(conta, "deposito", 1.0, quando)
+    assert a.id != b.id
+
+def test_agendamento_de_outra_sessao_nao_e_do_cliente(monkeypatch):
+    monkeypatch.setattr(agendador, "_AGENDADOR", Agendador())
+    quando = datetime.now() + timedelta(days=1)
+    ana, bia = _sessao(), _sessao()
+    id_ana = ana.agendar_resultado("deposito", 50.0, quando, origem="sessao-ana").dados["id"]
+    # Mesmo número de conta e o id na lista da outra sessão (ex.: sessões compartilhadas)
+    bia._agendamentos.append(id_ana)
+    assert bia.agendamentos_resultado(origem="sessao-bia").dados["agendamentos"] == []
+    assert not bia.cancelar_agendamento_resultado(id_ana, origem="sessao-bia").ok
+    assert [a["id"] for a in ana.agendamentos_resultado(origem="sessao-ana").dados["agendamentos"]] == [id_ana]
+    assert ana.cancelar_agendamento_resultado(id_ana, origem="sessao-ana").ok
+
+def test_ids_de_outro_worker_continuam_na_sessao(monkeypatch):
+    monkeypatch.setattr(agendador, "_AGENDADOR", Agendador())
+    bank = _sessao()
+    outro = Agendador().agendar(bank.conta_logada(), "deposito", 1.0, datetime.now() + timedelta(days=1))
+    bank._agendamentos.append(outro.id)
+    bank.agendamentos_resultado(origem="s")
+    assert bank._agendamentos == [outro.id]
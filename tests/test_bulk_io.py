@@ -0,0 +1,41 @@
+import bulk_io
+from bank_service import BankApp
+
+CLIENTES = [{"cpf": "1", "nome": "Ana", "data_nascimento": "01/01/1990", "endereco": "Rua A"}]
+CONTAS = [{"numero": 1, "cpf": "1", "saldo": 90.0, "tipo": "corrente"}]
+TRANSACOES = [
+    {"numero": 1, "tipo": "Deposito", "valor": 100.0, "data": "2026-01-02 10:00:00"},
+    {"numero": 1, "tipo": "Saque", "valor": 10.0, "data": "2026-01-03 10:00:00"},
+]
+
+def _importar(bank: BankApp) -> dict:
+    bulk_io.importar_clientes(bank, CLIENTES)
+    bulk_io.importar_contas(bank, CONTAS)
+    return bulk_io.importar_transacoes(bank, TRANSACOES)
+
+def test_reimportar_extrato_nao_duplica_historico():
+    bank = BankApp()
+    assert _importar(bank)["aceitos"] == 2
+    segunda = _importar(bank)
+    assert segunda["aceitos"] == 0 and len(segunda["rejeitados"]) == 2
+    conta = bank.contas[0]
+    assert len(conta.historico) == 2
+    assert conta.historico.saldo_em("2026-01-03") == conta.saldo == 90.0
+
+def test_resumos_ancorados_no_saldo_importado():
+    bank = BankApp()
+    bulk_io.importar_clientes(bank, CLIENTES)
+    bulk_io.importar_contas(bank, [{**CONTAS[0], "saldo": 590.0}])  # extrato parcial: saldo anterior de 500
+    bulk_io.importar_transacoes(bank, TRANSACOES, tamanho_lote=1)
+    historico = bank.contas[0].historico
+    assert historico.saldo_em("2026-01-01") == 0.0
+    assert historico.resumos_diarios[0]["abertura"] == 500.0
+    assert historico.saldo_em("2026-01-02") == 600.0
+    assert historico.saldo_em("2026-01-03") == 590.0
+
+def test_linha_fora_de_ordem_rejeitada():
+    bank = BankApp()
+    bulk_io.importar_clientes(bank, CLIENTES)
+    bulk_io.importar_contas(bank, CONTAS)
+    r = bulk_io.importar_transacoes(bank, list(reversed(TRANSACOES)))
+    assert r["aceitos"] == 1 and r["rejeitados"][0][0] == 2
@@ -0,0 +1,37 @@
+import pytest
+
+from banco import ContaCorrente, Deposito, PessoaFisica, contratar_emprestimo, quitar_emprestimo
+
+def _conta() -> ContaCorrente:
+    cliente = PessoaFisica("Ana", "123", "01/01/1990", "Rua A")
+    conta = ContaCorrente(1, cliente)
+    cliente.adicionar_conta(conta)
+    return conta
+
+def test_restaurar_recusa_data_anterior_ao_ultimo_dia():
+    historico = _conta().historico
+    historico._restaurar("Deposito", 10.0, "2026-10-19 10:00:00")
+    with pytest.raises(ValueError):
+        historico._restaurar("Deposito", 5.0, "2020-01-01 10:00:00")
+    assert [r["data"] for r in historico.resumos_diarios] == ["2026-10-19"]
+    assert historico.saldo_em("2020-01-01") == 0.0
+    assert len(historico) == 1
+
+def test_anexar_com_relogio_atrasado_mantem_a_ordem():
+    historico = _conta().historico
+    historico._anexar("Deposito", 10.0, "2026-10-19 10:00:00", 10.0)
+    historico._anexar("Deposito", 5.0, "2026-10-18 23:59:00", 15.0)
+    assert historico.transacoes[-1]["data"] == "2026-10-19 10:00:00"
+    assert historico.saldo_em("2026-10-19") == 15.0
+
+def test_credito_e_amortizacao_do_emprestimo_entram_nos_resumos():
+    conta = _conta()
+    cliente = conta.cliente
+    contratar_emprestimo(cliente, 1000.0, 10, 0.01)
+    Deposito(50.0).registrar(conta)
+    ultimo = conta.historico.resumos_diarios[-1]
+    assert ultimo["fechamento"] == conta.saldo == 1050.0
+    assert ultimo["totais"]["CreditoEmprestimo"] == 1000.0
+
+    quitar_emprestimo(cliente)  # devedor 1100 > saldo: sem quitação integral
+    assert conta.historico.resumos_diarios[-1]["fechamento"] == conta.saldo
@@ -0,0 +1,30 @@
+from datetime import datetime
+
+import banco
+from banco import ContaCorrente, PessoaFisica
+from historico_frio import ArquivoHistorico
+
+def _conta(numero):
+    conta = ContaCorrente(numero, PessoaFisica("Ana", str(numero), "01/01/1990", "Rua A"))
+    for dia in (1, 10, 20):
+        conta.historico._anexar("Deposito", 10.0, f"2024-03-{dia:02d} 10:00:00")
+    return conta
+
+def test_selar_contas_respeita_a_janela(tmp_path, monkeypatch):
+    frio = ArquivoHistorico(str(tmp_path), janela_dias=15)
+    sem_frio = _conta(2)
+    monkeypatch.setattr(banco, "_ARQUIVO_HISTORICO", frio)
+    conta = _conta(1)
+
+    r = frio.selar_contas([conta, sem_frio], hoje=datetime(2024, 3, 21))
+    # só o registro de 01/03 tem mais de 15 dias; a conta criada sem a camada fria fica intacta
+    assert r == {"contas": 2, "selados": 1}
+    assert conta.historico._transacoes.arquivados == 1
+    assert [t["data"][:10] for t in conta.historico.transacoes] == ["2024-03-01", "2024-03-10", "2024-03-20"]
+    assert type(sem_frio.historico._transacoes) is list and len(sem_frio.historico) == 3
+
+    # de novo no mesmo dia: nada a selar
+    assert frio.selar_contas([conta], hoje=datetime(2024, 3, 21))["selados"] == 0
+    # com a janela avançando, o registro mais novo continua na memória
+    assert frio.selar_contas([conta], hoje=datetime(2024, 6, 1))["selados"] == 1
+    assert len(conta.historico._transacoes) == 1 and len(conta.historico) == 3
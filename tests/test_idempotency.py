@@ -0,0 +1,10 @@
+from idempotency import IdempotencyStore
+
+def test_esquecer_faz_a_repeticao_executar_de_novo():
+    store = IdempotencyStore()
+    execucoes = []
+    fn = lambda: execucoes.append(1) or len(execucoes)
+    assert store.executar("k", fn) == 1
+    assert store.executar("k", fn) == 1
+    store.esquecer("k")
+    assert store.executar("k", fn) == 2
@@ -0,0 +1,27 @@
+import logging
+
+import banco
+from banco import ContaCorrente, Deposito, PessoaFisica, Transferencia
+
+def test_observador_com_erro_nao_interrompe_a_operacao(caplog):
+    cliente = PessoaFisica("Ana", "1", "01/01/1990", "Rua A")
+    origem, destino = ContaCorrente(1, cliente), ContaCorrente(2, cliente)
+    vistos = []
+
+    def falha(conta, tipo, valor):
+        raise RuntimeError("sink fora do ar")
+
+    def registra(conta, tipo, valor):
+        vistos.append((conta.numero, tipo))
+
+    banco.registrar_observador(falha)
+    banco.registrar_observador(registra)
+    try:
+        with caplog.at_level(logging.ERROR, logger="banco"):
+            assert Deposito(100.0).registrar(origem)
+            assert Transferencia(40.0, destino).registrar(origem)
+    finally:
+        banco.remover_observador(falha)
+        banco.remover_observador(registra)
+    assert vistos == [(1, "Deposito"), (1, "TransferenciaEnviada"), (2, "TransferenciaRecebida")]
+    assert len([r for r in caplog.records if "sink fora do ar" in r.exc_text]) == 3
@@ -0,0 +1,18 @@
+from banco import ContaPoupanca, PessoaFisica, Saque
+from poupanca import CarteiraPoupanca
+
+def test_juros_sobre_o_saldo_no_momento_do_credito():
+    conta = ContaPoupanca(1, PessoaFisica("Ana", "1", "01/01/1990", "Rua A"), taxa_diaria=0.01)
+    conta._saldo = 1000.0
+    carteira = CarteiraPoupanca([conta])
+    calcular = carteira._calcular_juros
+
+    def calcular_e_sacar(contas):
+        creditos = calcular(contas)
+        assert Saque(600.0).registrar(conta)  # saque entre o cálculo e o crédito
+        return creditos
+
+    carteira._calcular_juros = calcular_e_sacar
+    r = carteira.acumular()
+    assert r["total"] == 4.0 and r["creditadas"] == 1
+    assert conta.saldo == 404.0
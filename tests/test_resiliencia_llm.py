@@ -0,0 +1,108 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from resiliencia_llm import ABERTO, FECHADO, MEIO_ABERTO, CircuitBreaker, ModeloResiliente
+
+class ModeloFalso:
+    """Modelo local com `generate_content`: `falhar` injeta erro e `liberar`, se
+    definido, segura cada chamada até ser sinalizado (latência controlada)."""
+
+    def __init__(self) -> None:
+        self.chamadas = 0
+        self.falhar = False
+        self.liberar = None
+        self._lock = threading.Lock()
+
+    def generate_content(self, conteudo):
+        with self._lock:
+            self.chamadas += 1
+        if self.liberar is not None:
+            self.liberar.wait(5)
+        if self.falhar:
+            raise ConnectionError("modelo indisponível")
+        return SimpleNamespace(text="resposta do modelo")
+
+class Relogio:
+    def __init__(self) -> None:
+        self.agora = 0.0
+
+    def __call__(self) -> float:
+        return self.agora
+
+def _resiliente(modelo, relogio, prazo=5.0, max_falhas=2):
+    breaker = CircuitBreaker(max_falhas=max_falhas, limiar_lento=prazo, reabertura=30.0, relogio=relogio)
+    return ModeloResiliente(modelo, prazo=prazo, breaker=breaker)
+
+def test_modelo_lento_responde_no_prazo():
+    modelo = ModeloFalso()
+    modelo.liberar = threading.Event()
+    llm = _resiliente(modelo, Relogio(), prazo=0.2)
+    try:
+        inicio = time.monotonic()
+        r = llm.gerar("qual o horário?", mensagem="qual o horário?")
+        decorrido = time.monotonic() - inicio
+        assert not r.do_modelo and r.motivo == "timeout"
+        assert 0.2 <= decorrido < 1.0  # o modelo ainda está preso; o chamador não
+    finally:
+        modelo.liberar.set()
+        llm.encerrar()
+
+def test_circuito_aberto_nao_chama_o_modelo():
+    modelo = ModeloFalso()
+    modelo.falhar = True
+    llm = _resiliente(modelo, Relogio())
+    try:
+        for _ in range(2):
+            assert llm.gerar("oi").motivo == "erro"
+        assert llm.breaker.estado == ABERTO
+        chamadas = modelo.chamadas
+        respostas = [llm.gerar("oi") for _ in range(20)]
+        assert modelo.chamadas == chamadas
+        assert all(r.motivo == "circuito_aberto" for r in respostas)
+    finally:
+        llm.encerrar()
+
+def test_meio_aberto_deixa_passar_uma_unica_chamada_de_teste():
+    modelo = ModeloFalso()
+    modelo.falhar = True
+    relogio = Relogio()
+    llm = _resiliente(modelo, relogio)
+    try:
+        for _ in range(2):
+            llm.gerar("oi")
+        relogio.agora = 31.0
+        assert llm.breaker.estado == MEIO_ABERTO
+        modelo.falhar = False
+        modelo.liberar = threading.Event()
+        chamadas = modelo.chamadas
+        respostas = []
+        teste = threading.Thread(target=lambda: respostas.append(llm.gerar("oi")))
+        teste.start()
+        while modelo.chamadas == chamadas:  # a chamada de teste chegou ao modelo
+            time.sleep(0.001)
+        concorrentes = [llm.gerar("oi") for _ in range(10)]
+        modelo.liberar.set()
+        teste.join()
+        assert modelo.chamadas == chamadas + 1
+        assert all(r.motivo == "circuito_aberto" for r in concorrentes)
+        assert respostas[0].do_modelo and llm.breaker.estado == FECHADO
+    finally:
+        llm.encerrar()
+
+def test_falha_no_meio_aberto_reabre_o_circuito():
+    modelo = ModeloFalso()
+    modelo.falhar = True
+    relogio = Relogio()
+    llm = _resiliente(modelo, relogio)
+    try:
+        for _ in range(2):
+            llm.gerar("oi")
+        relogio.agora = 31.0
+        chamadas = modelo.chamadas
+        assert llm.gerar("oi").motivo == "erro"
+        assert llm.breaker.estado == ABERTO
+        assert llm.gerar("oi").motivo == "circuito_aberto"
+        assert modelo.chamadas == chamadas + 1
+    finally:
+        llm.encerrar()
@@ -0,0 +1,56 @@
+import threading
+import time
+
+import snapshot_mmap
+from banco import ContaCorrente, PessoaFisica
+from bank_service import BankApp
+
+def _snapshot(tmp_path, n=8):
+    bank = BankApp()
+    for i in range(n):
+        cliente = PessoaFisica(nome=f"Cliente {i}", cpf=f"{i:011d}", data_nascimento="01/01/1990", endereco=f"Rua {i}")
+        conta = ContaCorrente(i + 1, cliente)
+        conta.historico._anexar("Deposito", 100.0, "2024-01-02 10:00:00")
+        conta._saldo = 100.0
+        conta._publicar()
+        cliente.contas.append(conta)
+        bank.clientes.append(cliente)
+        bank.contas.append(conta)
+    caminho = str(tmp_path / "banco.snap")
+    snapshot_mmap.salvar(bank, caminho)
+    return snapshot_mmap.ArquivoSnapshot(caminho)
+
+def test_primeiro_acesso_concorrente_publica_objeto_completo(tmp_path, monkeypatch):
+    arquivo = _snapshot(tmp_path)
+    construir = snapshot_mmap.ArquivoSnapshot._construir_conta
+
+    def construir_devagar(self, i):
+        conta = construir(self, i)
+        time.sleep(0.01)  # janela em que a versão antiga já expunha a conta pela metade
+        return conta
+
+    monkeypatch.setattr(snapshot_mmap.ArquivoSnapshot, "_construir_conta", construir_devagar)
+    barreira = threading.Barrier(8)
+    vistas, erros = [], []
+
+    def acessar():
+        barreira.wait()
+        try:
+            for i in range(arquivo.n_contas):
+                conta = arquivo.conta(i)
+                vistas.append((i, conta, conta.saldo, conta.cliente, len(conta.historico.transacoes)))
+        except Exception as exc:  # noqa: BLE001
+            erros.append(exc)
+
+    threads = [threading.Thread(target=acessar) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not erros
+    for i, conta, saldo, cliente, n_transacoes in vistas:
+        assert conta is arquivo.conta(i)  # cada linha construída uma única vez
+        assert saldo == 100.0 and n_transacoes == 1
+        assert conta in cliente.contas and cliente is arquivo.cliente(arquivo.linha(cliente))
+    assert arquivo.materializados == 2 * arquivo.n_contas
@@ -0,0 +1,13 @@
+import re
+
+from bank_service import BankApp
+from statement_export import gerar_extrato_ofx
+
+def test_fitid_do_ofx_igual_ao_transacao_id():
+    bank = BankApp()
+    bank.novo_usuario_resultado("Ana", "1", "01/01/1990", "Rua A")
+    bank.login_resultado("1")
+    bank.nova_conta_resultado("corrente")
+    ids = [bank.depositar_resultado(v).transacao_id for v in (10.0, 20.0)]
+    ofx = "".join(gerar_extrato_ofx(bank.conta_logada()))
+    assert re.findall(r"<FITID>([^<]+)</FITID>", ofx) == ids
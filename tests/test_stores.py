@@ -0,0 +1,44 @@
+from bank_service import BankApp
+from stores import SQLiteSessionStore
+
+def _sessao(tmp_path):
+    caminho = str(tmp_path / "banco.db")
+    bank = BankApp()
+    bank.novo_usuario_resultado("Ana", "1", "01/01/1990", "Rua A")
+    bank.login_resultado("1")
+    bank.nova_conta_resultado("corrente")
+    SQLiteSessionStore(caminho)["s"] = bank
+    # Cada store faz o papel de um worker com o próprio cache
+    return SQLiteSessionStore(caminho), SQLiteSessionStore(caminho), caminho
+
+def test_leitura_nao_grava_nem_muda_versao(tmp_path):
+    worker1, _, _ = _sessao(tmp_path)
+    versao, bank = worker1.carregar("s")
+    bank.saldo_resultado()
+    assert worker1.salvar("s", bank, versao=versao)
+    assert worker1.carregar("s")[0] == versao
+
+def test_copia_lida_antes_nao_desfaz_deposito(tmp_path):
+    worker1, worker2, caminho = _sessao(tmp_path)
+    versao2, bank2 = worker2.carregar("s")  # leitura no worker 2
+    versao1, bank1 = worker1.carregar("s")
+    assert bank1.depositar_resultado(100.0).ok
+    assert worker1.salvar("s", bank1, versao=versao1)
+    assert worker2.salvar("s", bank2, versao=versao2)  # sem mudanças: não grava
+    assert SQLiteSessionStore(caminho).get("s").conta_logada().saldo == 100.0
+
+def test_alteracoes_concorrentes_a_segunda_e_recusada(tmp_path):
+    worker1, worker2, caminho = _sessao(tmp_path)
+    versao1, bank1 = worker1.carregar("s")
+    versao2, bank2 = worker2.carregar("s")
+    bank1.depositar_resultado(100.0)
+    bank2.depositar_resultado(50.0)
+    assert worker1.salvar("s", bank1, versao=versao1)
+    assert not worker2.salvar("s", bank2, versao=versao2)
+    worker2.descartar("s", bank2)
+    assert worker2.get("s").conta_logada().saldo == 100.0
+
+def test_versao_zero_so_cria_sessao_nova(tmp_path):
+    worker1, _, _ = _sessao(tmp_path)
+    assert not worker1.salvar("s", BankApp(), versao=0)
+    assert worker1.salvar("nova", BankApp(), versao=0)
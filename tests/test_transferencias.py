@@ -0,0 +1,31 @@
+from bank_service import LIMITE_EXCEDIDO, BankApp
+
+def _banco() -> BankApp:
+    bank = BankApp()
+    bank.novo_usuario_resultado("Ana", "1", "01/01/1990", "Rua A")
+    bank.login_resultado("1")
+    bank.nova_conta_resultado("corrente")
+    bank.nova_conta_resultado("corrente")
+    bank.depositar_resultado(900.0)
+    return bank
+
+def test_transacao_id_e_o_da_transferencia_efetivada():
+    bank = _banco()
+    r = bank.transferir_resultado(2, 100.0)
+    assert r.ok
+    enviada = bank.conta_logada().historico.transacoes[-1]
+    recebida = bank._conta_por_numero(2).historico.transacoes[-1]
+    assert r.transacao_id == enviada["transferencia"] == recebida["transferencia"]
+
+def test_saques_nao_bloqueiam_transferencias():
+    bank = _banco()
+    for _ in range(3):
+        assert bank.sacar_resultado(10.0).ok
+    assert not bank.sacar_resultado(10.0).ok
+    assert bank.transferir_resultado(2, 10.0).ok
+
+def test_transferencia_respeita_limite_por_operacao():
+    bank = _banco()
+    bank.depositar_resultado(900.0)
+    r = bank.transferir_resultado(2, 1500.0)
+    assert not r.ok and r.codigo_erro == LIMITE_EXCEDIDO
@@ -0,0 +1,385 @@
+from __future__ import annotations
+import argparse
+import contextlib
+import glob
+import hashlib
+import hmac
+import io
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from logging.handlers import RotatingFileHandler
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+# Replay contra um servidor HTTP é opcional: só disponível com o httpx instalado
+try:
+    import httpx  # type: ignore
+except Exception:
+    httpx = None  # type: ignore
+
+from bank_service import BankApp, Resultado
+from statement_export import gerar_extrato
+
+# Nomes dos argumentos posicionais dos comandos do chat, na ordem em que são
+# digitados: o comando é gravado com os argumentos nomeados (e o CPF anonimizado)
+ARGS_CHAT: Dict[str, tuple] = {
+    "login": ("cpf",),
+    "logout": (),
+    "nova_conta": ("tipo",),
+    "saldo": (),
+    "extrato": (),
+    "listar_contas": (),
+    "depositar": ("valor",),
+    "sacar": ("valor",),
+    "transferir": ("numero_destino", "valor"),
+    "remover_conta": ("numero",),
+    "simular_emprestimo": ("valor", "parcelas", "taxa"),
+    "contratar_emprestimo": ("valor", "parcelas", "taxa"),
+    "pagar_parcela": (),
+    "quitar_emprestimo": (),
+}
+
+SENHA_REPLAY = "senha-replay"
+
+# ---------- Gravação ----------
+class GravadorTrace:
+    """Grava uma linha JSON compacta por operação num arquivo rotativo.
+
+    Cada registro traz o instante (`t`), a operação (`op`), a sessão e os
+    parâmetros anonimizados (`s`, `p`), a duração em ms e o status HTTP. CPFs e
+    ids de sessão passam por HMAC-SHA256 com `sal`: o mesmo CPF vira sempre o
+    mesmo pseudônimo de 11 dígitos dentro do trace, mas não é recuperável sem o
+    sal. Nomes, endereços, datas de nascimento, senhas e textos livres do chat
+    não são gravados.
+
+    Sem `sal` explícito, cada processo sorteia o seu; com vários workers,
+    defina BANCO_TRACE_SAL para que os pseudônimos coincidam entre eles.
+    """
+
+    def __init__(self, caminho: str, max_bytes: int = 100 * 2**20, arquivos: int = 5,
+                 sal: Optional[bytes] = None) -> None:
+        self.caminho = caminho
+        self._sal = sal or os.urandom(16)
+        self._handler = RotatingFileHandler(caminho, maxBytes=max_bytes, backupCount=arquivos, encoding="utf-8")
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+        self._logger = logging.getLogger(f"banco.trace.{os.path.abspath(caminho)}")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.addHandler(self._handler)
+
+    @classmethod
+    def do_ambiente(cls) -> Optional["GravadorTrace"]:
+        """BANCO_TRACE=<arquivo> liga a gravação; BANCO_TRACE_MAX_MB, BANCO_TRACE_ARQUIVOS e
+        BANCO_TRACE_SAL ajustam rotação e anonimização."""
+        caminho = os.getenv("BANCO_TRACE")
+        if not caminho:
+            return None
+        sal = os.getenv("BANCO_TRACE_SAL")
+        return cls(
+            caminho,
+            max_bytes=int(float(os.getenv("BANCO_TRACE_MAX_MB", "100")) * 2**20),
+            arquivos=int(os.getenv("BANCO_TRACE_ARQUIVOS", "5")),
+            sal=sal.encode() if sal else None,
+        )
+
+    def _digest(self, valor: str) -> bytes:
+        return hmac.new(self._sal, valor.encode(), hashlib.sha256).digest()
+
+    def cpf(self, cpf: str) -> str:
+        return f"{int.from_bytes(self._digest('cpf:' + cpf)[:8], 'big') % 10**11:011d}"
+
+    def sessao(self, sid: Optional[str]) -> Optional[str]:
+        return self._digest("sid:" + sid)[:6].hex() if sid else None
+
+    def gravar(self, op: str, sid: Optional[str], params: Dict[str, Any], inicio: float,
+               duracao: float, status: int) -> None:
+        p = dict(params)
+        if p.get("cpf") is not None:
+            p["cpf"] = self.cpf(str(p["cpf"]))
+        if "cpfs" in p:
+            p["cpfs"] = [self.cpf(c) for c in p["cpfs"]]
+        registro = {"t": round(inicio, 6), "op": op, "s": self.sessao(sid), "p": p,
+                    "ms": round(duracao * 1_000, 3), "st": status}
+        self._logger.info(json.dumps(registro, separators=(",", ":"), ensure_ascii=False))
+
+    def fechar(self) -> None:
+        self._logger.removeHandler(self._handler)
+        self._handler.close()
+
+def ler_trace(caminho: str) -> List[Dict[str, Any]]:
+    """Lê o arquivo e suas rotações (caminho.N ... caminho.1, caminho) em ordem de `t`."""
+    rotacoes = [c for c in glob.glob(glob.escape(caminho) + ".*") if c.rsplit(".", 1)[1].isdigit()]
+    rotacoes.sort(key=lambda c: int(c.rsplit(".", 1)[1]), reverse=True)
+    eventos: List[Dict[str, Any]] = []
+    for arquivo in rotacoes + [caminho]:
+        if not os.path.exists(arquivo):
+            continue
+        with open(arquivo, encoding="utf-8") as f:
+            eventos.extend(json.loads(linha) for linha in f if linha.strip())
+    # A linha é escrita ao fim da requisição: reordena pelo início
+    eventos.sort(key=lambda e: e["t"])
+    return eventos
+
+# ---------- Replay ----------
+def _num(valor: Any) -> float:
+    return float(str(valor).replace(",", "."))
+
+def _exportar_extrato(bank: BankApp, p: Dict[str, Any]) -> Any:
+    conta = bank.conta_logada()
+    if conta is None:
+        return None
+    for _ in gerar_extrato(conta, p.get("formato", "csv")):
+        pass
+    return True
+
+# Operações do trace que têm equivalente no BankApp; as demais (autenticação,
+# texto livre do chat) só existem no servidor e são contadas como ignoradas
+OPERACOES_BANKAPP: Dict[str, Callable[[BankApp, Dict[str, Any]], Any]] = {
+    "usuario": lambda b, p: b.novo_usuario_resultado(f"Cliente {p['cpf']}", p["cpf"], "01/01/1990", "-"),
+    "usuarios_lote": lambda b, p: b.novos_usuarios_resultado(
+        {"nome": f"Cliente {c}", "cpf": c, "data_nascimento": "01/01/1990", "endereco": "-"} for c in p["cpfs"]
+    ),
+    "login": lambda b, p: b.login_resultado(p["cpf"]),
+    "logout": lambda b, p: b.logout_resultado(),
+    "nova_conta": lambda b, p: b.nova_conta_resultado(p.get("tipo", "corrente")),
+    "saldo": lambda b, p: b.saldo_resultado(),
+    "extrato": lambda b, p: b.extrato_resultado(),
+    "extrato_exportar": _exportar_extrato,
+    "listar_contas": lambda b, p: b.listar_contas_resultado(),
+    "depositar": lambda b, p: b.depositar_resultado(_num(p["valor"])),
+    "sacar": lambda b, p: b.sacar_resultado(_num(p["valor"])),
+    "transferir": lambda b, p: b.transferir_resultado(int(p["numero_destino"]), _num(p["valor"])),
+    "remover_conta": lambda b, p: b.remover_conta_resultado(int(p["numero"])),
+    "simular_emprestimo": lambda b, p: b.simular_emprestimo_resultado(_num(p["valor"]), int(p["parcelas"]), _num(p["taxa"])),
+    "contratar_emprestimo": lambda b, p: b.contratar_emprestimo_resultado(_num(p["valor"]), int(p["parcelas"]), _num(p["taxa"])),
+    "pagar_parcela": lambda b, p: b.pagar_parcela_resultado(),
+    "quitar_emprestimo": lambda b, p: b.quitar_emprestimo_resultado(),
+    # Clientes do replay se chamam "Cliente <cpf>"; a consulta original não é gravada
+    "buscar_clientes": lambda b, p: b.buscar_clientes_resultado("cliente", int(p.get("limite", 20)), p.get("campo")),
+    # A data é refeita a partir da antecedência gravada; ids de agendamento
+    # mudam a cada execução, então cancelar_agendamento não é reproduzido
+    "agendar": lambda b, p: b.agendar_resultado(p["tipo"], _num(p.get("valor", 0)), _quando(p), p.get("periodicidade"),
+                                                p.get("vezes"), p.get("numero_destino")),
+    "agendamentos": lambda b, p: b.agendamentos_resultado(),
+}
+
+def _quando(p: Dict[str, Any]) -> datetime:
+    return datetime.now() + timedelta(seconds=max(1, int(p.get("em_s", 0))))
+
+def _operacao_efetiva(evento: Dict[str, Any]) -> tuple:
+    """(op, params) a executar: comandos do chat viram a operação equivalente."""
+    op, p = evento["op"], evento.get("p") or {}
+    if op == "chat" and p.get("cmd") in ARGS_CHAT:
+        return p["cmd"], p
+    return op, p
+
+class _Estatisticas:
+    def __init__(self) -> None:
+        self.latencias: Dict[str, List[float]] = defaultdict(list)
+        self.gravadas: Dict[str, List[float]] = defaultdict(list)
+        self.erros: Dict[str, int] = defaultdict(int)
+        self.ignoradas: Dict[str, int] = defaultdict(int)
+
+    def registrar(self, op: str, duracao: float, erro: bool, gravada_ms: Optional[float]) -> None:
+        self.latencias[op].append(duracao * 1_000)
+        if gravada_ms is not None:
+            self.gravadas[op].append(gravada_ms)
+        if erro:
+            self.erros[op] += 1
+
+    def relatorio(self, total: float) -> Dict[str, Any]:
+        def pct(valores: List[float], p: float) -> Optional[float]:
+            if not valores:
+                return None
+            ordenados = sorted(valores)
+            return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]
+
+        operacoes = sum(len(v) for v in self.latencias.values())
+        return {
+            "operacoes": operacoes,
+            "duracao_s": total,
+            "ops_s": operacoes / total if total > 0 else None,
+            "ignoradas": dict(self.ignoradas),
+            "por_operacao": {
+                op: {
+                    "n": len(lat),
+                    "erros": self.erros[op],
+                    "total_ms": sum(lat),
+                    "p50_ms": pct(lat, 0.50),
+                    "p99_ms": pct(lat, 0.99),
+                    "gravado_p50_ms": pct(self.gravadas[op], 0.50),
+                    "gravado_p99_ms": pct(self.gravadas[op], 0.99),
+                }
+                for op, lat in sorted(self.latencias.items())
+            },
+        }
+
+def _compassar(eventos: Iterable[Dict[str, Any]], velocidade: float) -> Iterator[Dict[str, Any]]:
+    """Entrega os eventos no ritmo original dividido por `velocidade` (0 = sem espera)."""
+    inicio_trace = inicio_real = None
+    for evento in eventos:
+        if velocidade > 0:
+            if inicio_trace is None:
+                inicio_trace, inicio_real = evento["t"], time.perf_counter()
+            espera = (evento["t"] - inicio_trace) / velocidade - (time.perf_counter() - inicio_real)
+            if espera > 0:
+                time.sleep(espera)
+        yield evento
+
+def reproduzir(eventos: Iterable[Dict[str, Any]], velocidade: float = 0.0) -> Dict[str, Any]:
+    """Reexecuta o trace em BankApps novos, um por sessão gravada (como o servidor)."""
+    sessoes: Dict[str, BankApp] = {}
+    stats = _Estatisticas()
+    relogio = time.perf_counter
+    inicio = relogio()
+    # As operações do BankApp imprimem mensagens; a saída não interessa ao replay
+    with contextlib.redirect_stdout(io.StringIO()):
+        for evento in _compassar(eventos, velocidade):
+            op, p = _operacao_efetiva(evento)
+            fn = OPERACOES_BANKAPP.get(op)
+            sid = evento.get("s")
+            if op == "sessao" and sid:
+                sessoes[sid] = BankApp()
+                continue
+            if fn is None:
+                stats.ignoradas[op] += 1
+                continue
+            bank = sessoes.setdefault(sid, BankApp()) if sid else BankApp()
+            t0 = relogio()
+            r = fn(bank, p)
+            duracao = relogio() - t0
+            erro = r is None or (isinstance(r, Resultado) and not r.ok)
+            stats.registrar(op, duracao, erro, evento.get("ms") if evento["op"] == op else None)
+    return stats.relatorio(relogio() - inicio)
+
+class _ClienteReplay:
+    """Traduz eventos do trace em requisições HTTP para um servidor novo.
+
+    Cada sessão gravada ganha uma sessão real e um usuário de acesso próprio
+    (senha fixa) para obter o JWT; registros e tokens gravados são refeitos
+    com o CPF pseudônimo.
+    """
+
+    def __init__(self, cliente: Any) -> None:
+        self.c = cliente
+        self.sessoes: Dict[Optional[str], str] = {}
+        self.tokens: Dict[Optional[str], str] = {}
+
+    def _sid(self, s: Optional[str]) -> str:
+        if s not in self.sessoes:
+            self.sessoes[s] = self.c.get("/session").json()["sessionId"]
+        return self.sessoes[s]
+
+    def _cabecalhos(self, s: Optional[str]) -> Dict[str, str]:
+        if s not in self.tokens:
+            cpf = f"replay-{s or 'anon'}"
+            self.c.post("/auth/register", json={"cpf": cpf, "password": SENHA_REPLAY})
+            r = self.c.post("/auth/token", json={"cpf": cpf, "password": SENHA_REPLAY})
+            self.tokens[s] = r.json()["access_token"]
+        return {"Authorization": f"Bearer {self.tokens[s]}", "X-Session-Id": self._sid(s)}
+
+    def executar(self, evento: Dict[str, Any]) -> Any:
+        op, s, p = evento["op"], evento.get("s"), evento.get("p") or {}
+        c = self.c
+        if op == "sessao":
+            self.sessoes[s] = c.get("/session").json()["sessionId"]
+            return None
+        if op == "registro":
+            return c.post("/auth/register", json={"cpf": p["cpf"], "password": SENHA_REPLAY})
+        if op == "token":
+            return c.post("/auth/token", json={"cpf": p["cpf"], "password": SENHA_REPLAY})
+        if op == "usuario":
+            return c.post("/user", headers={"X-Session-Id": self._sid(s)}, json={
+                "nome": f"Cliente {p['cpf']}", "cpf": p["cpf"], "data_nascimento": "01/01/1990", "endereco": "-",
+            })
+        if op == "usuarios_lote":
+            # Exige BANCO_ADMIN_TOKEN no servidor e BANCO_ADMIN_TOKEN igual aqui
+            return c.post("/users/bulk", headers={"X-Session-Id": self._sid(s),
+                                                  "X-Admin-Token": os.getenv("BANCO_ADMIN_TOKEN", "")},
+                          json={"usuarios": [{"nome": f"Cliente {cpf}", "cpf": cpf, "data_nascimento": "01/01/1990",
+                                              "endereco": "-", "password": SENHA_REPLAY} for cpf in p["cpfs"]]})
+        if op == "buscar_clientes":
+            return c.get("/clientes/busca", headers={"X-Session-Id": self._sid(s),
+                                                     "X-Admin-Token": os.getenv("BANCO_ADMIN_TOKEN", "")},
+                         params={"q": "cliente", "limite": p.get("limite", 20),
+                                 **({"campo": p["campo"]} if p.get("campo") else {})})
+        h = self._cabecalhos(s)
+        if op == "chat":
+            if p.get("cmd"):
+                args = [str(p[nome]) for nome in ARGS_CHAT.get(p["cmd"], ()) if nome in p]
+                mensagem = " ".join([f"/{p['cmd']}", *args])
+            else:
+                mensagem = "?" * max(1, int(p.get("livre", 1)))
+            return c.post("/chat", json={"message": mensagem}, headers=h)
+        rotas: Dict[str, Callable[[], Any]] = {
+            "login": lambda: c.post(f"/login/{p['cpf']}", headers=h),
+            "logout": lambda: c.post("/logout", headers=h),
+            "nova_conta": lambda: c.post("/conta", params={"tipo": p.get("tipo", "corrente")}, headers=h),
+            "saldo": lambda: c.get("/saldo", headers=h),
+            "extrato": lambda: c.get("/extrato", headers=h),
+            "extrato_exportar": lambda: c.get("/extrato/exportar", params={"formato": p.get("formato", "csv")}, headers=h),
+            "listar_contas": lambda: c.get("/contas", headers=h),
+            "depositar": lambda: c.post("/depositar", json={"valor": p["valor"]}, headers=h),
+            "sacar": lambda: c.post("/sacar", json={"valor": p["valor"]}, headers=h),
+            "transferir": lambda: c.post("/transferir", json={"numero_destino": p["numero_destino"], "valor": p["valor"]}, headers=h),
+            "remover_conta": lambda: c.delete(f"/conta/{p['numero']}", headers=h),
+            "simular_emprestimo": lambda: c.post("/simular_emprestimo", json=p, headers=h),
+            "contratar_emprestimo": lambda: c.post("/contratar_emprestimo", json=p, headers=h),
+            "pagar_parcela": lambda: c.post("/pagar_parcela", headers=h),
+            "quitar_emprestimo": lambda: c.post("/quitar_emprestimo", headers=h),
+            "agendar": lambda: c.post("/agendamentos", json={
+                **{k: p[k] for k in ("tipo", "valor", "periodicidade", "vezes", "numero_destino") if p.get(k) is not None},
+                "quando": _quando(p).isoformat(),
+            }, headers=h),
+            "agendamentos": lambda: c.get("/agendamentos", headers=h),
+        }
+        return rotas[op]() if op in rotas else None
+
+def reproduzir_http(eventos: Iterable[Dict[str, Any]], url: str, velocidade: float = 0.0) -> Dict[str, Any]:
+    """Reexecuta o trace, em sequência, contra o servidor em `url`."""
+    if httpx is None:
+        raise RuntimeError("Replay HTTP requer o pacote httpx.")
+    stats = _Estatisticas()
+    relogio = time.perf_counter
+    inicio = relogio()
+    with httpx.Client(base_url=url, timeout=30.0) as c:
+        replay = _ClienteReplay(c)
+        for evento in _compassar(eventos, velocidade):
+            t0 = relogio()
+            r = replay.executar(evento)
+            duracao = relogio() - t0
+            if r is None:
+                stats.ignoradas[evento["op"]] += 1
+                continue
+            stats.registrar(evento["op"], duracao, r.status_code >= 400, evento.get("ms"))
+    return stats.relatorio(relogio() - inicio)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay de traces de operações gravados pelo servidor (BANCO_TRACE).")
+    parser.add_argument("trace", help="Arquivo do trace (as rotações .1, .2... são lidas junto)")
+    parser.add_argument("--velocidade", type=float, default=0.0,
+                        help="0 = o mais rápido possível; 1 = ritmo original; 2 = duas vezes mais rápido")
+    parser.add_argument("--url", help="Reexecuta contra um servidor HTTP em vez de um BankApp em processo")
+    parser.add_argument("--saida", help="Arquivo JSON para gravar o relatório")
+    args = parser.parse_args(argv)
+
+    eventos = ler_trace(args.trace)
+    if args.url:
+        relatorio = reproduzir_http(eventos, args.url, args.velocidade)
+    else:
+        relatorio = reproduzir(eventos, args.velocidade)
+    print(f"{relatorio['operacoes']} operações em {relatorio['duracao_s']:.2f}s "
+          f"({relatorio['ops_s'] or 0:,.0f} ops/s); ignoradas: {relatorio['ignoradas'] or '-'}")
+    print(f"{'operação':<22} {'n':>8} {'erros':>6} {'p50 ms':>9} {'p99 ms':>9} {'gravado p99':>12}")
+    for op, r in relatorio["por_operacao"].items():
+        gravado = f"{r['gravado_p99_ms']:.3f}" if r["gravado_p99_ms"] is not None else "-"
+        print(f"{op:<22} {r['n']:>8} {r['erros']:>6} {r['p50_ms']:>9.3f} {r['p99_ms']:>9.3f} {gravado:>12}")
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+
+if __name__ == "__main__":
+    main()